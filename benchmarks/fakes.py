@@ -0,0 +1,131 @@
+"""Deterministic stand-ins for chat models and critics.
+
+Nothing here touches the network: the fake model returns canned text of a
+fixed size (optionally after a fixed delay, to simulate provider latency) and
+reports token usage like a real provider would, so the metrics and usage
+callbacks see realistic data.
+"""
+
+import asyncio
+import time
+from typing import Any, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers every prompt with ``response_size`` characters.
+
+    The answer is derived from the number of messages in the prompt, so
+    successive rounds produce different drafts (no accidental convergence).
+    """
+
+    response_size: int = 200
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-reflection-benchmark"
+
+    def _result(self, messages: list[BaseMessage]) -> ChatResult:
+        prefix = f"draft {len(messages)}: "
+        content = prefix + "x" * max(self.response_size - len(prefix), 0)
+        input_tokens = sum(len(str(m.content)) for m in messages) // 4
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": len(content) // 4,
+                "total_tokens": input_tokens + len(content) // 4,
+            },
+            response_metadata={"model_name": self._llm_type},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._result(messages)
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._result(messages)
+
+
+def create_fake_assistant(model: FakeChatModel):
+    """A one-node assistant graph around ``model``, like the examples'."""
+
+    def call_model(state: dict) -> dict:
+        return {"messages": model.invoke(state["messages"])}
+
+    async def acall_model(state: dict) -> dict:
+        return {"messages": await model.ainvoke(state["messages"])}
+
+    return (
+        StateGraph(MessagesState)
+        .add_node("call_model", RunnableLambda(call_model, afunc=acall_model))
+        .add_edge(START, "call_model")
+        .add_edge("call_model", END)
+        .compile()
+    )
+
+
+class FakeCritic:
+    """Critic that rejects the first ``rounds - 1`` drafts of a run.
+
+    The round is counted from the critiques already in the conversation, so
+    the critic is stateless and safe to share between concurrent runs.
+    """
+
+    def __init__(self, rounds: int, critique_size: int = 100, latency: float = 0.0):
+        self.rounds = rounds
+        self.critique_size = critique_size
+        self.latency = latency
+
+    def _verdict(self, state: dict) -> Optional[dict]:
+        critiques = sum(isinstance(m, HumanMessage) for m in state["messages"]) - 1
+        if critiques + 1 >= self.rounds:
+            return None
+        content = f"critique {critiques + 1}: " + "y" * self.critique_size
+        return {"messages": [HumanMessage(content=content)]}
+
+    def __call__(self, state: dict) -> Optional[dict]:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._verdict(state)
+
+    async def acall(self, state: dict) -> Optional[dict]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._verdict(state)
+
+    def as_graph(self):
+        """The critic as a one-node judge graph, like the examples'."""
+        return (
+            StateGraph(MessagesState)
+            .add_node("judge", RunnableLambda(self, afunc=self.acall))
+            .add_edge(START, "judge")
+            .add_edge("judge", END)
+            .compile()
+        )
@@ -0,0 +1,333 @@
+"""Offline benchmarks for the reflection graph.
+
+Runs entirely with fake models and critics (see ``benchmarks/fakes.py``), so no
+network access or API keys are needed, and writes the results as JSON.
+
+Usage:
+    python -m benchmarks.run                        # all benchmarks, JSON to stdout
+    python -m benchmarks.run --quick -o results.json
+    python -m benchmarks.run --only round_overhead throughput
+    python -m benchmarks.run -o new.json --compare baseline.json --tolerance 0.25
+
+With ``--compare`` the exit code is 1 if any tracked number regressed by more
+than the tolerance against the baseline file.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Callable
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from langgraph_reflection import (
+    astream_reflection_batch,
+    create_reflection_graph,
+    stream_reflection_batch,
+)
+
+from benchmarks.fakes import FakeChatModel, FakeCritic, create_fake_assistant
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Graph options whose per-round overhead is tracked separately
+VARIANTS: dict[str, dict[str, Any]] = {
+    "default": {},
+    "cascade": {"critics": 3},
+    "parallel": {"critics": 3, "critic_mode": "parallel"},
+    "convergence": {"detect_convergence": True},
+    "compaction": {"compaction": True},
+    "metrics": {"metrics": True},
+    "speculative": {"num_drafts": 2},
+}
+
+# Where a larger number is better; everything else is a cost
+HIGHER_IS_BETTER = ("items_per_second",)
+
+
+def _build_app(rounds: int, response_size: int = 200, latency: float = 0.0, **options: Any):
+    critics = options.pop("critics", 1)
+    assistant = create_fake_assistant(FakeChatModel(response_size=response_size, latency=latency))
+    # Only the last critic rejects; the others pass every draft
+    reflection = [FakeCritic(rounds=1).as_graph() for _ in range(critics - 1)]
+    reflection.append(FakeCritic(rounds=rounds, latency=latency).as_graph())
+    return create_reflection_graph(assistant, reflection, **options).compile()
+
+
+def _input(i: int = 0) -> dict:
+    return {"messages": [HumanMessage(content=f"task {i}")]}
+
+
+def _config(rounds: int) -> dict:
+    # Two steps per round plus slack, so the loop ends on acceptance
+    return {"recursion_limit": 2 * rounds + 5}
+
+
+def _timed(fn: Callable[[], Any], repeat: int) -> list[float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def bench_round_overhead(quick: bool) -> dict:
+    """Framework time per round, with instant fake models and critics.
+
+    The cost of calling the fake model and critic directly is measured too and
+    subtracted, so the result is what the graph machinery adds per round.
+    """
+    rounds = 5
+    repeat = 5 if quick else 20
+    model = FakeChatModel()
+    critic = FakeCritic(rounds=rounds)
+
+    def direct() -> None:
+        messages = list(_input()["messages"])
+        while True:
+            messages.append(model.invoke(messages))
+            verdict = critic({"messages": messages})
+            if verdict is None:
+                break
+            messages.extend(verdict["messages"])
+
+    baseline = statistics.median(_timed(direct, repeat)) / rounds
+    results: dict[str, Any] = {"rounds": rounds, "direct_seconds_per_round": baseline}
+    for name, options in VARIANTS.items():
+        app = _build_app(rounds, **options)
+        app.invoke(_input(), _config(rounds))  # warm-up
+        per_round = statistics.median(
+            _timed(lambda: app.invoke(_input(), _config(rounds)), repeat)
+        ) / rounds
+        results[name] = {
+            "seconds_per_round": per_round,
+            "overhead_seconds_per_round": max(per_round - baseline, 0.0),
+        }
+    return results
+
+
+def bench_throughput(quick: bool) -> dict:
+    """Completed runs per second against concurrency, with 20ms fake latency."""
+    rounds = 2
+    latency = 0.02
+    count = 16 if quick else 64
+    levels = [1, 4, 16] if quick else [1, 2, 4, 8, 16, 32]
+    app = _build_app(rounds, latency=latency)
+    inputs = [_input(i) for i in range(count)]
+    results: dict[str, Any] = {"inputs": count, "rounds": rounds, "latency": latency}
+
+    def run_sync(concurrency: int) -> None:
+        for result in stream_reflection_batch(
+            app, inputs, max_concurrency=concurrency, config=_config(rounds)
+        ):
+            if not result.ok:
+                raise result.error
+
+    async def run_async(concurrency: int) -> None:
+        async for result in astream_reflection_batch(
+            app, inputs, max_concurrency=concurrency, config=_config(rounds)
+        ):
+            if not result.ok:
+                raise result.error
+
+    for concurrency in levels:
+        elapsed = _timed(lambda: run_sync(concurrency), 1)[0]
+        results[f"sync_c{concurrency}"] = {"items_per_second": count / elapsed}
+        elapsed = _timed(lambda: asyncio.run(run_async(concurrency)), 1)[0]
+        results[f"async_c{concurrency}"] = {"items_per_second": count / elapsed}
+    return results
+
+
+def bench_memory(quick: bool) -> dict:
+    """Peak traced memory of one run against rounds and message size.
+
+    Fails if a compacted run still holds more than one full-size draft.
+    """
+    rounds_levels = [2, 8] if quick else [2, 4, 8, 16]
+    sizes = [1_000, 10_000] if quick else [1_000, 10_000, 100_000]
+    results: dict[str, Any] = {}
+    for compaction in (False, True):
+        for rounds in rounds_levels:
+            for size in sizes:
+                app = _build_app(rounds, response_size=size, compaction=compaction)
+                tracemalloc.start()
+                try:
+                    state = app.invoke(_input(), _config(rounds))
+                    _, peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+                key = f"{'compacted' if compaction else 'full'}_r{rounds}_s{size}"
+                full_drafts = sum(
+                    isinstance(m, AIMessage) and len(str(m.content)) >= size
+                    for m in state["messages"]
+                )
+                if compaction and full_drafts > 1:
+                    # Otherwise a broken compaction would just be recorded
+                    # as the new baseline
+                    raise RuntimeError(f"{key}: compaction kept {full_drafts} full drafts")
+                results[key] = {
+                    "peak_bytes": peak,
+                    "state_chars": sum(len(str(m.content)) for m in state["messages"]),
+                    "full_drafts": full_drafts,
+                }
+    return results
+
+
+COLD_START_SCRIPT = """
+import os, runpy, sys, time
+start = time.perf_counter()
+module = runpy.run_path(os.path.join(sys.argv[1], "examples", "coding.py"), run_name="benchmark")
+loaded = time.perf_counter()
+module["get_reflection_app"]()
+print(loaded - start, time.perf_counter() - loaded)
+"""
+
+
+def bench_cold_start(quick: bool) -> dict:
+    """Time to load ``examples/coding.py`` and build its app in a fresh interpreter.
+
+    ``load_seconds`` is what ``langgraph dev`` pays when it loads the module,
+    ``build_seconds`` what the first request pays for building the app. Dummy
+    Azure credentials are set so the example configures itself; nothing is
+    sent over the network.
+    """
+    repeat = 3 if quick else 7
+    env = {
+        **os.environ,
+        "AZURE_OPENAI_API_KEY": "benchmark",
+        "AZURE_OPENAI_ENDPOINT": "https://benchmark.invalid/",
+        "PYTHONPATH": os.pathsep.join(
+            [str(REPO_ROOT), str(REPO_ROOT / "src"), os.environ.get("PYTHONPATH", "")]
+        ),
+    }
+    load, build, process = [], [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", COLD_START_SCRIPT, str(REPO_ROOT)],
+            env=env,
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+        )
+        process.append(time.perf_counter() - start)
+        if output.returncode != 0:
+            return {"error": output.stderr.strip().splitlines()[-1]}
+        load_seconds, build_seconds = output.stdout.strip().splitlines()[-1].split()
+        load.append(float(load_seconds))
+        build.append(float(build_seconds))
+    return {
+        "load_seconds": statistics.median(load),
+        "build_seconds": statistics.median(build),
+        "process_seconds": statistics.median(process),
+    }
+
+
+BENCHMARKS: dict[str, Callable[[bool], dict]] = {
+    "round_overhead": bench_round_overhead,
+    "throughput": bench_throughput,
+    "memory": bench_memory,
+    "cold_start": bench_cold_start,
+}
+
+
+def _metadata() -> dict:
+    def package_version(name: str) -> str | None:
+        try:
+            return version(name)
+        except PackageNotFoundError:
+            return None
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "langgraph": package_version("langgraph"),
+        "langchain-core": package_version("langchain-core"),
+        "langgraph-reflection": package_version("langgraph-reflection"),
+    }
+
+
+def _flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = float(value)
+    return flat
+
+
+TRACKED_SUFFIXES = (
+    "seconds_per_round",
+    "items_per_second",
+    "peak_bytes",
+    "load_seconds",
+    "build_seconds",
+)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return a description of every tracked number that regressed."""
+    current = _flatten(results["results"])
+    previous = _flatten(baseline["results"])
+    regressions = []
+    for path, old in previous.items():
+        new = current.get(path)
+        if new is None or old == 0 or not path.endswith(TRACKED_SUFFIXES):
+            continue
+        if path.endswith(HIGHER_IS_BETTER):
+            change = (old - new) / old
+        else:
+            change = (new - old) / old
+        if change > tolerance:
+            regressions.append(f"{path}: {old:.6g} -> {new:.6g} ({change:+.0%} worse)")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument("--quick", action="store_true", help="fewer repetitions and sizes")
+    parser.add_argument("-o", "--output", help="write the JSON results to this file")
+    parser.add_argument("--compare", help="baseline JSON file to check for regressions")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed relative regression (default 0.2)"
+    )
+    args = parser.parse_args(argv)
+
+    results: dict[str, Any] = {"metadata": {**_metadata(), "quick": args.quick}, "results": {}}
+    for name in args.only or BENCHMARKS:
+        print(f"running {name}...", file=sys.stderr)
+        results["results"][name] = BENCHMARKS[name](args.quick)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
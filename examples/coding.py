@@ -19,44 +19,110 @@ To run with langgraph dev:
 ```bash
 langgraph dev
 ```
-"""
 
-from langchain_core.messages import HumanMessage
-from langgraph_reflection import create_reflection_graph
+The app is built lazily by `make_graph` on the first request; call `warm_up()`
+to build it, create the model clients and start Pyright ahead of time.
+"""
 
-from examples.coding.assistant import create_assistant_graph
-from examples.coding.judge import create_judge_graph
-from examples.coding.config import setup_azure_openai
+import functools
+from typing import Optional
 
 
 def create_graphs():
     """Create and configure the assistant and judge graphs."""
+    from langgraph_reflection import ModelLadderConfig, create_reflection_graph
+
+    from langchain_core.runnables import RunnableLambda
+
+    from examples.coding.assistant import create_assistant_graph
+    from examples.coding.config import get_code_execution_mode
+    from examples.coding.judge import (
+        acheck_execution,
+        check_execution,
+        check_syntax,
+        create_judge_graph,
+    )
+
     # Create the assistant graph
     assistant_graph = create_assistant_graph()
 
     # Create the judge graph
     judge_graph = create_judge_graph()
 
-    # Create the complete reflection graph
-    return create_reflection_graph(assistant_graph, judge_graph).compile()
+    # Create the complete reflection graph, with a cheap syntax check
+    # running before the Pyright judge, and optionally the code being run
+    # once it type-checks
+    critics = [check_syntax, judge_graph]
+    if get_code_execution_mode() != "off":
+        critics.append(RunnableLambda(check_execution, afunc=acheck_execution))
+    return create_reflection_graph(
+        assistant_graph, critics, config_schema=ModelLadderConfig
+    ).compile()
+
+
+@functools.lru_cache(maxsize=1)
+def get_reflection_app():
+    """Build the reflection app on first use and return the same instance afterwards.
+
+    Heavy imports (LangChain, openevals) and graph compilation happen here
+    rather than when this module is loaded, so `langgraph dev` and new workers
+    start quickly.
+    """
+    from examples.coding.config import setup_azure_openai
+
+    # Initialize Azure OpenAI if environment variables are set
+    # This allows the module to work if env vars are already configured
+    try:
+        setup_azure_openai()
+    except ValueError:
+        # Environment variables not set, user needs to call setup_azure_openai() before using
+        pass
 
+    # Create the reflection app (will use Azure OpenAI if configured)
+    return create_graphs()
 
-# Initialize Azure OpenAI if environment variables are set
-# This allows the module to work if env vars are already configured
-try:
-    setup_azure_openai()
-except ValueError:
-    # Environment variables not set, user needs to call setup_azure_openai() before using
-    pass
 
+def make_graph(config: Optional[dict] = None):
+    """Graph factory referenced by langgraph.json.
+
+    Args:
+        config: The run configuration passed by the LangGraph server (unused)
+
+    Returns:
+        CompiledStateGraph: The shared reflection app
+    """
+    return get_reflection_app()
+
+
+def warm_up() -> None:
+    """Do the expensive first-request work ahead of time.
+
+    Builds the reflection app, creates the chat model clients and starts the
+    Pyright backend (warm workers for the pool backend, a first run otherwise),
+    so that the first real request does not pay for any of it.
+    """
+    from examples.coding.assistant import get_model
+    from examples.coding.judge import warm_up_judge
+
+    get_reflection_app()
+    get_model()
+    warm_up_judge()
+
+
+def __getattr__(name: str):
+    # `reflection_app` used to be built at import time; keep it importable
+    if name == "reflection_app":
+        return get_reflection_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Create the reflection app (will use Azure OpenAI if configured)
-reflection_app = create_graphs()
 
 if __name__ == "__main__":
     """Run an example query through the reflection system."""
+    from langchain_core.messages import HumanMessage
+
     # Setup Azure OpenAI (if not already set via environment variables)
     # Uncomment and fill in your credentials if not using environment variables:
+    # from examples.coding.config import setup_azure_openai
     # setup_azure_openai(
     #     api_key="your-azure-openai-api-key",
     #     endpoint="https://your-resource.openai.azure.com/",
@@ -68,5 +134,5 @@ if __name__ == "__main__":
     ]
 
     print("Running example with reflection...")
-    result = reflection_app.invoke({"messages": example_query})
+    result = get_reflection_app().invoke({"messages": example_query})
     print("Result:", result)
@@ -1,7 +1,17 @@
 """Coding example module with assistant and judge subgraphs."""
 
-from .assistant import create_assistant_graph
-from .judge import create_judge_graph
-
 __all__ = ["create_assistant_graph", "create_judge_graph"]
 
+
+def __getattr__(name: str):
+    # Imported on first use, so loading e.g. ``examples.coding.config`` does
+    # not pull in LangChain and openevals
+    if name == "create_assistant_graph":
+        from .assistant import create_assistant_graph
+
+        return create_assistant_graph
+    if name == "create_judge_graph":
+        from .judge import create_judge_graph
+
+        return create_judge_graph
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
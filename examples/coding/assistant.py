@@ -1,25 +1,87 @@
 """Assistant graph module for handling user queries and generating responses."""
 
-from langchain.chat_models import init_chat_model
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langgraph.graph import StateGraph, MessagesState, START, END
+from langgraph_reflection import acall, call, get_ladder_model, run_priority
 
-from .config import get_azure_model_name
+from .config import get_azure_model_name, get_model_ladder
 
 
-def call_model(state: dict) -> dict:
-    """Process the user query with Azure OpenAI GPT-4o-mini model.
+def _as_azure_tier(tier):
+    # In this example a bare name is an Azure deployment; "provider:model"
+    # names and dict rungs are left to ``get_chat_model``
+    if isinstance(tier, str) and ":" not in tier:
+        return {"model": get_azure_model_name(tier), "model_provider": "azure_openai"}
+    return tier
+
+
+def get_model(config: RunnableConfig | None = None, messages: list | None = None) -> tuple:
+    """Return the shared client for the next draft and the provider it is scheduled under.
+
+    The first draft uses the first deployment of the model ladder (GPT-4o-mini
+    by default); each critique moves one deployment up, see ``get_model_ladder``.
+
+    Args:
+        config: Run configuration; ``configurable["model_ladder"]`` overrides the
+            ladder (plain names are Azure deployments), and a
+            ``configurable["temperature"]`` set per draft by the reflection
+            graph selects a client with that temperature
+        messages: The conversation so far, used to count critiques
+
+    Returns:
+        tuple: The chat model and its provider name
+    """
+    config = config or {}
+    configurable = config.get("configurable", {})
+    if configurable.get("model_ladder"):
+        ladder = [_as_azure_tier(tier) for tier in configurable["model_ladder"]]
+        config = {**config, "configurable": {**configurable, "model_ladder": ladder}}
+    temperature = configurable.get("temperature")
+    model, tier = get_ladder_model(
+        config,
+        messages or [],
+        get_model_ladder(),
+        **({} if temperature is None else {"temperature": temperature}),
+    )
+    name = tier["model"]
+    provider = tier.get("model_provider") or name.split(":")[0]
+    return model, provider
+
+
+def call_model(state: dict, config: RunnableConfig) -> dict:
+    """Process the user query with Azure OpenAI, escalating after critiques.
+
+    Args:
+        state: The current conversation state
+        config: Run configuration; ``configurable["temperature"]`` is set per
+            draft when the reflection graph generates several drafts, and
+            ``configurable["model_ladder"]`` overrides the model ladder
+
+    Returns:
+        dict: Updated state with model response
+    """
+    model, provider = get_model(config, state["messages"])
+    response = call(
+        provider, model.invoke, state["messages"], priority=run_priority(state["messages"])
+    )
+    return {"messages": response}
+
+
+async def acall_model(state: dict, config: RunnableConfig) -> dict:
+    """Async variant of ``call_model`` using ``ainvoke``.
 
     Args:
         state: The current conversation state
+        config: Run configuration
 
     Returns:
         dict: Updated state with model response
     """
-    model = init_chat_model(
-        model=get_azure_model_name("gpt-4o-mini"),
-        model_provider="azure_openai"
+    model, provider = get_model(config, state["messages"])
+    response = await acall(
+        provider, model.ainvoke, state["messages"], priority=run_priority(state["messages"])
     )
-    return {"messages": model.invoke(state["messages"])}
+    return {"messages": response}
 
 
 def create_assistant_graph():
@@ -30,7 +92,7 @@ def create_assistant_graph():
     """
     assistant_graph = (
         StateGraph(MessagesState)
-        .add_node(call_model)
+        .add_node("call_model", RunnableLambda(call_model, afunc=acall_model))
         .add_edge(START, "call_model")
         .add_edge("call_model", END)
         .compile()
@@ -80,6 +80,50 @@ def setup_azure_openai(
         os.environ["AZURE_OPENAI_API_VERSION"] = default_version
         os.environ["OPENAI_API_VERSION"] = default_version
 
+    configure_azure_rate_limits()
+
+
+def configure_azure_rate_limits() -> None:
+    """Apply the Azure deployment's quota to the shared scheduler.
+
+    Reads ``AZURE_OPENAI_RPM`` (requests per minute) and ``AZURE_OPENAI_TPM``
+    (tokens per minute); when neither is set the scheduler keeps its defaults
+    and only adapts to throttling. Either way the scheduler exists from here
+    on, so Azure clients are built without SDK retries.
+    """
+    from langgraph_reflection import configure_rate_limits, get_scheduler
+
+    rpm = os.environ.get("AZURE_OPENAI_RPM")
+    tpm = os.environ.get("AZURE_OPENAI_TPM")
+    if not rpm and not tpm:
+        get_scheduler("azure_openai")
+        return
+
+    configure_rate_limits(
+        "azure_openai",
+        requests_per_minute=float(rpm) if rpm else None,
+        tokens_per_minute=float(tpm) if tpm else None,
+    )
+
+
+def get_model_ladder() -> list[dict]:
+    """Get the Azure deployments the assistant escalates through.
+
+    Reads the ``AZURE_OPENAI_MODEL_LADDER`` environment variable, a
+    comma-separated list of deployment names from cheapest to most capable,
+    e.g. ``"gpt-4o-mini,gpt-4o"``. Defaults to ``gpt-4o-mini`` alone, i.e. no
+    escalation.
+
+    Returns:
+        list[dict]: ``get_chat_model`` arguments for each deployment.
+    """
+    names = os.environ.get("AZURE_OPENAI_MODEL_LADDER", "gpt-4o-mini")
+    return [
+        {"model": get_azure_model_name(name.strip()), "model_provider": "azure_openai"}
+        for name in names.split(",")
+        if name.strip()
+    ]
+
 
 def get_azure_model_name(deployment_name: str = "gpt-4o-mini") -> str:
     """Get Azure OpenAI deployment name for init_chat_model.
@@ -92,3 +136,128 @@ def get_azure_model_name(deployment_name: str = "gpt-4o-mini") -> str:
     """
     return deployment_name
 
+
+
+def get_pyright_backend() -> str:
+    """Get the Pyright backend used by the coding judge.
+
+    Reads the ``PYRIGHT_BACKEND`` environment variable:
+
+    - ``"pool"`` (default): warm ``pyright-langserver`` workers, see ``pyright_pool``.
+    - ``"batch"``: snippets from concurrent threads checked together, see ``pyright_batch``.
+    - ``"cli"``: a fresh ``pyright`` process per validation.
+
+    Returns:
+        str: The backend name.
+    """
+    backend = os.environ.get("PYRIGHT_BACKEND", "pool").strip().lower()
+    if backend not in ("pool", "batch", "cli"):
+        raise ValueError(
+            f"Unknown PYRIGHT_BACKEND '{backend}'. Expected one of: pool, batch, cli."
+        )
+    return backend
+
+
+def get_pyright_pool_size() -> int:
+    """Get the number of warm Pyright workers to keep alive.
+
+    Reads the ``PYRIGHT_POOL_SIZE`` environment variable, defaulting to 2.
+
+    Returns:
+        int: The pool size.
+    """
+    return int(os.environ.get("PYRIGHT_POOL_SIZE", "2"))
+
+
+def get_pyright_batch_window() -> float:
+    """Get how long the Pyright batcher waits to collect more snippets.
+
+    Reads the ``PYRIGHT_BATCH_WINDOW_MS`` environment variable, defaulting to 50ms.
+
+    Returns:
+        float: The window in seconds.
+    """
+    return float(os.environ.get("PYRIGHT_BATCH_WINDOW_MS", "50")) / 1000
+
+
+def get_pyright_batch_size() -> int:
+    """Get the maximum number of snippets checked by one Pyright invocation.
+
+    Reads the ``PYRIGHT_BATCH_SIZE`` environment variable, defaulting to 32.
+
+    Returns:
+        int: The batch size cap.
+    """
+    return int(os.environ.get("PYRIGHT_BATCH_SIZE", "32"))
+
+
+def get_code_execution_mode() -> str:
+    """Get whether and how the coding judge runs the code after Pyright.
+
+    Reads the ``CODE_EXECUTION`` environment variable:
+
+    - ``"off"`` (default): code is only type-checked.
+    - ``"import"``: the code runs in the sandbox without its ``__main__``
+      block, followed by its ``test_*`` functions and any supplied tests.
+    - ``"main"``: like ``"import"``, but the code also runs as a script.
+
+    Returns:
+        str: The execution mode.
+    """
+    mode = os.environ.get("CODE_EXECUTION", "off").strip().lower()
+    if mode not in ("off", "import", "main"):
+        raise ValueError(
+            f"Unknown CODE_EXECUTION '{mode}'. Expected one of: off, import, main."
+        )
+    return mode
+
+
+def get_sandbox_pool_size() -> int:
+    """Get the number of pre-forked sandbox interpreters to keep alive.
+
+    Reads the ``SANDBOX_POOL_SIZE`` environment variable, defaulting to 2.
+
+    Returns:
+        int: The pool size.
+    """
+    return int(os.environ.get("SANDBOX_POOL_SIZE", "2"))
+
+
+def get_sandbox_limits():
+    """Get the limits applied to code run in the sandbox.
+
+    Reads ``SANDBOX_TIMEOUT`` (wall-clock seconds per test case, default 10),
+    ``SANDBOX_MEMORY_MB`` (default 512) and ``SANDBOX_PARALLEL_TESTS``
+    (test cases run at the same time, default 4). The CPU limit follows the
+    timeout.
+
+    Returns:
+        SandboxLimits: The limits.
+    """
+    from .sandbox import SandboxLimits
+
+    return SandboxLimits(
+        timeout=float(os.environ.get("SANDBOX_TIMEOUT", "10")),
+        memory_mb=int(os.environ.get("SANDBOX_MEMORY_MB", "512")),
+        parallel=int(os.environ.get("SANDBOX_PARALLEL_TESTS", "4")),
+    )
+
+
+def get_code_revision_mode() -> str:
+    """Get how the assistant is asked to revise code after a critique.
+
+    Reads the ``CODE_REVISION_MODE`` environment variable:
+
+    - ``"full"`` (default): the assistant regenerates the entire code snippet.
+    - ``"patch"``: the assistant replies with SEARCH/REPLACE edits (or a unified
+      diff) against the previous draft, which are applied locally, see ``patching``.
+
+    Returns:
+        str: The revision mode.
+    """
+    mode = os.environ.get("CODE_REVISION_MODE", "full").strip().lower()
+    if mode not in ("full", "patch"):
+        raise ValueError(
+            f"Unknown CODE_REVISION_MODE '{mode}'. Expected one of: full, patch."
+        )
+    return mode
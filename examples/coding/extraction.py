@@ -0,0 +1,89 @@
+"""Local extraction of Python code from assistant messages.
+
+Most assistant replies contain exactly one fenced ``python`` block, or are plain
+code. Both cases can be handled with a regex and ``ast`` instead of a chat-model
+round trip; only genuinely ambiguous replies (several competing blocks,
+prose-only output) need the LLM extractor.
+"""
+
+import ast
+import re
+import textwrap
+from typing import Any, Optional
+
+
+# Opening fence (``` or ~~~, optionally indented), info string, body, and a
+# closing fence made of the same characters.
+FENCED_BLOCK_PATTERN = re.compile(
+    r"^[ ]{0,3}(?P<fence>`{3,}|~{3,})[ \t]*(?P<lang>[\w+.-]*)[^\n]*\n"
+    r"(?P<code>.*?)"
+    r"^[ ]{0,3}(?P=fence)[ \t]*$",
+    re.MULTILINE | re.DOTALL,
+)
+
+PYTHON_LANGS = {"python", "py", "python3", "py3"}
+
+
+def message_text(message: Any) -> str:
+    """Return the plain text of a message whose content may be a list of blocks."""
+    content = getattr(message, "content", message)
+    if isinstance(content, str):
+        return content
+    parts = []
+    for block in content or []:
+        if isinstance(block, str):
+            parts.append(block)
+        elif isinstance(block, dict) and block.get("type") == "text":
+            parts.append(block.get("text", ""))
+    return "".join(parts)
+
+
+def _looks_like_code(text: str) -> bool:
+    """Whether ``text`` is Python source rather than prose that happens to parse.
+
+    Short answers such as ``Sure``, ``yes or no`` or ``1 + 1`` are valid
+    expression statements, so at least one statement must be a real statement
+    (``def``, ``import``, an assignment, ...) or a top-level call.
+    """
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return False
+    for node in tree.body:
+        if not isinstance(node, ast.Expr):
+            return True
+        if isinstance(node.value, ast.Call):
+            return True
+    return False
+
+
+def extract_code_locally(text: str) -> Optional[str]:
+    """Extract Python code from a message without calling a model.
+
+    Args:
+        text: The text of the assistant's last message.
+
+    Returns:
+        Optional[str]: The code if the message holds exactly one Python block or
+            is itself Python source, otherwise ``None`` to signal that the LLM
+            extractor should decide.
+    """
+    blocks = []
+    for match in FENCED_BLOCK_PATTERN.finditer(text):
+        lang = match.group("lang").lower()
+        code = textwrap.dedent(match.group("code"))
+        if lang in PYTHON_LANGS or (lang == "" and _looks_like_code(code)):
+            blocks.append(code)
+
+    if len(blocks) == 1:
+        return blocks[0]
+    if blocks:
+        # Several competing blocks: let the LLM decide how they fit together
+        return None
+
+    if "```" in text or "~~~" in text:
+        # Fences present but nothing usable (other languages or unclosed block)
+        return None
+    if _looks_like_code(text):
+        return text
+    return None
@@ -1,17 +1,35 @@
 """Judge graph module for code extraction, validation, and reflection."""
 
+import ast
 from typing import TypedDict
 
-from langchain.chat_models import init_chat_model
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, MessagesState, START, END
 
-# openevals 是一个开源评测与自动化代码测试框架，常用于自动评估 AI 生成代码的正确性及功能表现。
-# 它支持多种编程语言和评测方式，尤其适合集成到大模型代码能力测试或RAG应用中。
-# 例如 openevals.code.pyright.create_pyright_evaluator 用于调用 pyright 静态类型检查器自动分析/验证 python 代码的类型问题和潜在错误。
-from openevals.code.pyright import create_pyright_evaluator
+from langgraph_reflection import (
+    acall,
+    cache_key,
+    call,
+    get_chat_model,
+    get_default_verdict_cache,
+    get_evaluator,
+    record_metric,
+    run_priority,
+    timed_metric,
+)
 
-from .config import get_azure_model_name
+from .config import (
+    get_azure_model_name,
+    get_code_execution_mode,
+    get_code_revision_mode,
+    get_pyright_backend,
+)
+from .extraction import extract_code_locally, message_text
+from .patching import PatchError, apply_edits, has_edits
+from .pyright_batch import get_pyright_batcher
+from .pyright_pool import PyrightWorkerError, get_pyright_pool
+from .sandbox import SandboxError, SandboxReport, get_sandbox_pool
 
 
 # Define type classes for code extraction
@@ -41,18 +59,143 @@ If there is code - extract it into a single python script using ExtractPythonCod
 
 If there is no code to extract - call NoCode."""
 
+# Part of the verdict cache key: a change here must invalidate cached verdicts
+PYRIGHT_JUDGE_CONFIG = {"judge": "pyright", "pyright_cli_args": []}
 
-def try_running(state: dict) -> dict | None:
-    """Attempt to run and analyze the extracted Python code.
+# In patch mode, critiques carry the full code the next edits apply to
+REFLECTION_CODE_KEY = "reflection_code"
+
+REGENERATE_INSTRUCTIONS = "Make sure to regenerate the entire code snippet."
+
+PATCH_INSTRUCTIONS = """Do not regenerate the whole program. Reply only with edits to the current code, as one or more blocks of the form:
+
+<<<<<<< SEARCH
+lines copied exactly from the current code
+=======
+replacement lines
+>>>>>>> REPLACE"""
+
+
+def run_pyright(code: str) -> dict:
+    """Validate code with Pyright using the configured backend.
+
+    The warm worker pool is used by default; if it cannot be started (for
+    example because ``pyright-langserver`` is unavailable) this falls back to
+    running the Pyright CLI once. With the ``batch`` backend the snippet is
+    checked together with those submitted by other threads.
 
     Args:
-        state: The current conversation state
+        code: The Python code to validate
 
     Returns:
-        dict | None: Updated state with analysis results if code was found
+        dict: Evaluator result with ``score`` and ``comment`` keys
     """
-    model = init_chat_model(
-        model=get_azure_model_name("gpt-4o-mini"),
+    backend = get_pyright_backend()
+    if backend == "batch":
+        try:
+            score, comment = get_pyright_batcher().check(code)
+            return {"key": "pyright_succeeded", "score": score, "comment": comment}
+        except PyrightWorkerError as e:
+            print(f"⚠️ Pyright batch unavailable ({e}), falling back to the CLI")
+    if backend == "pool":
+        try:
+            score, comment = get_pyright_pool().check(code)
+            return {"key": "pyright_succeeded", "score": score, "comment": comment}
+        except PyrightWorkerError as e:
+            print(f"⚠️ Pyright pool unavailable ({e}), falling back to the CLI")
+    # openevals 是一个开源评测与自动化代码测试框架，常用于自动评估 AI 生成代码的正确性及功能表现。
+    # 它支持多种编程语言和评测方式，尤其适合集成到大模型代码能力测试或RAG应用中。
+    # 例如 openevals.code.pyright.create_pyright_evaluator 用于调用 pyright 静态类型检查器自动分析/验证 python 代码的类型问题和潜在错误。
+    # Imported here so that loading the judge stays cheap when the CLI is not used
+    from openevals.code.pyright import create_pyright_evaluator
+
+    evaluator = get_evaluator(create_pyright_evaluator)
+    return evaluator(outputs=code)
+
+
+async def arun_pyright(code: str) -> dict:
+    """Async variant of ``run_pyright``.
+
+    The pool and batch backends are awaited without holding a thread, and the
+    CLI backend runs Pyright as an asyncio subprocess.
+    """
+    backend = get_pyright_backend()
+    if backend == "batch":
+        try:
+            score, comment = await get_pyright_batcher().acheck(code)
+            return {"key": "pyright_succeeded", "score": score, "comment": comment}
+        except PyrightWorkerError as e:
+            print(f"⚠️ Pyright batch unavailable ({e}), falling back to the CLI")
+    if backend == "pool":
+        try:
+            score, comment = await get_pyright_pool().acheck(code)
+            return {"key": "pyright_succeeded", "score": score, "comment": comment}
+        except PyrightWorkerError as e:
+            print(f"⚠️ Pyright pool unavailable ({e}), falling back to the CLI")
+    from openevals.code.pyright import create_async_pyright_evaluator
+
+    evaluator = get_evaluator(create_async_pyright_evaluator)
+    return await evaluator(outputs=code)
+
+
+def _cache_verdict(cache, key: str, result: dict) -> None:
+    # Results where Pyright's output could not be parsed are transient
+    if not str(result.get("comment", "")).startswith("Failed to parse Pyright output"):
+        cache.set(key, {"score": result["score"], "comment": result.get("comment")})
+
+
+def run_pyright_cached(code: str) -> dict:
+    """Validate code with Pyright, reusing the verdict for code already checked.
+
+    Verdicts are stored in the default ``VerdictCache`` keyed by the code and
+    ``PYRIGHT_JUDGE_CONFIG``. Results where Pyright's output could not be parsed
+    are treated as transient and not cached.
+
+    Args:
+        code: The Python code to validate
+
+    Returns:
+        dict: Evaluator result with ``score`` and ``comment`` keys
+    """
+    cache = get_default_verdict_cache()
+    if cache is None:
+        with timed_metric("pyright_seconds"):
+            return run_pyright(code)
+    key = cache_key(code, PYRIGHT_JUDGE_CONFIG)
+    result = cache.get(key)
+    if result is not None:
+        print("♻️ Reusing cached Pyright verdict")
+        record_metric("pyright_cache_hits", 1)
+        return result
+    record_metric("pyright_cache_misses", 1)
+    with timed_metric("pyright_seconds"):
+        result = run_pyright(code)
+    _cache_verdict(cache, key, result)
+    return result
+
+
+async def arun_pyright_cached(code: str) -> dict:
+    """Async variant of ``run_pyright_cached``."""
+    cache = get_default_verdict_cache()
+    if cache is None:
+        with timed_metric("pyright_seconds"):
+            return await arun_pyright(code)
+    key = cache_key(code, PYRIGHT_JUDGE_CONFIG)
+    result = cache.get(key)
+    if result is not None:
+        print("♻️ Reusing cached Pyright verdict")
+        record_metric("pyright_cache_hits", 1)
+        return result
+    record_metric("pyright_cache_misses", 1)
+    with timed_metric("pyright_seconds"):
+        result = await arun_pyright(code)
+    _cache_verdict(cache, key, result)
+    return result
+
+
+def _extraction_model():
+    model = get_chat_model(
+        get_azure_model_name("gpt-4o-mini"),
         model_provider="azure_openai"
     )
     # 工具通常是函数（带有 __call__ 方法），但也支持 TypedDict 或类似 Pydantic/JsonSchema 的类/对象作为“工具”结构——
@@ -60,34 +203,191 @@ def try_running(state: dict) -> dict | None:
     # 这里直接将 TypedDict 类型作为工具传递，是因为 TypedDict 用于描述 expected input/output schema，LangChain 自动推断参数结构，
     # 并根据这些 schema 调用 API。详见：
     # https://python.langchain.com/docs/expression_language/cookbook/function_calling
-    extraction = model.bind_tools([ExtractPythonCode, NoCode])
+    return model.bind_tools([ExtractPythonCode, NoCode])
 
-    er = extraction.invoke(
-        [SystemMessage(content=SYSTEM_PROMPT)] + state["messages"]
-    )
 
+def _code_from_extraction(er) -> str | None:
     # Check if code was extracted
     if len(er.tool_calls) == 0:
         # No tool calls means model didn't find extractable code or didn't use tools
         # This is normal when the response is just a question or explanation
-        # Return None to continue without feedback (validation passed)
         print("⚠️ No code extracted - model response may not contain extractable code")
         return None
         
     tc = er.tool_calls[0]
     if tc["name"] != "ExtractPythonCode":
         # NoCode was called or other tool - no code to validate
-        # Return None to continue without feedback (validation passed)
         print(f"⚠️ Tool call was '{tc['name']}', not ExtractPythonCode - no code to validate")
         return None
-    
-    print(f"✅ Extracted code (length: {len(tc['args']['python_code'])} chars)")
+    return tc["args"]["python_code"]
+
+
+def extract_code_with_llm(messages: list) -> str | None:
+    """Ask the extraction model to pull the code out of the conversation.
+
+    Only used when the last message is ambiguous for ``extract_code_locally``.
+
+    Args:
+        messages: The conversation, ending with the assistant's response
+
+    Returns:
+        str | None: The extracted code, or None if the model found no code
+    """
+    er = call(
+        "azure_openai",
+        _extraction_model().invoke,
+        [SystemMessage(content=SYSTEM_PROMPT)] + messages,
+        priority=run_priority(messages),
+    )
+    return _code_from_extraction(er)
+
+
+async def aextract_code_with_llm(messages: list) -> str | None:
+    """Async variant of ``extract_code_with_llm``."""
+    er = await acall(
+        "azure_openai",
+        _extraction_model().ainvoke,
+        [SystemMessage(content=SYSTEM_PROMPT)] + messages,
+        priority=run_priority(messages),
+    )
+    return _code_from_extraction(er)
+
+
+def current_code(messages: list) -> str | None:
+    """Return the code the last draft revises, as carried by the critique before it.
+
+    Args:
+        messages: The conversation, ending with the assistant's response
+
+    Returns:
+        str | None: The code, or None if the draft does not answer a patch-mode critique
+    """
+    for message in reversed(messages[:-1]):
+        if isinstance(message, HumanMessage):
+            return message.additional_kwargs.get(REFLECTION_CODE_KEY)
+    return None
+
+
+def resolve_code_locally(messages: list) -> tuple[str | None, bool]:
+    """Get the code of the last draft without calling the extraction model.
+
+    In patch mode, a draft that contains edits is applied to ``current_code``;
+    otherwise this is ``extract_code_locally`` on the last message.
+
+    Args:
+        messages: The conversation, ending with the assistant's response
+
+    Returns:
+        tuple[str | None, bool]: The code (None if ambiguous) and whether it was
+            rebuilt from edits
+
+    Raises:
+        PatchError: If the draft's edits do not apply to the current code
+    """
+    text = message_text(messages[-1])
+    if get_code_revision_mode() == "patch":
+        previous = current_code(messages)
+        if previous is not None and has_edits(text):
+            return apply_edits(previous, text), True
+    return extract_code_locally(text), False
+
+
+def revision_request(problem: str, code: str | None, patched: bool = False, note: str = "") -> dict:
+    """Build a critique asking the assistant to fix ``problem``.
+
+    In patch mode the critique asks for edits and carries ``code`` so the next
+    draft can be applied to it; when the draft was itself a patch, the rebuilt
+    code is also shown to the assistant, which has not seen it in full.
+
+    Args:
+        problem: What is wrong with the code
+        code: The code the critique refers to
+        patched: Whether ``code`` was rebuilt from edits
+        note: Extra instructions appended to the critique
+
+    Returns:
+        dict: Updated state with the critique
+    """
+    if get_code_revision_mode() != "patch" or code is None:
+        content = f"{problem}\n\nTry to fix it. {REGENERATE_INSTRUCTIONS}{note}"
+        return {"messages": [HumanMessage(content=content)]}
+    content = f"{problem}\n\nTry to fix it. {PATCH_INSTRUCTIONS}{note}"
+    if patched:
+        content += f"\n\nThe current code is:\n```python\n{code.rstrip()}\n```"
+    return {
+        "messages": [
+            HumanMessage(content=content, additional_kwargs={REFLECTION_CODE_KEY: code})
+        ]
+    }
+
+
+def patch_failed_feedback(messages: list, error: PatchError) -> dict:
+    """Ask for the whole program again after edits that did not apply.
+
+    Args:
+        messages: The conversation, ending with the assistant's response
+        error: Why the edits did not apply
+
+    Returns:
+        dict: Updated state with the critique
+    """
+    print(f"⚠️ Could not apply edits: {error}")
+    code = current_code(messages)
+    return {
+        "messages": [
+            HumanMessage(
+                content=f"Your edits could not be applied: {error}\n\n"
+                f"{REGENERATE_INSTRUCTIONS}",
+                additional_kwargs={REFLECTION_CODE_KEY: code} if code is not None else {},
+            )
+        ]
+    }
+
 
-    # Extract code and run pyright validation
-    extracted_code = tc["args"]["python_code"]
-    evaluator = create_pyright_evaluator()
-    result = evaluator(outputs=extracted_code)
+def check_syntax(state: dict) -> dict | None:
+    """Reject drafts whose code does not parse, before running Pyright.
+
+    Meant as the first, cheapest critic of a cascade. Only code that can be
+    extracted locally is checked; anything ambiguous is left to ``try_running``.
+
+    Args:
+        state: The current conversation state
+
+    Returns:
+        dict | None: Updated state with a critique if the code has a syntax error
+    """
+    if not state["messages"]:
+        return None
+    try:
+        code, patched = resolve_code_locally(state["messages"])
+    except PatchError as e:
+        return patch_failed_feedback(state["messages"], e)
+    if code is None:
+        return None
+    try:
+        ast.parse(code)
+    except SyntaxError as e:
+        print(f"⚠️ Syntax error on line {e.lineno}: {e.msg}")
+        return revision_request(
+            f"The code has a syntax error on line {e.lineno}: {e.msg}", code, patched
+        )
+    return None
+
+
+def pyright_feedback(result: dict, code: str | None = None, patched: bool = False) -> dict | None:
+    """Turn a Pyright evaluator result into a critique for the assistant.
+
+    Args:
+        result: Evaluator result with ``score`` and ``comment`` keys
+        code: The validated code, carried on the critique in patch mode
+        patched: Whether ``code`` was rebuilt from edits
+
+    Returns:
+        dict | None: Updated state with a critique, None if the code passed, or
+            the rebuilt program as a final message if it passed after edits
+    """
     print(f"Pyright evaluation result: {result}")
+    record_metric("pyright_passed", bool(result["score"]))
 
     # Handle pyright evaluation result
     if not result["score"]:
@@ -105,23 +405,193 @@ def try_running(state: dict) -> dict | None:
                 ]
             }
         else:
-            return {
-                "messages": [
-                    HumanMessage(
-                        content=f"I ran pyright and found this: {comment}\n\n"
-                        "Try to fix it. Make sure to regenerate the entire code snippet. "
-                        "If you are not sure what is wrong, or think there is a mistake, "
-                        "you can ask me a question rather than generating code"
-                    )
-                ]
-            }
+            return revision_request(
+                f"I ran pyright and found this: {comment}",
+                code,
+                patched,
+                note="\n\nIf you are not sure what is wrong, or think there is a mistake, "
+                "you can ask me a question rather than generating code",
+            )
     
     # Code passed validation (score is True)
     # Return None to indicate success - no feedback needed, process will end
     print("✅ Code passed Pyright validation")
+    if patched:
+        # The last draft only holds edits: end with the program they produce
+        return {"messages": [AIMessage(content=f"```python\n{code.rstrip()}\n```")]}
     return None
 
 
+def try_running(state: dict) -> dict | None:
+    """Attempt to run and analyze the extracted Python code.
+
+    Code is parsed locally from the last message when it is unambiguous (a
+    single fenced Python block, or a message that is itself Python source);
+    the extraction model is only called otherwise. In patch mode, a draft made
+    of edits is applied to the current code first.
+
+    Args:
+        state: The current conversation state
+
+    Returns:
+        dict | None: Updated state with analysis results if code was found
+    """
+    if not state["messages"]:
+        return None
+
+    try:
+        extracted_code, patched = resolve_code_locally(state["messages"])
+    except PatchError as e:
+        return patch_failed_feedback(state["messages"], e)
+    if extracted_code is None:
+        record_metric("extraction_path", "llm")
+        with timed_metric("extraction_seconds"):
+            extracted_code = extract_code_with_llm(state["messages"])
+        if extracted_code is None:
+            # Return None to continue without feedback (validation passed)
+            return None
+        print(f"✅ Extracted code with LLM (length: {len(extracted_code)} chars)")
+    elif patched:
+        record_metric("extraction_path", "patch")
+        print(f"✅ Rebuilt code from edits (length: {len(extracted_code)} chars)")
+    else:
+        record_metric("extraction_path", "local")
+        print(f"✅ Extracted code locally (length: {len(extracted_code)} chars)")
+
+    # Run pyright validation
+    return pyright_feedback(run_pyright_cached(extracted_code), extracted_code, patched)
+
+
+async def atry_running(state: dict) -> dict | None:
+    """Async variant of ``try_running``.
+
+    Uses ``ainvoke`` for the extraction model and non-blocking Pyright backends,
+    so no executor thread is held while waiting.
+    """
+    if not state["messages"]:
+        return None
+
+    try:
+        extracted_code, patched = resolve_code_locally(state["messages"])
+    except PatchError as e:
+        return patch_failed_feedback(state["messages"], e)
+    if extracted_code is None:
+        record_metric("extraction_path", "llm")
+        with timed_metric("extraction_seconds"):
+            extracted_code = await aextract_code_with_llm(state["messages"])
+        if extracted_code is None:
+            return None
+        print(f"✅ Extracted code with LLM (length: {len(extracted_code)} chars)")
+    elif patched:
+        record_metric("extraction_path", "patch")
+        print(f"✅ Rebuilt code from edits (length: {len(extracted_code)} chars)")
+    else:
+        record_metric("extraction_path", "local")
+        print(f"✅ Extracted code locally (length: {len(extracted_code)} chars)")
+
+    return pyright_feedback(await arun_pyright_cached(extracted_code), extracted_code, patched)
+
+
+def _execution_input(state: dict, config: dict | None) -> tuple[str | None, bool, list]:
+    code, patched = resolve_code_locally(state["messages"])
+    tests = list((config or {}).get("configurable", {}).get("tests", ()))
+    return code, patched, tests
+
+
+def execution_feedback(report: SandboxReport, code: str, patched: bool = False) -> dict | None:
+    """Turn a sandbox report into a critique for the assistant.
+
+    Args:
+        report: Results of running the code and its tests
+        code: The code that was run
+        patched: Whether ``code`` was rebuilt from edits
+
+    Returns:
+        dict | None: Updated state with the failure digest, None if nothing failed
+    """
+    record_metric("execution_passed", report.passed)
+    if report.passed:
+        print("✅ Code ran without failures")
+        return None
+    digest = report.digest()
+    print(f"⚠️ Execution failed:\n{digest}")
+    return revision_request(f"I ran the code and it failed:\n{digest}", code, patched)
+
+
+def check_execution(state: dict, config: dict | None = None) -> dict | None:
+    """Run the code, its ``test_*`` functions and any supplied tests in the sandbox.
+
+    Meant to follow ``try_running`` in the cascade, so only code that already
+    type-checks is executed. Tests can be supplied per run as Python snippets
+    in ``config["configurable"]["tests"]``, e.g. ``["assert add(1, 2) == 3"]``.
+    Code that cannot be extracted locally is not run, and a sandbox failure
+    (as opposed to a failure of the code) lets the draft pass.
+
+    Args:
+        state: The current conversation state
+        config: Run configuration, may carry ``tests``
+
+    Returns:
+        dict | None: Updated state with a failure digest if anything failed
+    """
+    if not state["messages"]:
+        return None
+    try:
+        code, patched, tests = _execution_input(state, config)
+    except PatchError as e:
+        return patch_failed_feedback(state["messages"], e)
+    if code is None:
+        return None
+    try:
+        with timed_metric("execution_seconds"):
+            report = get_sandbox_pool().run(code, tests, mode=get_code_execution_mode())
+    except SandboxError as e:
+        print(f"⚠️ Could not run the code: {e}")
+        return None
+    return execution_feedback(report, code, patched)
+
+
+async def acheck_execution(state: dict, config: dict | None = None) -> dict | None:
+    """Async variant of ``check_execution``."""
+    if not state["messages"]:
+        return None
+    try:
+        code, patched, tests = _execution_input(state, config)
+    except PatchError as e:
+        return patch_failed_feedback(state["messages"], e)
+    if code is None:
+        return None
+    try:
+        with timed_metric("execution_seconds"):
+            report = await get_sandbox_pool().arun(code, tests, mode=get_code_execution_mode())
+    except SandboxError as e:
+        print(f"⚠️ Could not run the code: {e}")
+        return None
+    return execution_feedback(report, code, patched)
+
+
+def warm_up_judge() -> None:
+    """Create the extraction model client and start the Pyright backend and sandbox.
+
+    With the pool backend the warm workers are started; otherwise an empty
+    snippet is checked once, which also makes sure Pyright itself is installed.
+    The sandbox interpreters are only started when code execution is enabled.
+    """
+    _extraction_model()
+    if get_code_execution_mode() != "off":
+        try:
+            get_sandbox_pool().start()
+        except SandboxError as e:
+            print(f"⚠️ Sandbox unavailable ({e})")
+    if get_pyright_backend() == "pool":
+        try:
+            get_pyright_pool().start()
+            return
+        except PyrightWorkerError as e:
+            print(f"⚠️ Pyright pool unavailable ({e}), warming up the CLI instead")
+    run_pyright("")
+
+
 def create_judge_graph():
     """Create and configure the judge graph for code analysis.
 
@@ -130,7 +600,8 @@ def create_judge_graph():
     """
     judge_graph = (
         StateGraph(MessagesState)
-        .add_node(try_running)
+        # Register both implementations so the graph works with invoke and ainvoke
+        .add_node("try_running", RunnableLambda(try_running, afunc=atry_running))
         .add_edge(START, "try_running")
         .add_edge("try_running", END)
         .compile()
@@ -0,0 +1,153 @@
+"""Applying edit-style revisions to the previous draft.
+
+In patch mode the assistant answers a critique with edits instead of the whole
+program, so output tokens scale with the size of the fix. Two formats are
+understood: SEARCH/REPLACE blocks
+
+    <<<<<<< SEARCH
+    exact lines from the current code
+    =======
+    replacement lines
+    >>>>>>> REPLACE
+
+and unified diff hunks (``@@ ... @@`` followed by `` ``/``-``/``+`` lines). The
+line numbers of a hunk are ignored; its context and removed lines are located in
+the code instead, which tolerates diffs with wrong offsets. An edit whose lines
+occur more than once is rejected rather than applied to the first occurrence.
+"""
+
+import re
+from typing import Optional
+
+
+SEARCH_REPLACE_PATTERN = re.compile(
+    r"^<{5,9} ?SEARCH[^\n]*\n(?P<search>.*?)^={5,9}[ \t]*\n(?P<replace>.*?)^>{5,9} ?REPLACE[^\n]*$",
+    re.DOTALL | re.MULTILINE,
+)
+HUNK_HEADER_PATTERN = re.compile(r"^@@[^\n]*@@[^\n]*$", re.MULTILINE)
+
+
+class PatchError(ValueError):
+    """Raised when an edit cannot be applied to the current code."""
+
+
+def has_edits(text: str) -> bool:
+    """Whether ``text`` contains SEARCH/REPLACE blocks or unified diff hunks."""
+    return bool(SEARCH_REPLACE_PATTERN.search(text) or HUNK_HEADER_PATTERN.search(text))
+
+
+def _find_lines(lines: list[str], needle: list[str], start: int = 0) -> list[int]:
+    """Return every index where ``needle`` occurs in ``lines``.
+
+    Trailing whitespace is ignored, since models often drop or add it.
+    """
+    stripped = [line.rstrip() for line in lines]
+    target = [line.rstrip() for line in needle]
+    return [
+        i
+        for i in range(start, len(lines) - len(needle) + 1)
+        if stripped[i : i + len(needle)] == target
+    ]
+
+
+def _replace_block(code: str, search: str, replace: str) -> str:
+    if not search.strip():
+        raise PatchError("A SEARCH section is empty; quote the lines to replace.")
+    lines = code.split("\n")
+    search_lines = search.rstrip("\n").split("\n")
+    replace_lines = replace.rstrip("\n").split("\n") if replace.strip() else []
+    matches = _find_lines(lines, search_lines)
+    if not matches:
+        raise PatchError(f"SEARCH section not found in the current code:\n{search.rstrip()}")
+    if len(matches) > 1:
+        raise PatchError(
+            f"SEARCH section matches {len(matches)} places in the current code; "
+            f"include more surrounding lines:\n{search.rstrip()}"
+        )
+    i = matches[0]
+    return "\n".join(lines[:i] + replace_lines + lines[i + len(search_lines) :])
+
+
+def _parse_hunks(text: str) -> list[tuple[list[str], list[str]]]:
+    hunks: list[tuple[list[str], list[str]]] = []
+    old: Optional[list[str]] = None
+    new: list[str] = []
+    for line in text.split("\n"):
+        if HUNK_HEADER_PATTERN.match(line):
+            if old is not None:
+                hunks.append((old, new))
+            old, new = [], []
+        elif old is None or line.startswith(("---", "+++", "```")):
+            continue
+        elif line.startswith("-"):
+            old.append(line[1:])
+        elif line.startswith("+"):
+            new.append(line[1:])
+        elif line.startswith(" ") or line == "":
+            old.append(line[1:])
+            new.append(line[1:])
+        elif line.startswith("\\"):
+            # "\ No newline at end of file"
+            continue
+        else:
+            hunks.append((old, new))
+            old = None
+    if old is not None:
+        hunks.append((old, new))
+    # Blank lines after the last hunk are usually just the end of the message
+    return [(o[: len(o) - _trailing_blank(o, n)], n[: len(n) - _trailing_blank(o, n)]) for o, n in hunks]
+
+
+def _trailing_blank(old: list[str], new: list[str]) -> int:
+    count = 0
+    while count < min(len(old), len(new)) and old[-1 - count] == "" and new[-1 - count] == "":
+        count += 1
+    return count
+
+
+def _apply_hunks(code: str, text: str) -> str:
+    lines = code.split("\n")
+    position = 0
+    for old, new in _parse_hunks(text):
+        if not old:
+            raise PatchError("A diff hunk has no context lines; include the lines around the change.")
+        # Hunks come in file order, so look after the previous one first
+        matches = _find_lines(lines, old, position) or _find_lines(lines, old)
+        if not matches:
+            raise PatchError("Diff hunk does not match the current code:\n" + "\n".join(old))
+        if len(matches) > 1:
+            raise PatchError(
+                f"Diff hunk matches {len(matches)} places in the current code; "
+                "include more context lines:\n" + "\n".join(old)
+            )
+        i = matches[0]
+        lines[i : i + len(old)] = new
+        position = i + len(new)
+    return "\n".join(lines)
+
+
+def apply_edits(code: str, text: str) -> str:
+    """Apply the edits found in ``text`` to ``code``.
+
+    SEARCH/REPLACE blocks are applied in order, each to the result of the
+    previous one; otherwise the unified diff hunks in ``text`` are applied.
+
+    Args:
+        code: The current code.
+        text: The assistant's response containing the edits.
+
+    Returns:
+        str: The revised code.
+
+    Raises:
+        PatchError: If ``text`` contains no edits, or an edit does not match
+            the current code.
+    """
+    blocks = list(SEARCH_REPLACE_PATTERN.finditer(text))
+    if blocks:
+        for block in blocks:
+            code = _replace_block(code, block.group("search"), block.group("replace"))
+        return code
+    if HUNK_HEADER_PATTERN.search(text):
+        return _apply_hunks(code, text)
+    raise PatchError("No SEARCH/REPLACE blocks or diff hunks found.")
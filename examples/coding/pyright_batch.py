@@ -0,0 +1,228 @@
+"""Micro-batching of Pyright validations across concurrent reflection threads.
+
+Each call to :meth:`PyrightBatcher.submit` enqueues one snippet. Pending
+snippets are collected for a short window (or until the batch is full), written
+into one temporary workspace and checked with a single ``pyright --outputjson``
+invocation. The diagnostics are then split per file and handed back to each
+caller, so the process start-up cost is shared by every snippet in the batch.
+
+Every snippet gets its own directory, whose name is not a valid module name, so
+one snippet cannot import another and its verdict does not depend on what else
+is in the batch.
+"""
+
+import json
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from .pyright_pool import PyrightWorkerError
+
+
+class PyrightBatcher:
+    """Collects snippets from many callers and validates them in batches.
+
+    Args:
+        window: Seconds to wait for more snippets after the first one arrives.
+        max_batch_size: Flush immediately once this many snippets are pending.
+        max_concurrent_batches: Number of Pyright invocations that may run at once.
+        pyright_cli_args: Extra arguments passed to the ``pyright`` CLI.
+        timeout: Seconds a caller waits for its result, and a Pyright run may
+            take, before ``PyrightWorkerError`` is raised.
+    """
+
+    def __init__(
+        self,
+        window: float = 0.05,
+        max_batch_size: int = 32,
+        max_concurrent_batches: int = 2,
+        pyright_cli_args: Optional[list[str]] = None,
+        timeout: float = 30.0,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.pyright_cli_args = pyright_cli_args or []
+        self.timeout = timeout
+        self.batches = 0
+        self.snippets = 0
+        self._queue: "queue.Queue[tuple[str, Future]]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrent_batches, thread_name_prefix="pyright-batch"
+        )
+        self._closed = threading.Event()
+        self._dispatcher = threading.Thread(
+            target=self._dispatch_loop, name="pyright-batcher", daemon=True
+        )
+        self._dispatcher.start()
+
+    def submit(self, code: str) -> Future:
+        """Queue ``code`` for the next batch.
+
+        Returns:
+            Future: Resolves to ``(score, comment)`` for this snippet.
+        """
+        if self._closed.is_set():
+            raise RuntimeError("PyrightBatcher is closed")
+        future: Future = Future()
+        self._queue.put((code, future))
+        return future
+
+    def check(self, code: str) -> tuple[bool, str]:
+        """Validate ``code`` as part of a batch and block until its result is ready.
+
+        Raises:
+            PyrightWorkerError: If the batch failed or took longer than ``timeout``.
+        """
+        try:
+            return self.submit(code).result(timeout=self.timeout)
+        except TimeoutError as e:
+            raise PyrightWorkerError(
+                f"Pyright batch did not finish within {self.timeout}s"
+            ) from e
+
+    async def acheck(self, code: str) -> tuple[bool, str]:
+        """Async variant of :meth:`check`."""
+        import asyncio
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(self.submit(code)), self.timeout)
+        except asyncio.TimeoutError as e:
+            raise PyrightWorkerError(
+                f"Pyright batch did not finish within {self.timeout}s"
+            ) from e
+
+    def close(self) -> None:
+        """Flush pending snippets and stop the dispatcher."""
+        self._closed.set()
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+    def _dispatch_loop(self) -> None:
+        while not (self._closed.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: list[tuple[str, Future]]) -> None:
+        self.batches += 1
+        self.snippets += len(batch)
+        try:
+            results = run_pyright_batch(
+                [code for code, _ in batch], self.pyright_cli_args, self.timeout
+            )
+        except Exception as e:
+            error = PyrightWorkerError(f"Pyright batch failed: {e}")
+            error.__cause__ = e
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+def run_pyright_batch(
+    codes: list[str],
+    pyright_cli_args: Optional[list[str]] = None,
+    timeout: Optional[float] = None,
+) -> list[tuple[bool, str]]:
+    """Check several snippets with one ``pyright`` invocation.
+
+    Args:
+        codes: The snippets to check, one file each.
+        pyright_cli_args: Extra arguments passed to the ``pyright`` CLI.
+        timeout: Seconds before the ``pyright`` process is killed and
+            ``subprocess.TimeoutExpired`` is raised.
+
+    Returns:
+        list[tuple[bool, str]]: ``(score, comment)`` per snippet, in input order,
+            filtered the same way as ``openevals.code.pyright``.
+    """
+    with tempfile.TemporaryDirectory(prefix="pyright-batch-") as workspace:
+        paths = []
+        for i, code in enumerate(codes):
+            # "snippet-0" cannot be imported, so snippets cannot see each other
+            directory = os.path.join(workspace, f"snippet-{i}")
+            os.mkdir(directory)
+            path = os.path.join(directory, "snippet.py")
+            with open(path, "w") as f:
+                f.write(code)
+            paths.append(path)
+
+        result = subprocess.run(
+            [
+                "pyright",
+                "--outputjson",
+                "--level",
+                "error",  # Only report errors, not warnings
+                *(pyright_cli_args or []),
+                *paths,
+            ],
+            capture_output=True,
+            timeout=timeout,
+        )
+
+        try:
+            output = json.loads(result.stdout)
+        except json.JSONDecodeError:
+            comment = f"Failed to parse Pyright output: {result.stdout.decode()}"
+            return [(False, comment)] * len(codes)
+
+        errors_by_file: dict[str, list[dict]] = {
+            os.path.realpath(path): [] for path in paths
+        }
+        for error in output.get("generalDiagnostics", []):
+            if (
+                error.get("severity", None) == "error"
+                and error.get("rule", None) != "reportMissingImports"
+            ):
+                file = os.path.realpath(error.pop("file", ""))
+                if file in errors_by_file:
+                    errors_by_file[file].append(error)
+
+        results = []
+        for path in paths:
+            errors = errors_by_file[os.path.realpath(path)]
+            results.append((len(errors) == 0, json.dumps(errors)))
+        return results
+
+
+_batcher: Optional[PyrightBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_pyright_batcher() -> PyrightBatcher:
+    """Return the process-wide batcher, creating it on first use.
+
+    The window and size cap are read from ``PYRIGHT_BATCH_WINDOW_MS`` and
+    ``PYRIGHT_BATCH_SIZE`` (see :mod:`examples.coding.config`).
+    """
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                from .config import get_pyright_batch_size, get_pyright_batch_window
+
+                _batcher = PyrightBatcher(
+                    window=get_pyright_batch_window(),
+                    max_batch_size=get_pyright_batch_size(),
+                )
+    return _batcher
@@ -0,0 +1,442 @@
+"""Warm pool of Pyright language-server workers used by the coding judge.
+
+Running ``pyright`` from the CLI for every reflection round pays the full Node
+start-up and stub-loading cost each time. This module keeps a small pool of
+``pyright-langserver --stdio`` processes alive instead: code is sent to a worker
+over its stdin pipe as an in-memory document and the worker answers with the
+diagnostics for that document, so a validation only costs the analysis itself.
+"""
+
+import itertools
+import json
+import os
+import pathlib
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import Future
+from typing import Any, Optional
+
+
+# LSP DiagnosticSeverity.Error
+_LSP_ERROR = 1
+
+
+class PyrightWorkerError(RuntimeError):
+    """Raised when a Pyright worker cannot be started or dies mid-request."""
+
+
+def _diagnostics_to_result(diagnostics: list[dict]) -> tuple[bool, str]:
+    """Convert LSP diagnostics into the ``(score, comment)`` pair used by openevals.
+
+    Only errors are kept and unresolved imports are ignored, matching the
+    filtering that ``openevals.code.pyright`` applies to ``pyright --outputjson``.
+    """
+    errors = []
+    for diagnostic in diagnostics:
+        if diagnostic.get("severity") != _LSP_ERROR:
+            continue
+        if diagnostic.get("code") == "reportMissingImports":
+            continue
+        errors.append(
+            {
+                "severity": "error",
+                "message": diagnostic.get("message", ""),
+                "range": diagnostic.get("range"),
+                "rule": diagnostic.get("code"),
+            }
+        )
+    return (len(errors) == 0, json.dumps(errors))
+
+
+class PyrightWorker:
+    """A single long-lived ``pyright-langserver`` process.
+
+    Requests are pipelined: ``submit`` opens the document, asks for its
+    diagnostics and returns a future that a background reader thread resolves
+    with the answer. Diagnostics are pulled (``textDocument/diagnostic``)
+    rather than waited for: a busy server first publishes the diagnostics of a
+    document it has not analysed yet, which are empty.
+    """
+
+    def __init__(self, command: Optional[list[str]] = None) -> None:
+        self.command = command or ["pyright-langserver", "--stdio"]
+        self._process: Optional[subprocess.Popen] = None
+        self._reader: Optional[threading.Thread] = None
+        self._workspace: Optional[str] = None
+        self._write_lock = threading.Lock()
+        # Diagnostic request id -> (document uri, future)
+        self._pending: dict[int, tuple[str, Future]] = {}
+        self._pending_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._initialized: Optional[Future] = None
+
+    @property
+    def pending(self) -> int:
+        """Number of documents waiting for diagnostics."""
+        return len(self._pending)
+
+    def is_alive(self) -> bool:
+        """Whether the server process is running and has finished initialising."""
+        return (
+            self._process is not None
+            and self._process.poll() is None
+            and self._initialized is not None
+            and self._initialized.done()
+            and self._initialized.exception() is None
+        )
+
+    def start(self, timeout: float = 60.0) -> None:
+        """Start the server and complete the LSP ``initialize`` handshake.
+
+        Args:
+            timeout: Seconds to wait for the server to finish initialising.
+
+        Raises:
+            PyrightWorkerError: If the server could not be started.
+        """
+        self._workspace = tempfile.mkdtemp(prefix="pyright-worker-")
+        try:
+            self._process = subprocess.Popen(
+                self.command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError as e:
+            raise PyrightWorkerError(f"Could not start {self.command[0]}: {e}") from e
+
+        self._initialized = Future()
+        self._reader = threading.Thread(
+            target=self._read_loop, name="pyright-worker-reader", daemon=True
+        )
+        self._reader.start()
+
+        root_uri = pathlib.Path(self._workspace).as_uri()
+        self._send(
+            {
+                "jsonrpc": "2.0",
+                "id": next(self._ids),
+                "method": "initialize",
+                "params": {
+                    "processId": os.getpid(),
+                    "rootUri": root_uri,
+                    "workspaceFolders": [{"uri": root_uri, "name": "workspace"}],
+                    "capabilities": {
+                        "textDocument": {
+                            "publishDiagnostics": {"versionSupport": True},
+                            "diagnostic": {"dynamicRegistration": False},
+                        }
+                    },
+                },
+            }
+        )
+        try:
+            self._initialized.result(timeout=timeout)
+        except Exception as e:
+            self.close()
+            raise PyrightWorkerError(f"Pyright worker failed to initialise: {e}") from e
+        self._send({"jsonrpc": "2.0", "method": "initialized", "params": {}})
+
+    def submit(self, code: str) -> Future:
+        """Send ``code`` to the server for analysis.
+
+        Returns:
+            Future: Resolves to ``(score, comment)`` once diagnostics arrive.
+        """
+        if not self.is_alive():
+            raise PyrightWorkerError("Pyright worker is not running")
+        request_id = next(self._ids)
+        # One directory per document, as in pyright_batch, so that a snippet's
+        # imports can never resolve to another snippet checked at the same time
+        uri = pathlib.Path(self._workspace, f"snippet-{request_id}", "snippet.py").as_uri()
+        future: Future = Future()
+        with self._pending_lock:
+            self._pending[request_id] = (uri, future)
+        try:
+            self._send(
+                {
+                    "jsonrpc": "2.0",
+                    "method": "textDocument/didOpen",
+                    "params": {
+                        "textDocument": {
+                            "uri": uri,
+                            "languageId": "python",
+                            "version": 1,
+                            "text": code,
+                        }
+                    },
+                }
+            )
+            self._send(
+                {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "method": "textDocument/diagnostic",
+                    "params": {"textDocument": {"uri": uri}},
+                }
+            )
+        except Exception as e:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            raise PyrightWorkerError(f"Failed to send code to Pyright worker: {e}") from e
+        return future
+
+    def close(self) -> None:
+        """Stop the server and fail any requests still in flight."""
+        process, self._process = self._process, None
+        if process is not None and process.poll() is None:
+            try:
+                self._send_to(process, {"jsonrpc": "2.0", "id": next(self._ids), "method": "shutdown"})
+                self._send_to(process, {"jsonrpc": "2.0", "method": "exit"})
+                process.wait(timeout=2)
+            except Exception:
+                process.kill()
+        self._fail_pending(PyrightWorkerError("Pyright worker was stopped"))
+        if self._workspace is not None:
+            shutil.rmtree(self._workspace, ignore_errors=True)
+            self._workspace = None
+
+    def _send(self, message: dict) -> None:
+        if self._process is None:
+            raise PyrightWorkerError("Pyright worker is not running")
+        self._send_to(self._process, message)
+
+    def _send_to(self, process: subprocess.Popen, message: dict) -> None:
+        body = json.dumps(message).encode("utf-8")
+        with self._write_lock:
+            process.stdin.write(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+            process.stdin.flush()
+
+    def _read_message(self, stream: Any) -> Optional[dict]:
+        length = None
+        while True:
+            line = stream.readline()
+            if not line:
+                return None
+            if line in (b"\r\n", b"\n"):
+                break
+            name, _, value = line.decode("ascii").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value.strip())
+        if length is None:
+            return None
+        return json.loads(stream.read(length))
+
+    def _read_loop(self) -> None:
+        process = self._process
+        try:
+            while True:
+                message = self._read_message(process.stdout)
+                if message is None:
+                    break
+                self._handle(message)
+        except Exception:
+            pass
+        error = PyrightWorkerError("Pyright worker exited unexpectedly")
+        if self._initialized is not None and not self._initialized.done():
+            self._initialized.set_exception(error)
+        self._fail_pending(error)
+
+    def _handle(self, message: dict) -> None:
+        method = message.get("method")
+        if "id" in message and method is not None:
+            # Server-to-client request (configuration, capability registration,
+            # progress tokens): answer with defaults so the server never blocks.
+            result: Any = None
+            if method == "workspace/configuration":
+                result = [None] * len(message.get("params", {}).get("items", []))
+            self._send({"jsonrpc": "2.0", "id": message["id"], "result": result})
+        elif "id" in message:
+            if self._initialized is not None and not self._initialized.done():
+                if "error" in message:
+                    self._initialized.set_exception(PyrightWorkerError(str(message["error"])))
+                else:
+                    self._initialized.set_result(message.get("result"))
+                return
+            with self._pending_lock:
+                uri, future = self._pending.pop(message["id"], (None, None))
+            if future is None:
+                return
+            self._send(
+                {
+                    "jsonrpc": "2.0",
+                    "method": "textDocument/didClose",
+                    "params": {"textDocument": {"uri": uri}},
+                }
+            )
+            if future.done():
+                return
+            if "error" in message:
+                future.set_exception(PyrightWorkerError(str(message["error"])))
+            else:
+                future.set_result(_diagnostics_to_result((message.get("result") or {}).get("items", [])))
+
+    def _fail_pending(self, error: Exception) -> None:
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for _, future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+
+class PyrightPool:
+    """Fixed-size pool of warm :class:`PyrightWorker` processes.
+
+    Workers are started lazily on first use, checked before every request and
+    restarted when they have crashed or stopped answering.
+
+    Args:
+        size: Number of worker processes to keep alive.
+        timeout: Seconds to wait for a single validation before the worker is
+            considered hung and restarted.
+        health_check_interval: If set, a background thread runs
+            :meth:`health_check` every this many seconds.
+        command: Command used to start a worker.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        timeout: float = 30.0,
+        health_check_interval: Optional[float] = None,
+        command: Optional[list[str]] = None,
+    ) -> None:
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.size = size
+        self.timeout = timeout
+        self.command = command
+        self._workers: list[Optional[PyrightWorker]] = [None] * size
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self.restarts = 0
+        if health_check_interval is not None:
+            threading.Thread(
+                target=self._health_loop,
+                args=(health_check_interval,),
+                name="pyright-pool-health",
+                daemon=True,
+            ).start()
+
+    def start(self) -> None:
+        """Start every worker up front instead of on first request."""
+        with self._lock:
+            for i in range(self.size):
+                self._ensure_worker(i)
+
+    def submit(self, code: str) -> Future:
+        """Send ``code`` to the least busy healthy worker.
+
+        Returns:
+            Future: Resolves to ``(score, comment)``.
+        """
+        with self._lock:
+            for i in range(self.size):
+                self._ensure_worker(i)
+            worker = min(self._workers, key=lambda w: w.pending)  # type: ignore[union-attr]
+        return worker.submit(code)  # type: ignore[union-attr]
+
+    def check(self, code: str) -> tuple[bool, str]:
+        """Validate ``code`` and block until the result is available."""
+        future = self.submit(code)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError as e:
+            self.health_check()
+            raise PyrightWorkerError(
+                f"Pyright worker did not answer within {self.timeout}s"
+            ) from e
+
+    async def acheck(self, code: str) -> tuple[bool, str]:
+        """Async variant of :meth:`check` that does not occupy a thread while waiting."""
+        import asyncio
+
+        if any(worker is None or not worker.is_alive() for worker in self._workers):
+            # Starting a worker blocks on the LSP handshake, keep it off the loop
+            await asyncio.to_thread(self.start)
+        future = self.submit(code)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError as e:
+            self.health_check()
+            raise PyrightWorkerError(
+                f"Pyright worker did not answer within {self.timeout}s"
+            ) from e
+
+    def health_check(self) -> int:
+        """Restart workers that have exited or are stuck on a request.
+
+        A worker is probed with a trivial document; if it does not answer
+        within ``timeout`` it is replaced.
+
+        Returns:
+            int: Number of workers that were restarted.
+        """
+        restarted = 0
+        with self._lock:
+            workers = list(enumerate(self._workers))
+        for i, worker in workers:
+            if worker is None:
+                continue
+            healthy = worker.is_alive()
+            if healthy:
+                try:
+                    worker.submit("").result(timeout=self.timeout)
+                except Exception:
+                    healthy = False
+            if not healthy:
+                with self._lock:
+                    if self._workers[i] is worker:
+                        worker.close()
+                        self._ensure_worker(i)
+                        restarted += 1
+        return restarted
+
+    def close(self) -> None:
+        """Stop all workers."""
+        self._closed.set()
+        with self._lock:
+            for worker in self._workers:
+                if worker is not None:
+                    worker.close()
+            self._workers = [None] * self.size
+
+    def _ensure_worker(self, i: int) -> None:
+        worker = self._workers[i]
+        if worker is not None and worker.is_alive():
+            return
+        if worker is not None:
+            worker.close()
+            self.restarts += 1
+        worker = PyrightWorker(self.command)
+        worker.start()
+        self._workers[i] = worker
+
+    def _health_loop(self, interval: float) -> None:
+        while not self._closed.wait(interval):
+            try:
+                self.health_check()
+            except Exception:
+                pass
+
+
+_pool: Optional[PyrightPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pyright_pool() -> PyrightPool:
+    """Return the process-wide Pyright pool, creating it on first use.
+
+    The pool size is read from ``PYRIGHT_POOL_SIZE`` (see
+    :func:`examples.coding.config.get_pyright_pool_size`).
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from .config import get_pyright_pool_size
+
+                _pool = PyrightPool(size=get_pyright_pool_size())
+    return _pool
@@ -0,0 +1,534 @@
+"""Pool of pre-forked Python interpreters that run untrusted code with limits.
+
+Starting a fresh interpreter for every execution costs tens of milliseconds
+before a line of user code runs. Instead, each worker here is a long-lived
+"zygote" interpreter that has already imported the standard library; for every
+test case it forks a child, which applies CPU, memory and output limits, runs
+the code in a scratch directory and reports back. Test cases of one job run in
+parallel children, and a child that exceeds its wall-clock timeout is killed
+together with anything it started.
+
+Workers are started with a minimal environment (no API keys or other secrets)
+in isolated mode. This is resource isolation, not a security boundary: the code
+can still use the network and read files the current user can read.
+
+This module only uses the standard library, because it is also the zygote's
+entry point (``python -I sandbox.py --zygote``). Fork and ``resource`` limits
+need a POSIX system.
+"""
+
+import json
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional, Sequence
+
+
+# Filename the code is compiled under, to find its frames in tracebacks
+SOLUTION_FILENAME = "solution.py"
+
+_OUTPUT_TAIL_LINES = 5
+
+
+class SandboxError(RuntimeError):
+    """Raised when the sandbox itself fails (as opposed to the code it runs)."""
+
+
+@dataclass
+class SandboxLimits:
+    """Limits applied to every child.
+
+    Attributes:
+        timeout: Wall-clock seconds per test case.
+        cpu_seconds: CPU seconds per test case, defaults to ``timeout``.
+        memory_mb: Address-space limit in MiB.
+        output_bytes: Largest file the code may write, including its captured
+            stdout/stderr.
+        parallel: Test cases of one job that run at the same time.
+    """
+
+    timeout: float = 10.0
+    cpu_seconds: Optional[int] = None
+    memory_mb: int = 512
+    output_bytes: int = 1_000_000
+    parallel: int = 4
+
+
+@dataclass
+class CaseResult:
+    """Outcome of running the code (and possibly one test case) in a child.
+
+    Attributes:
+        name: ``"run"`` for the code alone, otherwise the test case name.
+        status: ``"passed"``, ``"failed"``, ``"timeout"``, ``"crashed"`` or
+            ``"skipped"`` (a module the code imports is not installed).
+        error_type: Exception class name, if one was raised.
+        message: Exception message or a description of the crash.
+        line: Line in the code where the exception was raised.
+        source_line: That line's source, or the failing line of the test
+            case when the exception was raised there.
+        output: The last lines of stdout/stderr.
+        duration: Wall-clock seconds.
+    """
+
+    name: str
+    status: str
+    error_type: Optional[str] = None
+    message: str = ""
+    line: Optional[int] = None
+    source_line: Optional[str] = None
+    output: str = ""
+    duration: float = 0.0
+
+    @property
+    def failed(self) -> bool:
+        return self.status in ("failed", "timeout", "crashed")
+
+
+@dataclass
+class SandboxReport:
+    """Results of all test cases of one job."""
+
+    results: list[CaseResult] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        """Whether no case failed (skipped cases count as passed)."""
+        return not any(result.failed for result in self.results)
+
+    def digest(self, max_chars: int = 1500) -> str:
+        """A short description of the failures, suitable as a critique.
+
+        Identical failures are reported once with the other cases that hit
+        them, and output is only shown for the first failure.
+        """
+        failures = [result for result in self.results if result.failed]
+        if not failures:
+            return "All test cases passed."
+        lines = []
+        if len(self.results) > 1 or self.results[0].name != "run":
+            lines.append(
+                f"Ran {len(self.results)} test cases: "
+                f"{len(self.results) - len(failures)} passed, {len(failures)} failed."
+            )
+        groups: dict[tuple, list[CaseResult]] = {}
+        for result in failures:
+            key = (result.status, result.error_type, result.message, result.line)
+            groups.setdefault(key, []).append(result)
+        for (status, error_type, message, line), results in groups.items():
+            if status == "timeout":
+                text = message or "timed out"
+            elif error_type:
+                text = f"{error_type}: {message}" if message else error_type
+            else:
+                text = message or status
+            if line is not None:
+                text += f" ({SOLUTION_FILENAME} line {line}"
+                if results[0].source_line:
+                    text += f": `{results[0].source_line}`"
+                text += ")"
+            elif results[0].source_line:
+                text += f" (at `{results[0].source_line}`)"
+            also = f" (also in {', '.join(r.name for r in results[1:])})" if len(results) > 1 else ""
+            lines.append(f"- {results[0].name}: {text}{also}")
+        if failures[0].output:
+            lines.append(f"Output of {failures[0].name} (last lines):\n{failures[0].output}")
+        digest = "\n".join(lines)
+        if len(digest) > max_chars:
+            digest = digest[: max_chars - 15].rstrip() + "\n[... truncated]"
+        return digest
+
+
+def collect_test_cases(code: str, tests: Sequence[str] = ()) -> list[dict]:
+    """Collect the test cases for ``code``.
+
+    Supplied ``tests`` are snippets run after the code in the same namespace
+    (e.g. ``"assert add(1, 2) == 3"``). Top-level ``test_*`` functions that
+    the code defines itself are called as one case each.
+    """
+    import ast
+
+    cases = [{"name": f"test {i + 1}", "source": source} for i, source in enumerate(tests)]
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return cases
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name.startswith("test_"):
+            if not node.args.args:
+                cases.append({"name": node.name, "source": f"{node.name}()"})
+    return cases
+
+
+# --- Zygote side: runs in the worker interpreter ----------------------------
+
+
+def _apply_limits(limits: dict) -> None:
+    import resource
+
+    cpu = int(limits["cpu_seconds"])
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    memory = limits["memory_mb"] * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (limits["output_bytes"], limits["output_bytes"]))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+
+def _error_info(error: BaseException, code: str, case: Optional[dict] = None) -> dict:
+    # Point at the deepest frame in the code, or failing that in the test case
+    line = case_line = None
+    tb = error.__traceback__
+    while tb is not None:
+        filename = tb.tb_frame.f_code.co_filename
+        if filename == SOLUTION_FILENAME:
+            line = tb.tb_lineno
+        elif case is not None and filename == f"<{case['name']}>":
+            case_line = tb.tb_lineno
+        tb = tb.tb_next
+    if line is None and isinstance(error, SyntaxError) and error.filename == SOLUTION_FILENAME:
+        line = error.lineno
+    source_line = None
+    if line is not None:
+        lines = code.splitlines()
+        source_line = lines[line - 1].strip() if line <= len(lines) else None
+    elif case_line is not None:
+        lines = case["source"].splitlines()
+        source_line = lines[case_line - 1].strip() if case_line <= len(lines) else None
+    message = error.msg if isinstance(error, SyntaxError) else str(error)
+    return {
+        "error_type": type(error).__name__,
+        "message": message.strip()[:500],
+        "line": line,
+        "source_line": source_line,
+    }
+
+
+def _run_child(job: dict, case: Optional[dict], workdir: str, out_path: str, result_path: str) -> None:
+    """Body of a forked child. Never returns."""
+    status = 1
+    try:
+        os.setsid()
+        os.chdir(workdir)
+        out = os.open(out_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(out, 1)
+        os.dup2(out, 2)
+        _apply_limits(job["limits"])
+        result: dict[str, Any] = {"status": "passed"}
+        run_main = job["mode"] == "main" and case is None
+        namespace = {"__name__": "__main__" if run_main else "solution", "__builtins__": __builtins__}
+        try:
+            exec(compile(job["code"], SOLUTION_FILENAME, "exec"), namespace)
+            if case is not None:
+                exec(compile(case["source"], f"<{case['name']}>", "exec"), namespace)
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                result = {"status": "failed", "error_type": "SystemExit", "message": f"exit code {e.code}"}
+        except ModuleNotFoundError as e:
+            # Missing third-party packages say nothing about the code itself
+            result = {"status": "skipped", **_error_info(e, job["code"], case)}
+        except BaseException as e:
+            result = {"status": "failed", **_error_info(e, job["code"], case)}
+        sys.stdout.flush()
+        sys.stderr.flush()
+        with open(result_path, "w") as f:
+            json.dump(result, f)
+        status = 0
+    finally:
+        os._exit(status)
+
+
+def _tail(path: str, limit: int = 4000) -> str:
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(f.tell() - limit, 0))
+            text = f.read().decode("utf-8", "replace")
+    except OSError:
+        return ""
+    return "\n".join(text.strip().splitlines()[-_OUTPUT_TAIL_LINES:])
+
+
+def _finish_case(name: str, pid_status: int, timed_out: bool, started: float, paths: tuple, limits: dict) -> dict:
+    import signal
+
+    out_path, result_path = paths
+    result: dict[str, Any] = {"name": name, "duration": time.monotonic() - started}
+    if timed_out:
+        result.update(status="timeout", message=f"timed out after {limits['timeout']:g}s")
+    elif os.path.exists(result_path) and os.path.getsize(result_path) > 0:
+        with open(result_path) as f:
+            result.update(json.load(f))
+    elif os.WIFSIGNALED(pid_status):
+        signum = os.WTERMSIG(pid_status)
+        if signum == signal.SIGXCPU:
+            message = f"exceeded the CPU limit of {limits['cpu_seconds']}s"
+        elif signum == signal.SIGXFSZ:
+            message = f"exceeded the output limit of {limits['output_bytes']} bytes"
+        else:
+            message = f"killed by signal {signal.Signals(signum).name}"
+        result.update(status="crashed", message=message)
+    else:
+        result.update(status="crashed", message=f"exited with status {os.WEXITSTATUS(pid_status)}")
+    if result["status"] != "passed":
+        result["output"] = _tail(out_path)
+    return result
+
+
+def _run_job(job: dict) -> list[dict]:
+    import shutil
+    import signal
+
+    limits = job["limits"]
+    cases: list[Optional[dict]] = list(job["cases"]) or [None]
+    results: list[Optional[dict]] = [None] * len(cases)
+    running: dict[int, tuple] = {}  # pid -> (index, started, deadline, paths)
+    workdir = tempfile.mkdtemp(prefix="sandbox-")
+    try:
+        next_case = 0
+        while next_case < len(cases) or running:
+            while next_case < len(cases) and len(running) < limits["parallel"]:
+                case = cases[next_case]
+                casedir = os.path.join(workdir, str(next_case))
+                os.mkdir(casedir)
+                paths = (os.path.join(workdir, f"{next_case}.out"), os.path.join(workdir, f"{next_case}.json"))
+                pid = os.fork()
+                if pid == 0:
+                    _run_child(job, case, casedir, *paths)
+                started = time.monotonic()
+                running[pid] = (next_case, started, started + limits["timeout"], paths)
+                next_case += 1
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                now = time.monotonic()
+                for pid, (index, started, deadline, paths) in list(running.items()):
+                    if now >= deadline:
+                        # The child leads its own session: kill it and its children
+                        try:
+                            os.killpg(pid, signal.SIGKILL)
+                        except ProcessLookupError:
+                            pass
+                        os.waitpid(pid, 0)
+                        del running[pid]
+                        name = cases[index]["name"] if cases[index] else "run"
+                        results[index] = _finish_case(name, 0, True, started, paths, limits)
+                time.sleep(0.002)
+                continue
+            if pid not in running:
+                continue
+            index, started, _, paths = running.pop(pid)
+            name = cases[index]["name"] if cases[index] else "run"
+            results[index] = _finish_case(name, status, False, started, paths, limits)
+    finally:
+        for pid in running:
+            try:
+                os.killpg(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except OSError:
+                pass
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results  # type: ignore[return-value]
+
+
+def _zygote_main() -> None:
+    # Import what user code commonly needs before forking, so children start warm
+    import ast  # noqa: F401
+    import collections  # noqa: F401
+    import dataclasses  # noqa: F401
+    import functools  # noqa: F401
+    import itertools  # noqa: F401
+    import math  # noqa: F401
+    import re  # noqa: F401
+    import typing  # noqa: F401
+    import resource  # noqa: F401
+
+    protocol = os.fdopen(os.dup(1), "w", buffering=1)
+    # Keep stray prints of the zygote itself off the protocol stream
+    os.dup2(2, 1)
+    protocol.write(json.dumps({"ready": True}) + "\n")
+    for line in sys.stdin:
+        job = json.loads(line)
+        try:
+            response = {"id": job["id"], "results": _run_job(job)}
+        except Exception as e:
+            response = {"id": job["id"], "error": f"{type(e).__name__}: {e}"}
+        protocol.write(json.dumps(response) + "\n")
+
+
+# --- Parent side -------------------------------------------------------------
+
+
+def _zygote_env() -> dict:
+    # No credentials from the parent environment reach the code
+    return {
+        "PATH": os.environ.get("PATH", os.defpath),
+        "LANG": "C.UTF-8",
+        "HOME": tempfile.gettempdir(),
+        "PYTHONDONTWRITEBYTECODE": "1",
+        "PYTHONUNBUFFERED": "1",
+    }
+
+
+class SandboxWorker:
+    """One zygote interpreter, running one job at a time."""
+
+    def __init__(self, python: Optional[str] = None) -> None:
+        self.python = python or sys.executable
+        self._process: Optional[subprocess.Popen] = None
+        self._ids = 0
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self) -> None:
+        """Start the zygote and wait until it has finished its imports."""
+        if not hasattr(os, "fork"):
+            raise SandboxError("The sandbox needs os.fork, which this platform lacks")
+        self._process = subprocess.Popen(
+            [self.python, "-I", os.path.abspath(__file__), "--zygote"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=_zygote_env(),
+            cwd=tempfile.gettempdir(),
+            text=True,
+            bufsize=1,
+        )
+        ready = self._process.stdout.readline()  # type: ignore[union-attr]
+        if not ready:
+            self.close()
+            raise SandboxError("Sandbox worker exited during start-up")
+
+    def run(self, job: dict, timeout: float) -> list[dict]:
+        """Send ``job`` and wait for its results."""
+        if not self.is_alive():
+            self.start()
+        process = self._process
+        self._ids += 1
+        job = {**job, "id": self._ids}
+        timer = threading.Timer(timeout, process.kill)  # type: ignore[union-attr]
+        timer.start()
+        try:
+            process.stdin.write(json.dumps(job) + "\n")  # type: ignore[union-attr]
+            line = process.stdout.readline()  # type: ignore[union-attr]
+        except OSError as e:
+            self.close()
+            raise SandboxError(f"Sandbox worker died: {e}") from e
+        finally:
+            timer.cancel()
+        if not line:
+            self.close()
+            raise SandboxError("Sandbox worker died or did not answer in time")
+        response = json.loads(line)
+        if "error" in response:
+            raise SandboxError(response["error"])
+        return response["results"]
+
+    def close(self) -> None:
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+
+
+class SandboxPool:
+    """Fixed-size pool of zygote workers.
+
+    Args:
+        size: Number of zygotes, i.e. jobs that can run at the same time.
+        limits: Limits applied to every test case.
+    """
+
+    def __init__(self, size: int = 2, limits: Optional[SandboxLimits] = None) -> None:
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.size = size
+        self.limits = limits or SandboxLimits()
+        self._idle: "queue.Queue[SandboxWorker]" = queue.Queue()
+        self._workers = [SandboxWorker() for _ in range(size)]
+        for worker in self._workers:
+            self._idle.put(worker)
+
+    def start(self) -> None:
+        """Start every zygote up front instead of on first use."""
+        for worker in self._workers:
+            if not worker.is_alive():
+                worker.start()
+
+    def run(self, code: str, tests: Sequence[str] = (), mode: str = "import") -> SandboxReport:
+        """Run ``code`` and its test cases (see ``collect_test_cases``).
+
+        Args:
+            code: The program.
+            tests: Extra test snippets run against the program's namespace.
+            mode: ``"import"`` runs the code without its ``__main__`` block,
+                ``"main"`` runs it as a script.
+
+        Returns:
+            SandboxReport: One result per test case, or a single ``"run"``
+                result if there are none.
+        """
+        limits = self.limits
+        cases = collect_test_cases(code, tests)
+        job = {
+            "code": code,
+            "cases": cases,
+            "mode": mode,
+            "limits": {
+                "timeout": limits.timeout,
+                "cpu_seconds": limits.cpu_seconds or max(int(limits.timeout + 0.999), 1),
+                "memory_mb": limits.memory_mb,
+                "output_bytes": limits.output_bytes,
+                "parallel": max(limits.parallel, 1),
+            },
+        }
+        # Cases run in waves of ``parallel``; allow for all of them timing out
+        waves = -(-max(len(cases), 1) // max(limits.parallel, 1))
+        worker = self._idle.get()
+        try:
+            results = worker.run(job, timeout=waves * limits.timeout + 10)
+        finally:
+            self._idle.put(worker)
+        return SandboxReport([CaseResult(**result) for result in results])
+
+    async def arun(self, code: str, tests: Sequence[str] = (), mode: str = "import") -> SandboxReport:
+        """Async variant of :meth:`run`, waiting in a thread."""
+        import asyncio
+
+        return await asyncio.to_thread(self.run, code, tests, mode)
+
+    def close(self) -> None:
+        """Stop all zygotes."""
+        for worker in self._workers:
+            worker.close()
+
+
+_pool: Optional[SandboxPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool() -> SandboxPool:
+    """Return the process-wide sandbox pool, creating it on first use.
+
+    Size and limits are read from the environment (see
+    :func:`examples.coding.config.get_sandbox_pool_size` and
+    :func:`examples.coding.config.get_sandbox_limits`).
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from .config import get_sandbox_limits, get_sandbox_pool_size
+
+                _pool = SandboxPool(size=get_sandbox_pool_size(), limits=get_sandbox_limits())
+    return _pool
+
+
+if __name__ == "__main__" and sys.argv[1:] == ["--zygote"]:
+    _zygote_main()
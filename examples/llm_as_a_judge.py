@@ -8,7 +8,7 @@ pip install langgraph-reflection langchain openevals
 """
 
 from langchain_core.messages import HumanMessage
-from langgraph_reflection import create_reflection_graph
+from langgraph_reflection import ModelLadderConfig, create_reflection_graph
 
 from examples.llm_as_a_judge.assistant import create_assistant_graph
 from examples.llm_as_a_judge.judge import create_judge_graph
@@ -22,8 +22,11 @@ def create_graphs():
     # Create the judge graph
     judge_graph = create_judge_graph()
 
-    # Create the complete reflection graph
-    return create_reflection_graph(assistant_graph, judge_graph).compile()
+    # Create the complete reflection graph; the assistant's model ladder can be
+    # set per run through the config schema
+    return create_reflection_graph(
+        assistant_graph, judge_graph, config_schema=ModelLadderConfig
+    ).compile()
 
 
 # Create the reflection app
@@ -1,20 +1,85 @@
 """Assistant graph module for handling user queries and generating responses."""
 
-from langchain.chat_models import init_chat_model
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langgraph.graph import StateGraph, MessagesState, START, END
+from langgraph_reflection import acall, call, get_ladder_model, get_scheduler, run_priority
 
 
-def call_model(state: dict) -> dict:
-    """Process the user query with a large language model.
+# Answer with the fast model first; move to the larger one once the judge
+# rejects a draft. Override per run with ``configurable["model_ladder"]``.
+DEFAULT_MODEL_LADDER = ["claude-3-5-haiku-latest", "claude-3-7-sonnet-latest"]
+
+
+def _model_kwargs(config: RunnableConfig) -> dict:
+    temperature = config.get("configurable", {}).get("temperature")
+    return {} if temperature is None else {"temperature": temperature}
+
+
+def _as_anthropic_tier(tier):
+    # A bare name is an Anthropic model; "provider:model" names and dict rungs
+    # are left to ``get_chat_model``
+    if isinstance(tier, str) and ":" not in tier:
+        return {"model": tier, "model_provider": "anthropic"}
+    return tier
+
+
+def get_model(state: dict, config: RunnableConfig) -> tuple:
+    """Return the model for the next draft and the provider it is scheduled under.
+
+    Args:
+        state: The current conversation state
+        config: Run configuration, may carry a ``model_ladder`` and a per-draft ``temperature``
+
+    Returns:
+        tuple: The chat model and its provider name
+    """
+    configurable = config.get("configurable", {})
+    if configurable.get("model_ladder"):
+        ladder = [_as_anthropic_tier(tier) for tier in configurable["model_ladder"]]
+        config = {**config, "configurable": {**configurable, "model_ladder": ladder}}
+    model, tier = get_ladder_model(
+        config,
+        state["messages"],
+        [_as_anthropic_tier(tier) for tier in DEFAULT_MODEL_LADDER],
+        **_model_kwargs(config),
+    )
+    name = tier["model"]
+    provider = tier.get("model_provider") or name.split(":")[0]
+    return model, provider
+
+
+def call_model(state: dict, config: RunnableConfig) -> dict:
+    """Process the user query, escalating to a larger model after critiques.
 
     Args:
         state: The current conversation state
+        config: Run configuration, may carry a ``model_ladder`` and a per-draft ``temperature``
 
     Returns:
         dict: Updated state with model response
     """
-    model = init_chat_model(model="claude-3-7-sonnet-latest")
-    return {"messages": model.invoke(state["messages"])}
+    model, provider = get_model(state, config)
+    response = call(
+        provider, model.invoke, state["messages"], priority=run_priority(state["messages"])
+    )
+    return {"messages": response}
+
+
+async def acall_model(state: dict, config: RunnableConfig) -> dict:
+    """Async variant of ``call_model`` using ``ainvoke``.
+
+    Args:
+        state: The current conversation state
+        config: Run configuration
+
+    Returns:
+        dict: Updated state with model response
+    """
+    model, provider = get_model(state, config)
+    response = await acall(
+        provider, model.ainvoke, state["messages"], priority=run_priority(state["messages"])
+    )
+    return {"messages": response}
 
 
 def create_assistant_graph():
@@ -23,9 +88,12 @@ def create_assistant_graph():
     Returns:
         CompiledStateGraph: The compiled assistant graph
     """
+    # Schedule Anthropic calls before the first client is built, so that it
+    # leaves retries to the scheduler
+    get_scheduler("anthropic")
     assistant_graph = (
         StateGraph(MessagesState)
-        .add_node(call_model)
+        .add_node("call_model", RunnableLambda(call_model, afunc=acall_model))
         .add_edge(START, "call_model")
         .add_edge("call_model", END)
         .compile()
@@ -1,8 +1,21 @@
 """Judge graph module for evaluating assistant responses using LLM as a judge."""
 
 from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, MessagesState, START, END
-from openevals.llm import create_llm_as_judge
+from openevals.llm import create_async_llm_as_judge, create_llm_as_judge
+from langgraph_reflection import (
+    acall,
+    cache_key,
+    call,
+    get_chat_model,
+    get_default_verdict_cache,
+    get_evaluator,
+    get_scheduler,
+    record_metric,
+    run_priority,
+    timed_metric,
+)
 
 
 # Define a more detailed critique prompt with specific evaluation criteria
@@ -25,6 +38,27 @@ Be detailed in your critique so the assistant can understand exactly how to impr
 {outputs}
 </response>"""
 
+JUDGE_MODEL = "openai:o3-mini"
+FEEDBACK_KEY = "pass"
+
+
+def _verdict_key(response) -> str:
+    return cache_key(
+        response,
+        {"prompt": CRITIQUE_PROMPT, "model": JUDGE_MODEL, "feedback_key": FEEDBACK_KEY},
+    )
+
+
+def _critique(eval_result: dict) -> dict | None:
+    record_metric("judge_passed", bool(eval_result["score"]))
+    if eval_result["score"]:
+        print("✅ Response approved by judge")
+        return None
+    else:
+        # Otherwise, return the judge's critique as a new user message
+        print("⚠️ Judge requested improvements")
+        return {"messages": [HumanMessage(content=eval_result["comment"])]}
+
 
 def judge_response(state: dict, config: dict | None = None) -> dict | None:
     """Evaluate the assistant's response using a separate judge model.
@@ -36,20 +70,65 @@ def judge_response(state: dict, config: dict | None = None) -> dict | None:
     Returns:
         dict | None: Updated state with critique if improvements are needed, None otherwise
     """
-    evaluator = create_llm_as_judge(
-        prompt=CRITIQUE_PROMPT,
-        model="openai:o3-mini",
-        feedback_key="pass",
-    )
-    eval_result = evaluator(outputs=state["messages"][-1].content, inputs=None)
+    response = state["messages"][-1].content
+    # Identical responses get the same verdict, so reuse it instead of re-judging
+    cache = get_default_verdict_cache()
+    key = _verdict_key(response)
+    eval_result = cache.get(key) if cache is not None else None
+    record_metric("judge_cache_hits" if eval_result is not None else "judge_cache_misses", 1)
+    if eval_result is None:
+        evaluator = get_evaluator(
+            create_llm_as_judge,
+            prompt=CRITIQUE_PROMPT,
+            judge=get_chat_model(JUDGE_MODEL),
+            feedback_key=FEEDBACK_KEY,
+        )
+        with timed_metric("judge_seconds"):
+            eval_result = call(
+                "openai",
+                evaluator,
+                outputs=response,
+                inputs=None,
+                priority=run_priority(state["messages"]),
+            )
+        if cache is not None:
+            cache.set(key, {"score": eval_result["score"], "comment": eval_result["comment"]})
+    return _critique(eval_result)
+
+
+async def ajudge_response(state: dict, config: dict | None = None) -> dict | None:
+    """Async variant of ``judge_response`` using the async openevals judge.
 
-    if eval_result["score"]:
-        print("✅ Response approved by judge")
-        return None
-    else:
-        # Otherwise, return the judge's critique as a new user message
-        print("⚠️ Judge requested improvements")
-        return {"messages": [HumanMessage(content=eval_result["comment"])]}
+    Args:
+        state: The current conversation state
+        config: Optional configuration dictionary
+
+    Returns:
+        dict | None: Updated state with critique if improvements are needed, None otherwise
+    """
+    response = state["messages"][-1].content
+    cache = get_default_verdict_cache()
+    key = _verdict_key(response)
+    eval_result = cache.get(key) if cache is not None else None
+    record_metric("judge_cache_hits" if eval_result is not None else "judge_cache_misses", 1)
+    if eval_result is None:
+        evaluator = get_evaluator(
+            create_async_llm_as_judge,
+            prompt=CRITIQUE_PROMPT,
+            judge=get_chat_model(JUDGE_MODEL),
+            feedback_key=FEEDBACK_KEY,
+        )
+        with timed_metric("judge_seconds"):
+            eval_result = await acall(
+                "openai",
+                evaluator,
+                outputs=response,
+                inputs=None,
+                priority=run_priority(state["messages"]),
+            )
+        if cache is not None:
+            cache.set(key, {"score": eval_result["score"], "comment": eval_result["comment"]})
+    return _critique(eval_result)
 
 
 def create_judge_graph():
@@ -58,9 +137,12 @@ def create_judge_graph():
     Returns:
         CompiledStateGraph: The compiled judge graph
     """
+    # Schedule the judge's calls before its client is built, so that it leaves
+    # retries to the scheduler
+    get_scheduler("openai")
     judge_graph = (
         StateGraph(MessagesState)
-        .add_node(judge_response)
+        .add_node("judge_response", RunnableLambda(judge_response, afunc=ajudge_response))
         .add_edge(START, "judge_response")
         .add_edge("judge_response", END)
         .compile()
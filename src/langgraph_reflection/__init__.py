@@ -1,4 +1,6 @@
-from typing import Optional, Type, Any, Literal, get_type_hints
+import threading
+from typing import Optional, Type, Any, Literal, Sequence, Union, get_type_hints
+from typing_extensions import NotRequired
 from langgraph.graph import END, START, StateGraph, MessagesState
 from langgraph.graph.state import CompiledStateGraph
 # RemainingSteps 参数用于追踪和限制 reflection agent 可执行的剩余步数。
@@ -10,6 +12,110 @@ from langgraph.graph.state import CompiledStateGraph
 #   如果不手动指定，系统可能会采用默认值（例如 5）。
 from langgraph.managed import RemainingSteps
 from langchain_core.messages import HumanMessage
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from langgraph_reflection.batch import (
+    BatchResult,
+    BatchStats,
+    astream_reflection_batch,
+    stream_reflection_batch,
+)
+from langgraph_reflection.blobs import (
+    BlobStore,
+    InMemoryBlobStore,
+    SQLiteBlobStore,
+    blob_offloading,
+    content_digest,
+    hydrate_messages,
+    offload_messages,
+)
+from langgraph_reflection.cache import (
+    LRUCache,
+    SQLiteCache,
+    VerdictCache,
+    cache_key,
+    get_default_verdict_cache,
+    set_default_verdict_cache,
+)
+from langgraph_reflection.checkpoint import (
+    aresume_reflection,
+    async_sqlite_checkpointer,
+    resume_reflection,
+    sqlite_checkpointer,
+)
+from langgraph_reflection.clients import (
+    clear_client_registry,
+    get_chat_model,
+    get_evaluator,
+)
+from langgraph_reflection.compaction import (
+    CompactionPolicy,
+    compact_messages,
+    with_compaction,
+    with_final_compaction,
+)
+from langgraph_reflection.convergence import (
+    ConvergenceState,
+    fingerprint,
+    with_convergence_detection,
+)
+from langgraph_reflection.critics import (
+    CRITIC_TAG,
+    CRITIQUE_METADATA_KEY,
+    Critic,
+    create_critic_cascade,
+    arun_critic,
+    create_parallel_critics,
+    critique_issued,
+    is_critique,
+    run_critic,
+    with_critique_marker,
+)
+from langgraph_reflection.escalation import (
+    ModelLadderConfig,
+    ModelTier,
+    critique_count,
+    get_ladder_model,
+    select_model_tier,
+)
+from langgraph_reflection.metrics import (
+    MetricsExporter,
+    MetricsState,
+    PrometheusTextExporter,
+    RoundMetrics,
+    record_metric,
+    summarize_rounds,
+    timed_metric,
+    with_metrics,
+)
+from langgraph_reflection.ratelimit import (
+    AdaptiveConcurrency,
+    ProviderScheduler,
+    RateLimits,
+    TokenBucket,
+    acall,
+    call,
+    configure_rate_limits,
+    estimate_tokens,
+    get_scheduler,
+    is_scheduled,
+    run_priority,
+)
+from langgraph_reflection.response_cache import (
+    ResponseCacheState,
+    response_cache_key,
+    with_response_cache,
+)
+from langgraph_reflection.streaming import (
+    ReflectionEvent,
+    astream_reflection,
+    stream_reflection,
+)
+from langgraph_reflection.speculative import (
+    SpeculationState,
+    default_draft_configs,
+    with_speculative_drafts,
+)
 
 
 class MessagesWithSteps(MessagesState):
@@ -20,6 +126,9 @@ class MessagesWithSteps(MessagesState):
     # 比如在主循环每轮自动减一或在特定节点专门处理。
     # https://blog.csdn.net/u013172930/article/details/147986262
 
+    # 仅在开启收敛检测时存在，见 ConvergenceState
+    termination_reason: NotRequired[Optional[str]]
+
 
 
 def end_or_reflect(state: MessagesWithSteps) -> Literal[END, "graph"]:
@@ -27,8 +136,8 @@ def end_or_reflect(state: MessagesWithSteps) -> Literal[END, "graph"]:
     判断反射循环是否继续，以下用例说明其逻辑:
     
     例1:
-        state = {"remaining_steps": 1, "messages": [...]}
-        因为remaining_steps < 2, 返回 END，流程终止。
+        state = {"remaining_steps": 2, "messages": [...]}
+        因为remaining_steps <= 2, 返回 END，流程终止。
 
     例2:
         state = {"remaining_steps": 3, "messages": []}
@@ -50,11 +159,16 @@ def end_or_reflect(state: MessagesWithSteps) -> Literal[END, "graph"]:
 
     """
 
-    # 为什么小于2就不用反思了？
-    # 反射机制下，每进行一轮主graph → judge → reflection，再返回主graph，这需要消耗1次remaining_steps。
-    # 如果remaining_steps为1，意味着只剩最后一次，进入反思环节后已无法转回主graph，不如提前终止。
-    # 因此，只有当remaining_steps>=2时才允许继续进入反思判定。
-    if state["remaining_steps"] < 2:
+    # 为什么小于等于2就不用反思了？
+    # 反射机制下，每进行一轮主graph → reflection 需要消耗2步（graph 一步，reflection 一步）。
+    # 这里读到的 remaining_steps 是当前 reflection 步之后剩余的步数，而 LangGraph 在步数
+    # 达到 recursion_limit 时就会抛出 GraphRecursionError，所以剩余步数 <= 2 时已不够再完整跑一轮，
+    # 不如提前终止，正常返回最后的结果。
+    if state["remaining_steps"] <= 2:
+        return END
+
+    # 开启收敛检测时，reflection 节点会在循环停滞（重复的草稿或批评）时写入终止原因
+    if state.get("termination_reason"):
         return END
 
     if len(state["messages"]) == 0:
@@ -75,10 +189,64 @@ def end_or_reflect(state: MessagesWithSteps) -> Literal[END, "graph"]:
 
 def create_reflection_graph(
     graph: CompiledStateGraph,
-    reflection: CompiledStateGraph,
+    reflection: Union[Critic, Sequence[Critic]],
     state_schema: Optional[Type[Any]] = None,
     config_schema: Optional[Type[Any]] = None,
+    critic_mode: Literal["cascade", "parallel"] = "cascade",
+    fail_fast: bool = False,
+    detect_convergence: bool = False,
+    on_convergence: Literal["end", "escalate"] = "end",
+    compaction: Union[bool, CompactionPolicy, None] = None,
+    num_drafts: int = 1,
+    draft_configs: Optional[Sequence[dict]] = None,
+    metrics: Union[bool, Sequence[MetricsExporter], None] = None,
+    response_cache: Union[bool, VerdictCache, None] = None,
 ) -> StateGraph:
+    """Create a graph that alternates between ``graph`` and a reflection step.
+
+    Args:
+        graph: The main agent that produces drafts.
+        reflection: The critic that reviews each draft, or a list of critics.
+        state_schema: State schema of the reflection graph. Defaults to
+            ``MessagesState``.
+        config_schema: Optional config schema of the reflection graph.
+        critic_mode: How a list of critics is run. ``"cascade"`` runs them in
+            order, cheapest first, and stops at the first critique (see
+            ``create_critic_cascade``). ``"parallel"`` runs them concurrently and
+            merges their critiques (see ``create_parallel_critics``).
+        fail_fast: In ``"parallel"`` mode, return as soon as any critic issues
+            a critique instead of waiting for all of them.
+        detect_convergence: Stop the loop when a draft or critique repeats an
+            earlier round (see ``with_convergence_detection``). The reason the
+            loop ended is then recorded in ``termination_reason``.
+        on_convergence: ``"end"`` stops at the first repeat; ``"escalate"``
+            first asks the assistant to take a different approach.
+        compaction: Compact the message history before each call of ``graph``,
+            and once more when the loop ends, so prompts stop growing with
+            every round. ``True`` uses
+            ``compact_messages``; a callable taking and returning the message
+            list can be passed instead, e.g.
+            ``functools.partial(compact_messages, mode="drop")``.
+        num_drafts: Generate this many drafts concurrently each round and keep
+            the first one that passes the reflection step, or the one with the
+            shortest critique (see ``with_speculative_drafts``).
+        draft_configs: One ``configurable`` override per draft, e.g.
+            ``[{"temperature": 0.0}, {"temperature": 0.7}]``. Implies
+            speculative drafts; defaults to temperatures spread from 0 to 1.
+        metrics: Measure every round (latencies, token usage, outcome and
+            anything critics report with ``record_metric``) and summarise the
+            run in ``reflection_metrics``. ``True`` only keeps the summary; a
+            list of exporters, e.g. ``[PrometheusTextExporter()]``, also
+            receives each round (see ``with_metrics``).
+        response_cache: Return a previously accepted answer when the same
+            conversation comes in again with the same ``configurable`` values,
+            without calling the assistant or the critics (see
+            ``with_response_cache``). ``True`` keeps up to 1024 answers in
+            memory; pass a ``VerdictCache`` for a SQLite tier, TTL or another size.
+
+    Returns:
+        StateGraph: The uncompiled reflection graph.
+    """
     # Default to MessagesState since both subgraphs use it
     # This is the most common case for LangGraph applications
     if state_schema is None:
@@ -86,21 +254,209 @@ def create_reflection_graph(
     else:
         _state_schema = state_schema
 
-    if "remaining_steps" in _state_schema.__annotations__:
-        raise ValueError(
-            "Has key 'remaining_steps' in state_schema, this shadows a built in key"
-        )
+    speculative = num_drafts > 1 or draft_configs is not None
+    mixins: list[Type[Any]] = []
+    if detect_convergence:
+        mixins.append(ConvergenceState)
+    if speculative:
+        mixins.append(SpeculationState)
+    if metrics:
+        mixins.append(MetricsState)
+    if response_cache:
+        mixins.append(ResponseCacheState)
+
+    for key in ["remaining_steps"] + [k for m in mixins for k in m.__annotations__]:
+        if key in _state_schema.__annotations__:
+            raise ValueError(
+                f"Has key '{key}' in state_schema, this shadows a built in key"
+            )
 
     if "messages" not in _state_schema.__annotations__:
         raise ValueError("Missing required key 'messages' in state_schema")
 
-    class StateSchema(_state_schema):
+    # The bases are only known at run time
+    class StateSchema(_state_schema, *mixins):  # type: ignore[misc]
         remaining_steps: RemainingSteps
 
+    critic: Critic
+    if isinstance(reflection, Sequence):
+        if len(reflection) == 1:
+            critic = reflection[0]
+        elif critic_mode == "parallel":
+            critic = create_parallel_critics(reflection, fail_fast=fail_fast)
+        elif critic_mode == "cascade":
+            critic = create_critic_cascade(reflection, StateSchema)
+        else:
+            raise ValueError(f"Unknown critic_mode '{critic_mode}'")
+    else:
+        critic = reflection
+
+    # The nodes, wrapped below according to the options
+    graph_node: Runnable = graph
+    reflection_node: Runnable = critic if isinstance(critic, Runnable) else RunnableLambda(critic)
+
+    if compaction:
+        graph_node = with_compaction(graph_node, None if compaction is True else compaction)
+
+    if speculative:
+        graph_node, reflection_node = with_speculative_drafts(
+            graph_node, reflection_node, num_drafts, draft_configs
+        )
+
+    if detect_convergence:
+        reflection_node = with_convergence_detection(reflection_node, on_convergence)
+
+    # Lets the assistant tell critiques from new user turns (see is_critique)
+    reflection_node = with_critique_marker(reflection_node)
+
+    if response_cache:
+        cache = VerdictCache() if response_cache is True else response_cache
+        graph_node, reflection_node = with_response_cache(
+            graph_node, reflection_node, cache, track_termination=detect_convergence
+        )
+
+    if metrics:
+        exporters = [] if metrics is True else list(metrics)
+        graph_node, reflection_node = with_metrics(graph_node, reflection_node, exporters)
+
+    if compaction:
+        # Outermost, so the other wrappers see the run's messages as they were
+        reflection_node = with_final_compaction(
+            reflection_node, None if compaction is True else compaction
+        )
+
     rgraph = StateGraph(StateSchema, config_schema=config_schema)
-    rgraph.add_node("graph", graph)
-    rgraph.add_node("reflection", reflection)
+    rgraph.add_node("graph", graph_node)
+    rgraph.add_node("reflection", reflection_node)
     rgraph.add_edge(START, "graph")
     rgraph.add_edge("graph", "reflection")
     rgraph.add_conditional_edges("reflection", end_or_reflect)
     return rgraph
+
+
+# Compiled reflection graphs shared by compile_reflection_graph(cache=True)
+_compiled_graphs = LRUCache(maxsize=128)
+_compile_lock = threading.Lock()
+
+
+def _identity(value: Any) -> Any:
+    # Subgraphs and schemas are keyed by identity: two equal-looking graphs
+    # may still behave differently
+    if isinstance(value, (list, tuple)):
+        return tuple(_identity(v) for v in value)
+    return None if value is None else ("__id__", id(value))
+
+
+def _is_hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _same_sources(cached: tuple, sources: tuple) -> bool:
+    # An id can be reused once its object is freed, so a key match alone does
+    # not prove the cached graph was built from these objects
+    return len(cached) == len(sources) and all(a is b for a, b in zip(cached, sources))
+
+
+def compile_reflection_graph(
+    graph: CompiledStateGraph,
+    reflection: Union[Critic, Sequence[Critic]],
+    state_schema: Optional[Type[Any]] = None,
+    config_schema: Optional[Type[Any]] = None,
+    *,
+    cache: Union[bool, LRUCache] = True,
+    checkpointer: Any = None,
+    store: Any = None,
+    **options: Any,
+) -> CompiledStateGraph:
+    """Create and compile a reflection graph, reusing an earlier compilation.
+
+    Services that build the same reflection graph per tenant or per request
+    otherwise pay for the state schema construction and the compilation every
+    time. The compiled graph is cached under the identity of ``graph``,
+    ``reflection``, the schemas and the checkpointer/store, plus the values of
+    the other options, so passing the same subgraph objects returns the same
+    compiled graph. A cached graph holds on to these objects until it is
+    evicted.
+
+    Example:
+        ```python
+        app = compile_reflection_graph(assistant_graph, judge_graph, detect_convergence=True)
+        assert app is compile_reflection_graph(assistant_graph, judge_graph, detect_convergence=True)
+        print(compiled_graph_cache_stats())
+        ```
+
+    Args:
+        graph: The main agent, see ``create_reflection_graph``.
+        reflection: The critic or critics, see ``create_reflection_graph``.
+        state_schema: See ``create_reflection_graph``.
+        config_schema: See ``create_reflection_graph``.
+        cache: ``True`` uses the shared cache (128 graphs, least recently used
+            evicted first), ``False`` always compiles, or pass an ``LRUCache``.
+        checkpointer: Passed to ``compile``.
+        store: Passed to ``compile``.
+        **options: Other keyword arguments of ``create_reflection_graph``.
+
+    Returns:
+        CompiledStateGraph: The compiled reflection graph.
+    """
+
+    from langgraph_reflection.clients import _freeze
+
+    def build() -> CompiledStateGraph:
+        return create_reflection_graph(
+            graph, reflection, state_schema, config_schema, **options
+        ).compile(checkpointer=checkpointer, store=store)
+
+    if cache is False:
+        return build()
+    compiled_graphs = _compiled_graphs if cache is True else cache
+
+    critics = list(reflection) if isinstance(reflection, Sequence) else [reflection]
+    # The objects keyed by identity are kept in the entry, so their ids stay
+    # taken for as long as the compiled graph is cached
+    sources = (
+        graph,
+        *critics,
+        state_schema,
+        config_schema,
+        checkpointer,
+        store,
+        *(value for value in options.values() if not _is_hashable(value)),
+    )
+    key = (
+        _identity(graph),
+        _identity(critics),
+        _identity(state_schema),
+        _identity(config_schema),
+        _identity(checkpointer),
+        _identity(store),
+        _freeze(options),
+    )
+    entry = compiled_graphs.get(key)
+    if entry is None or not _same_sources(entry[0], sources):
+        with _compile_lock:
+            # Another thread may have compiled it while we waited
+            entry = compiled_graphs.get(key)
+            if entry is None or not _same_sources(entry[0], sources):
+                entry = (sources, build())
+                compiled_graphs.set(key, entry)
+    return entry[1]
+
+
+def compiled_graph_cache_stats() -> dict:
+    """Hits, misses and size of the cache used by ``compile_reflection_graph``."""
+    return {
+        "hits": _compiled_graphs.hits,
+        "misses": _compiled_graphs.misses,
+        "size": len(_compiled_graphs),
+        "maxsize": _compiled_graphs.maxsize,
+    }
+
+
+def clear_compiled_graph_cache() -> None:
+    """Drop every graph cached by ``compile_reflection_graph``."""
+    _compiled_graphs.clear()
@@ -0,0 +1,234 @@
+"""Running a reflection app over many inputs with bounded concurrency."""
+
+import asyncio
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    Optional,
+    Union,
+)
+
+from langchain_core.runnables import Runnable, RunnableConfig
+
+
+BatchConfig = Union[RunnableConfig, Callable[[int, Any], RunnableConfig], None]
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one input of a batch run.
+
+    Attributes:
+        index: Position of the input in the batch.
+        input: The input that was run.
+        output: Final state of the run, if it succeeded.
+        error: The exception raised by the run, if it failed.
+        latency: Wall-clock seconds the run took.
+    """
+
+    index: int
+    input: Any
+    output: Optional[dict] = None
+    error: Optional[BaseException] = None
+    latency: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether the run completed without raising."""
+        return self.error is None
+
+
+@dataclass
+class BatchStats:
+    """Aggregate counters for a batch run, updated as results complete."""
+
+    completed: int = 0
+    failed: int = 0
+    total_latency: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    _clock: Callable[[], float] = field(default=time.monotonic, repr=False)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the batch started (until it finished, if it has)."""
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else self._clock()
+        return end - self.started_at
+
+    @property
+    def items_per_second(self) -> float:
+        """Completed runs (successful or not) per second of wall-clock time."""
+        elapsed = self.elapsed
+        return (self.completed + self.failed) / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        """Average per-run latency in seconds."""
+        count = self.completed + self.failed
+        return self.total_latency / count if count else 0.0
+
+    def _record(self, result: BatchResult) -> None:
+        if result.ok:
+            self.completed += 1
+        else:
+            self.failed += 1
+        self.total_latency += result.latency
+
+
+def _config_for(config: BatchConfig, index: int, input: Any) -> Optional[RunnableConfig]:
+    return config(index, input) if callable(config) else config
+
+
+def _run_one(app: Runnable, index: int, input: Any, config: Optional[RunnableConfig]) -> BatchResult:
+    start = time.monotonic()
+    try:
+        output = app.invoke(input, config)
+    except Exception as e:
+        return BatchResult(index, input, error=e, latency=time.monotonic() - start)
+    return BatchResult(index, input, output=output, latency=time.monotonic() - start)
+
+
+def stream_reflection_batch(
+    app: Runnable,
+    inputs: Iterable[Any],
+    *,
+    max_concurrency: int = 8,
+    config: BatchConfig = None,
+    stats: Optional[BatchStats] = None,
+) -> Iterator[BatchResult]:
+    """Run ``app`` over ``inputs`` in a thread pool, yielding results as they complete.
+
+    Inputs are consumed lazily, so at most ``max_concurrency`` runs are in
+    flight at any time. An exception in one run is captured in its
+    ``BatchResult`` and does not affect the others.
+
+    Args:
+        app: A compiled reflection graph (or any runnable).
+        inputs: The inputs, e.g. ``{"messages": [...]}`` dicts.
+        max_concurrency: Maximum number of concurrent runs.
+        config: A config applied to every run, or a function of
+            ``(index, input)`` returning one, e.g. to set a ``thread_id``.
+        stats: If given, updated with aggregate counters and throughput.
+
+    Yields:
+        BatchResult: One per input, in completion order.
+
+    Example:
+        ```python
+        stats = BatchStats()
+        for result in stream_reflection_batch(reflection_app, inputs, max_concurrency=16, stats=stats):
+            ...
+        print(f"{stats.items_per_second:.1f} items/s, {stats.failed} failed")
+        ```
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    stats = stats if stats is not None else BatchStats()
+    stats.started_at = stats._clock()
+    iterator = enumerate(inputs)
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    pending: set[Future] = set()
+    try:
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_concurrency:
+                try:
+                    index, input = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.add(
+                    executor.submit(
+                        contextvars.copy_context().run,
+                        _run_one,
+                        app,
+                        index,
+                        input,
+                        _config_for(config, index, input),
+                    )
+                )
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                stats._record(result)
+                yield result
+    finally:
+        stats.finished_at = stats._clock()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def astream_reflection_batch(
+    app: Runnable,
+    inputs: Union[Iterable[Any], AsyncIterable[Any]],
+    *,
+    max_concurrency: int = 8,
+    config: BatchConfig = None,
+    stats: Optional[BatchStats] = None,
+) -> AsyncIterator[BatchResult]:
+    """Async variant of :func:`stream_reflection_batch` using ``ainvoke``.
+
+    Closing the iterator early cancels the runs that are still in flight.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    stats = stats if stats is not None else BatchStats()
+    stats.started_at = stats._clock()
+
+    async def run_one(index: int, input: Any) -> BatchResult:
+        start = time.monotonic()
+        try:
+            output = await app.ainvoke(input, _config_for(config, index, input))
+        except Exception as e:
+            return BatchResult(index, input, error=e, latency=time.monotonic() - start)
+        return BatchResult(index, input, output=output, latency=time.monotonic() - start)
+
+    if isinstance(inputs, AsyncIterable):
+        aiterator = inputs.__aiter__()
+    else:
+        sync_iterator = iter(inputs)
+        aiterator = None
+
+    async def next_input() -> Any:
+        if aiterator is not None:
+            return await aiterator.__anext__()
+        try:
+            return next(sync_iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    pending: set[asyncio.Task] = set()
+    index = 0
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < max_concurrency:
+                try:
+                    input = await next_input()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                pending.add(asyncio.ensure_future(run_one(index, input)))
+                index += 1
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.result()
+                stats._record(result)
+                yield result
+    finally:
+        stats.finished_at = stats._clock()
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,217 @@
+"""Keeping superseded drafts out of the reflection state.
+
+Every round leaves a full draft in the thread's state, and with a checkpointer
+each of them is serialised again at every step. With many concurrent threads
+this dominates memory and checkpoint size. The policy below, used as the
+``compaction`` hook of ``create_reflection_graph``, moves all but the latest
+drafts to a content-addressed blob store and leaves a short reference in the
+state; identical drafts (across rounds or threads) are stored once.
+:func:`hydrate_messages` restores the full conversation when it is needed.
+"""
+
+import functools
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Protocol, Sequence, runtime_checkable
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from langgraph_reflection.compaction import CompactionPolicy
+
+
+# ``response_metadata`` keys of a draft whose content was moved to the blob store:
+# the digest, and whether the content was text or a list of blocks. Response
+# metadata is never sent back to the model.
+BLOB_METADATA_KEY = "reflection_blob"
+BLOB_TYPE_METADATA_KEY = "reflection_blob_type"
+
+OFFLOADED_DRAFT_PREFIX = "[Earlier draft stored as blob"
+
+
+@runtime_checkable
+class BlobStore(Protocol):
+    """Content-addressed storage for message contents."""
+
+    def put(self, content: str) -> str:
+        """Store ``content`` and return its digest; storing it again is a no-op."""
+        ...
+
+    def get(self, digest: str) -> Optional[str]:
+        """Return the content stored under ``digest``, or ``None``."""
+        ...
+
+
+def content_digest(content: str) -> str:
+    """Hex SHA-256 digest of ``content``, the key used by blob stores."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class InMemoryBlobStore:
+    """Thread-safe blob store kept in a dict, for a single process."""
+
+    def __init__(self) -> None:
+        self._blobs: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def put(self, content: str) -> str:
+        digest = content_digest(content)
+        with self._lock:
+            self._blobs.setdefault(digest, content)
+        return digest
+
+    def get(self, digest: str) -> Optional[str]:
+        with self._lock:
+            return self._blobs.get(digest)
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+
+class SQLiteBlobStore:
+    """Blob store in a SQLite table, shared by processes using the same file.
+
+    Args:
+        path: Database file path. Created if it does not exist.
+        table: Table name, so the file can be shared with other caches.
+    """
+
+    def __init__(self, path: str, table: str = "blobs") -> None:
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name '{table}'")
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "digest TEXT PRIMARY KEY, content TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def put(self, content: str) -> str:
+        digest = content_digest(content)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR IGNORE INTO {self.table} (digest, content, created_at) VALUES (?, ?, ?)",
+                (digest, content, time.time()),
+            )
+        return digest
+
+    def get(self, digest: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT content FROM {self.table} WHERE digest = ?", (digest,)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        return count
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def _is_offloaded(message: BaseMessage) -> bool:
+    return BLOB_METADATA_KEY in message.response_metadata
+
+
+def offload_messages(
+    messages: Sequence[BaseMessage],
+    *,
+    store: BlobStore,
+    keep_drafts: int = 1,
+) -> list[BaseMessage]:
+    """Move all but the last ``keep_drafts`` drafts to ``store``.
+
+    An offloaded draft keeps all its fields (id, name, metadata, ...) except
+    its content, which becomes a short note naming the digest; critiques, user
+    messages and the latest drafts are left as they are. Drafts that make tool
+    calls are kept, since the tool messages that follow refer to them.
+
+    Args:
+        messages: The conversation so far.
+        store: Where draft contents go.
+        keep_drafts: Number of most recent drafts to keep inline.
+
+    Returns:
+        list[BaseMessage]: The conversation with older drafts replaced.
+    """
+    drafts = [i for i, m in enumerate(messages) if isinstance(m, AIMessage)]
+    offload = set(drafts[: max(len(drafts) - keep_drafts, 0)])
+    compacted = []
+    for i, message in enumerate(messages):
+        if (
+            i not in offload
+            or not isinstance(message, AIMessage)
+            or _is_offloaded(message)
+            or message.tool_calls
+        ):
+            compacted.append(message)
+            continue
+        content = message.content
+        digest = store.put(content if isinstance(content, str) else json.dumps(content))
+        size = len(str(content))
+        compacted.append(
+            message.model_copy(
+                update={
+                    "content": f"{OFFLOADED_DRAFT_PREFIX} {digest[:12]} ({size} chars); "
+                    "it was revised in a later round.]",
+                    "response_metadata": {
+                        **message.response_metadata,
+                        BLOB_METADATA_KEY: digest,
+                        BLOB_TYPE_METADATA_KEY: "text" if isinstance(content, str) else "json",
+                    },
+                }
+            )
+        )
+    return compacted
+
+
+def blob_offloading(store: BlobStore, keep_drafts: int = 1) -> CompactionPolicy:
+    """Compaction policy that offloads older drafts to ``store``.
+
+    Example:
+        ```python
+        store = SQLiteBlobStore("drafts.sqlite")
+        reflection_app = create_reflection_graph(
+            assistant_graph, judge_graph, compaction=blob_offloading(store, keep_drafts=2)
+        ).compile(checkpointer=checkpointer)
+        ```
+    """
+    return functools.partial(offload_messages, store=store, keep_drafts=keep_drafts)
+
+
+def hydrate_messages(messages: Sequence[BaseMessage], store: BlobStore) -> list[BaseMessage]:
+    """Restore the drafts that ``offload_messages`` moved to ``store``.
+
+    Restored drafts are equal to the messages that were offloaded. Drafts
+    whose blob is missing from ``store`` are returned unchanged.
+
+    Args:
+        messages: A conversation from the reflection state.
+        store: The store the drafts were offloaded to.
+
+    Returns:
+        list[BaseMessage]: The conversation with full drafts.
+    """
+    hydrated = []
+    for message in messages:
+        if not _is_offloaded(message):
+            hydrated.append(message)
+            continue
+        metadata = dict(message.response_metadata)
+        content: Any = store.get(metadata.pop(BLOB_METADATA_KEY))
+        if content is None:
+            hydrated.append(message)
+            continue
+        if metadata.pop(BLOB_TYPE_METADATA_KEY, "text") == "json":
+            content = json.loads(content)
+        hydrated.append(message.model_copy(update={"content": content, "response_metadata": metadata}))
+    return hydrated
@@ -0,0 +1,300 @@
+"""Content-addressed caching of critique verdicts.
+
+Judges are often asked to critique content they have already seen (retries,
+repeated queries, an assistant that re-emits the same draft). ``VerdictCache``
+stores their verdicts under a hash of the judged content plus the judge
+configuration, in an in-memory LRU tier backed by an optional SQLite tier.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+
+_MISSING = object()
+
+
+def cache_key(content: Any, config: Optional[dict] = None) -> str:
+    """Build a stable cache key from the judged content and judge configuration.
+
+    Args:
+        content: The content being judged (code, a response, messages...).
+            Must be JSON-serializable; other objects are serialized with ``str``.
+        config: Anything that changes the verdict for the same content, such as
+            the prompt, model and feedback key.
+
+    Returns:
+        str: A hex SHA-256 digest.
+    """
+    payload = json.dumps(
+        {"content": content, "config": config or {}},
+        sort_keys=True,
+        default=str,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU cache with an optional TTL.
+
+    Args:
+        maxsize: Maximum number of entries to keep.
+        ttl: Seconds an entry stays valid. ``None`` keeps entries until evicted.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Return the cached value for ``key`` or ``default``."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Any, value: Any) -> None:
+        """Store ``value`` under ``key``, evicting the least recently used entry if full."""
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache:
+    """On-disk cache tier storing JSON values in a SQLite table.
+
+    Args:
+        path: Database file path. Created if it does not exist.
+        ttl: Seconds an entry stays valid. ``None`` keeps entries until evicted.
+        max_entries: Once exceeded, the least recently used entries are deleted.
+        table: Table name, so several caches can share one database file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: Optional[float] = None,
+        max_entries: int = 100_000,
+        table: str = "verdicts",
+    ) -> None:
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name '{table}'")
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_accessed_at ON {table} (accessed_at)"
+            )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for ``key`` or ``default``."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return default
+            value, created_at = row
+            if self.ttl is not None and created_at + self.ttl <= now:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return default
+            self._conn.execute(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        """Store ``value`` under ``key`` and evict entries beyond ``max_entries``."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            if self.ttl is not None:
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE created_at <= ?", (now - self.ttl,)
+                )
+            (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN ("
+                    f"SELECT key FROM {self.table} ORDER BY accessed_at ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class VerdictCache:
+    """Two-tier, content-addressed cache for judge verdicts.
+
+    Lookups go to the in-memory LRU first and then to the optional SQLite tier;
+    disk hits are promoted back into memory. Values must be JSON-serializable
+    when a disk tier is configured.
+
+    Args:
+        maxsize: Maximum entries in the in-memory tier.
+        ttl: Seconds a verdict stays valid in both tiers.
+        path: If set, also persist verdicts to this SQLite database.
+        max_disk_entries: Size limit of the SQLite tier.
+
+    Example:
+        ```python
+        cache = VerdictCache(path="verdicts.sqlite", ttl=24 * 3600)
+        verdict = cache.get_or_compute(
+            code, {"judge": "pyright"}, lambda: run_pyright(code)
+        )
+        ```
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+        path: Optional[str] = None,
+        max_disk_entries: int = 100_000,
+    ) -> None:
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.disk = (
+            SQLiteCache(path, ttl=ttl, max_entries=max_disk_entries)
+            if path is not None
+            else None
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the verdict stored under ``key`` or ``default``."""
+        value = self.memory.get(key, _MISSING)
+        if value is _MISSING and self.disk is not None:
+            value = self.disk.get(key, _MISSING)
+            if value is not _MISSING:
+                self.memory.set(key, value)
+                with self._lock:
+                    self.disk_hits += 1
+        with self._lock:
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a verdict in every tier."""
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def get_or_compute(
+        self, content: Any, config: Optional[dict], compute: Callable[[], Any]
+    ) -> Any:
+        """Return the cached verdict for ``content`` or compute and store it.
+
+        Args:
+            content: The judged content.
+            config: The judge configuration (prompt, model, feedback key...).
+            compute: Called on a miss to produce the verdict.
+        """
+        key = cache_key(content, config)
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    async def aget_or_compute(
+        self, content: Any, config: Optional[dict], compute: Callable[[], Any]
+    ) -> Any:
+        """Async variant of :meth:`get_or_compute`; ``compute`` returns an awaitable."""
+        key = cache_key(content, config)
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = await compute()
+            self.set(key, value)
+        return value
+
+    @property
+    def stats(self) -> dict:
+        """Hit/miss counters and the current size of the in-memory tier."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "memory_entries": len(self.memory),
+        }
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers."""
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+_default_cache: Optional[VerdictCache] = VerdictCache()
+
+
+def get_default_verdict_cache() -> Optional[VerdictCache]:
+    """Return the process-wide verdict cache used by the example judges.
+
+    Returns ``None`` if caching was disabled with ``set_default_verdict_cache(None)``.
+    """
+    return _default_cache
+
+
+def set_default_verdict_cache(cache: Optional[VerdictCache]) -> None:
+    """Replace the process-wide verdict cache, e.g. with one backed by SQLite.
+
+    Args:
+        cache: The cache to use, or ``None`` to disable verdict caching.
+    """
+    global _default_cache
+    _default_cache = cache
@@ -0,0 +1,186 @@
+"""Persistent checkpoints and resuming interrupted reflection runs.
+
+A reflection run checkpoints after every ``graph`` and ``reflection`` step when
+it is compiled with a checkpointer. If the process dies mid-run, invoking the
+same thread again with ``resume_reflection`` continues from the last completed
+step, so rounds that were already paid for are not recomputed.
+
+The SQLite checkpointer needs the optional ``langgraph-checkpoint-sqlite``
+package (``pip install "langgraph-reflection[sqlite]"``).
+"""
+
+import sqlite3
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Iterable, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.pregel import Pregel
+
+
+def _require_sqlite_saver() -> Any:
+    try:
+        from langgraph.checkpoint import sqlite
+    except ImportError as e:
+        raise ImportError(
+            "The SQLite checkpointer requires langgraph-checkpoint-sqlite: "
+            'pip install "langgraph-reflection[sqlite]"'
+        ) from e
+    return sqlite
+
+
+def sqlite_checkpointer(path: str) -> Any:
+    """Create a SQLite checkpointer for synchronous runs.
+
+    Example:
+        ```python
+        checkpointer = sqlite_checkpointer("reflection.sqlite")
+        app = create_reflection_graph(assistant_graph, judge_graph).compile(
+            checkpointer=checkpointer
+        )
+        ```
+
+    Args:
+        path: Database file, created if missing.
+
+    Returns:
+        SqliteSaver: A checkpointer that can be shared between threads.
+    """
+    sqlite = _require_sqlite_saver()
+    conn = sqlite3.connect(path, check_same_thread=False)
+    return sqlite.SqliteSaver(conn)
+
+
+@asynccontextmanager
+async def async_sqlite_checkpointer(path: str) -> AsyncIterator[Any]:
+    """Create a SQLite checkpointer for ``ainvoke`` and ``astream`` runs.
+
+    The connection is closed when the context exits:
+
+    ```python
+    async with async_sqlite_checkpointer("reflection.sqlite") as checkpointer:
+        app = create_reflection_graph(assistant_graph, judge_graph).compile(
+            checkpointer=checkpointer
+        )
+        result = await aresume_reflection(app, {"messages": [...]}, config)
+    ```
+
+    Args:
+        path: Database file, created if missing.
+
+    Yields:
+        AsyncSqliteSaver: The checkpointer.
+    """
+    _require_sqlite_saver()
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    async with AsyncSqliteSaver.from_conn_string(path) as checkpointer:
+        yield checkpointer
+
+
+def _thread_config(config: Optional[RunnableConfig]) -> RunnableConfig:
+    if config is None or not config.get("configurable", {}).get("thread_id"):
+        raise ValueError(
+            "Resuming a reflection run needs config['configurable']['thread_id']"
+        )
+    return config
+
+
+def _run_start_step(history: Iterable[Any]) -> Optional[int]:
+    # The run started at the latest checkpoint written for an input
+    for state in history:
+        if (state.metadata or {}).get("source") == "input":
+            return state.metadata.get("step")
+    return None
+
+
+def _remaining_budget(
+    app: Pregel, snapshot: Any, config: RunnableConfig, start: Optional[int]
+) -> RunnableConfig:
+    """Lower the recursion limit by the steps the interrupted run already took."""
+    step = (snapshot.metadata or {}).get("step")
+    # Without a limit of its own the run gets LangGraph's default, which is
+    # large enough that the steps already taken make no difference
+    limit = config.get("recursion_limit") or (app.config or {}).get("recursion_limit")
+    if start is None or step is None or limit is None:
+        return config
+    # A new run stops at ``start + 1 + limit``; a resumed one continues from
+    # ``step + 1`` and stops at ``step + 2 + limit``
+    return {**config, "recursion_limit": max(limit - (step - start) - 1, 1)}
+
+
+def _resume_input(snapshot: Any, input: Any) -> Any:
+    # Nothing checkpointed yet: start the run
+    if not snapshot.values and not snapshot.next:
+        if input is None:
+            raise ValueError("No checkpoint for this thread and no input to start from")
+        return input
+    # Interrupted run: continue from the pending step
+    return None
+
+
+def resume_reflection(
+    app: Pregel,
+    input: Any = None,
+    config: Optional[RunnableConfig] = None,
+    **kwargs: Any,
+) -> dict:
+    """Start a reflection run, or continue it if it was interrupted.
+
+    Use one ``thread_id`` per task. The first call starts the run from
+    ``input``; after a crash or a deploy, calling it again with the same
+    thread continues from the last completed ``graph`` or ``reflection`` step
+    instead of starting over, and a run that already finished returns its
+    final state without running anything. ``input`` is ignored once the thread
+    has a checkpoint.
+
+    Checkpoints are written before each step starts (``durability="sync"``)
+    unless ``durability`` is passed, so that a step that completed is never
+    lost. A ``recursion_limit`` set on the run or the app applies to the run
+    as a whole: a resumed run's limit is lowered by the steps taken before the
+    interruption (counted from the checkpoint history), so crashing and
+    resuming cannot buy extra rounds.
+
+    Args:
+        app: A reflection graph compiled with a checkpointer.
+        input: The initial state, needed only for a new thread.
+        config: Run configuration with ``configurable.thread_id``.
+        **kwargs: Passed to ``app.invoke``.
+
+    Returns:
+        dict: The final state of the run.
+
+    Raises:
+        ValueError: If there is no thread id, or the thread has no checkpoint
+            and no input was given.
+    """
+    config = _thread_config(config)
+    snapshot = app.get_state(config)
+    if snapshot.values and not snapshot.next:
+        return snapshot.values
+    if snapshot.next:
+        start = _run_start_step(app.get_state_history(config))
+        config = _remaining_budget(app, snapshot, config, start)
+    kwargs.setdefault("durability", "sync")
+    return app.invoke(_resume_input(snapshot, input), config, **kwargs)
+
+
+async def aresume_reflection(
+    app: Pregel,
+    input: Any = None,
+    config: Optional[RunnableConfig] = None,
+    **kwargs: Any,
+) -> dict:
+    """Async version of ``resume_reflection``."""
+    config = _thread_config(config)
+    snapshot = await app.aget_state(config)
+    if snapshot.values and not snapshot.next:
+        return snapshot.values
+    if snapshot.next:
+        start = None
+        async for state in app.aget_state_history(config):
+            start = _run_start_step([state])
+            if start is not None:
+                break
+        config = _remaining_budget(app, snapshot, config, start)
+    kwargs.setdefault("durability", "sync")
+    return await app.ainvoke(_resume_input(snapshot, input), config, **kwargs)
@@ -0,0 +1,109 @@
+"""Process-wide registry of chat-model clients and evaluators.
+
+Nodes that call ``init_chat_model(...)`` or ``create_llm_as_judge(...)`` on every
+invocation rebuild the client, its HTTP connection pool and any bound tools each
+round, and throw away keep-alive connections. The registry below creates each
+client once per distinct configuration and hands the same instance to every
+caller, so steady-state rounds reuse warm connections.
+"""
+
+import threading
+from typing import Any, Callable, Optional
+
+from langgraph_reflection.ratelimit import is_scheduled
+
+
+_registry: dict[Any, Any] = {}
+_lock = threading.Lock()
+
+
+def _freeze(value: Any) -> Any:
+    """Turn ``value`` into something hashable for use in a registry key."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, set):
+        return frozenset(_freeze(v) for v in value)
+    try:
+        hash(value)
+    except TypeError:
+        return ("__id__", id(value))
+    return value
+
+
+def _get_or_create(key: Any, create: Callable[[], Any]) -> Any:
+    instance = _registry.get(key)
+    if instance is None:
+        with _lock:
+            instance = _registry.get(key)
+            if instance is None:
+                instance = create()
+                _registry[key] = instance
+    return instance
+
+
+def get_chat_model(
+    model: str,
+    *,
+    model_provider: Optional[str] = None,
+    **kwargs: Any,
+) -> Any:
+    """Return a shared chat model for this model, provider and parameters.
+
+    The first call creates the model with ``init_chat_model``; later calls with
+    the same arguments return the same instance (and therefore the same SDK
+    client and HTTP connection pool). Safe to call from multiple threads.
+
+    If the provider has a rate-limit scheduler (see ``configure_rate_limits``),
+    the client is built with ``max_retries=0`` unless given: the scheduler
+    retries throttled calls itself, and SDK retries underneath would multiply
+    the calls and hide the throttling it adapts to.
+
+    Args:
+        model: Model name or deployment, as accepted by ``init_chat_model``.
+        model_provider: Provider, e.g. ``"azure_openai"``.
+        **kwargs: Extra parameters passed to ``init_chat_model``, e.g.
+            ``temperature``. They are part of the registry key.
+
+    Returns:
+        BaseChatModel: The shared model instance.
+    """
+    provider = model_provider or (model.split(":", 1)[0] if ":" in model else None)
+    if "max_retries" not in kwargs and is_scheduled(provider):
+        kwargs["max_retries"] = 0
+    key = ("chat_model", model, model_provider, _freeze(kwargs))
+
+    def create() -> Any:
+        from langchain.chat_models import init_chat_model
+
+        return init_chat_model(model=model, model_provider=model_provider, **kwargs)
+
+    return _get_or_create(key, create)
+
+
+def get_evaluator(factory: Callable[..., Any], **kwargs: Any) -> Any:
+    """Return a shared evaluator built by ``factory(**kwargs)``.
+
+    Example:
+        ```python
+        evaluator = get_evaluator(
+            create_llm_as_judge, prompt=CRITIQUE_PROMPT, model="openai:o3-mini", feedback_key="pass"
+        )
+        ```
+
+    Args:
+        factory: The evaluator factory, e.g. ``create_llm_as_judge``.
+        **kwargs: Arguments passed to the factory. They are part of the registry key.
+
+    Returns:
+        Any: The shared evaluator.
+    """
+    key = ("evaluator", factory, _freeze(kwargs))
+    return _get_or_create(key, lambda: factory(**kwargs))
+
+
+def clear_client_registry() -> None:
+    """Forget every registered client, e.g. after rotating credentials."""
+    with _lock:
+        _registry.clear()
@@ -0,0 +1,167 @@
+"""Keeping the prompt size of reflection rounds roughly constant.
+
+Each round appends a draft and a critique, and the assistant (and any judge
+that reads the conversation) is sent the whole history again. A compaction
+policy rewrites the history before the assistant is called, so that
+superseded drafts stop costing tokens, and once more when the loop ends, so
+that the final state does not keep an extra draft.
+"""
+
+from typing import Any, Callable, Literal, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, RemoveMessage
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+from langgraph_reflection.critics import Critic, _as_runnable, _new_messages, arun_critic, run_critic
+
+
+CompactionPolicy = Callable[[Sequence[BaseMessage]], Sequence[BaseMessage]]
+
+SUPERSEDED_DRAFT_PREFIX = "[Earlier draft omitted"
+
+
+def _is_stub(message: BaseMessage) -> bool:
+    return isinstance(message.content, str) and message.content.startswith(
+        SUPERSEDED_DRAFT_PREFIX
+    )
+
+
+def compact_messages(
+    messages: Sequence[BaseMessage],
+    *,
+    keep_rounds: int = 1,
+    mode: Literal["summarize", "drop"] = "summarize",
+) -> list[BaseMessage]:
+    """Shrink superseded drafts while keeping the task and the latest rounds.
+
+    Everything before the first AI message is treated as the original task and
+    kept as is. The rest is split into rounds, each ending with a critique
+    (a ``HumanMessage``). Critiques are always kept; in all but the last
+    ``keep_rounds`` rounds the draft is either replaced by a short placeholder
+    (``"summarize"``) or removed (``"drop"``), together with any tool messages
+    that led up to it.
+
+    Args:
+        messages: The conversation so far.
+        keep_rounds: Number of most recent rounds to keep verbatim.
+        mode: ``"summarize"`` or ``"drop"`` superseded drafts.
+
+    Returns:
+        list[BaseMessage]: The compacted conversation. Messages keep their ids,
+            so placeholders replace the drafts they stand for.
+    """
+    first_ai = next((i for i, m in enumerate(messages) if isinstance(m, AIMessage)), None)
+    if first_ai is None:
+        return list(messages)
+
+    rounds: list[list[BaseMessage]] = [[]]
+    for message in messages[first_ai:]:
+        rounds[-1].append(message)
+        if isinstance(message, HumanMessage):
+            rounds.append([])
+    if not rounds[-1]:
+        rounds.pop()
+
+    compacted = list(messages[:first_ai])
+    superseded = rounds[: max(len(rounds) - keep_rounds, 0)]
+    for round_messages in superseded:
+        critiques = [m for m in round_messages if isinstance(m, HumanMessage)]
+        drafts = [m for m in round_messages if not isinstance(m, HumanMessage)]
+        if mode == "summarize" and drafts:
+            draft = drafts[-1]
+            if not _is_stub(draft):
+                size = len(str(draft.content))
+                draft = AIMessage(
+                    content=f"{SUPERSEDED_DRAFT_PREFIX} ({size} chars); "
+                    "it was revised in a later round.]",
+                    id=draft.id,
+                )
+            compacted.append(draft)
+        compacted.extend(critiques)
+    for round_messages in rounds[len(superseded) :]:
+        compacted.extend(round_messages)
+    return compacted
+
+
+def _compaction_update(
+    messages: Sequence[BaseMessage], compacted: Sequence[BaseMessage]
+) -> list[BaseMessage]:
+    """Express a compacted history as ``add_messages`` updates."""
+    kept = {m.id: m for m in compacted if m.id is not None}
+    update: list[BaseMessage] = []
+    for message in messages:
+        if message.id is None:
+            continue
+        replacement = kept.get(message.id)
+        if replacement is None:
+            update.append(RemoveMessage(id=message.id))
+        elif replacement is not message and replacement.content != message.content:
+            update.append(replacement)
+    return update
+
+
+def with_compaction(graph: Critic, policy: Optional[CompactionPolicy] = None) -> Runnable:
+    """Wrap the main agent so that it only sees a compacted history.
+
+    The compaction is also written back to the state, so later steps (and the
+    reflection step) see the compacted history as well.
+
+    Args:
+        graph: The main agent.
+        policy: Rewrites the message list. Defaults to ``compact_messages``.
+
+    Returns:
+        Runnable: The wrapped node.
+    """
+    policy = policy or compact_messages
+
+    def prepare(state: dict) -> tuple[dict, list[BaseMessage]]:
+        compacted = list(policy(state["messages"]))
+        return {**state, "messages": compacted}, _compaction_update(state["messages"], compacted)
+
+    def call(state: dict, config: RunnableConfig) -> dict:
+        compacted_state, update = prepare(state)
+        return {"messages": update + run_critic(graph, compacted_state, config)}
+
+    async def acall(state: dict, config: RunnableConfig) -> dict:
+        compacted_state, update = prepare(state)
+        return {"messages": update + await arun_critic(graph, compacted_state, config)}
+
+    return RunnableLambda(call, afunc=acall, name="graph")
+
+
+def with_final_compaction(reflection: Critic, policy: Optional[CompactionPolicy] = None) -> Runnable:
+    """Wrap the reflection step so that the history is compacted when the loop ends.
+
+    ``with_compaction`` only runs before the main agent, so without this the
+    final state would hold the last draft on top of the ones the policy keeps.
+
+    Args:
+        reflection: The reflection step.
+        policy: Rewrites the message list. Defaults to ``compact_messages``.
+
+    Returns:
+        Runnable: The wrapped node.
+    """
+    policy = policy or compact_messages
+    runnable = _as_runnable(reflection)
+
+    def finish(state: dict, output: Any) -> Any:
+        new_messages = _new_messages(reflection, state, output)
+        reason = output.get("termination_reason") if isinstance(output, dict) else None
+        critiqued = bool(new_messages) and isinstance(new_messages[-1], HumanMessage)
+        # Mirrors end_or_reflect: the loop goes on after a critique unless it
+        # is out of steps or was stopped
+        if critiqued and state.get("remaining_steps", 3) > 2 and not reason:
+            return output
+        compacted = list(policy(list(state["messages"]) + new_messages))
+        update = _compaction_update(state["messages"], compacted)
+        return {**(output if isinstance(output, dict) else {}), "messages": update + new_messages}
+
+    def reflect(state: dict, config: RunnableConfig) -> Any:
+        return finish(state, runnable.invoke(state, config))
+
+    async def areflect(state: dict, config: RunnableConfig) -> Any:
+        return finish(state, await runnable.ainvoke(state, config))
+
+    return RunnableLambda(reflect, afunc=areflect, name="reflection")
@@ -0,0 +1,166 @@
+"""Detecting reflection loops that have stopped making progress.
+
+A loop where the assistant keeps producing the same draft, or the critic keeps
+issuing the same critique, would otherwise run until ``remaining_steps`` is
+exhausted. The reflection step is wrapped so that every round records a
+fingerprint of the draft and of the critique; a repeat of the previous round
+or of an older one (an oscillation) stops the loop, or escalates once.
+"""
+
+import hashlib
+import re
+import uuid
+from typing import Literal, Optional
+
+from typing_extensions import TypedDict
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+from langgraph_reflection.critics import Critic, arun_critic, run_critic
+
+
+ESCALATION_PROMPT = (
+    "You seem to be going in circles: this {what} has already come up in an earlier "
+    "round. Step back and take a substantially different approach instead of "
+    "repeating a previous answer."
+)
+
+
+class ConvergenceState(TypedDict, total=False):
+    """Keys added to the reflection state when convergence detection is enabled.
+
+    Attributes:
+        convergence: Fingerprints of the drafts and critiques seen in the current
+            run, the id of the last critique and how often the loop escalated.
+        termination_reason: Why the loop stopped: ``"accepted"``,
+            ``"max_steps"``, ``"repeated_draft"``, ``"repeated_critique"`` or
+            ``"oscillation"``. ``None`` while the loop is still running.
+    """
+
+    convergence: dict
+    termination_reason: Optional[str]
+
+
+def fingerprint(message: BaseMessage) -> str:
+    """Hash a message's text with whitespace normalised."""
+    content = message.content
+    if not isinstance(content, str):
+        content = "".join(
+            block if isinstance(block, str) else str(block.get("text", ""))
+            for block in content
+        )
+    normalised = re.sub(r"\s+", " ", content).strip()
+    return hashlib.sha256(normalised.encode("utf-8")).hexdigest()[:16]
+
+
+def _latest_draft(messages: list[BaseMessage]) -> tuple[Optional[AIMessage], Optional[str]]:
+    """Return the latest AI draft and the id of the user message that prompted it."""
+    draft = None
+    for message in reversed(messages):
+        if draft is None and isinstance(message, AIMessage):
+            draft = message
+        elif draft is not None and isinstance(message, HumanMessage):
+            return draft, message.id
+    return draft, None
+
+
+def _repeat(fingerprints: list[str], value: str, kind: str) -> Optional[str]:
+    if not fingerprints or value not in fingerprints:
+        return None
+    return f"repeated_{kind}" if fingerprints[-1] == value else "oscillation"
+
+
+def _update(
+    state: dict,
+    new_messages: list[BaseMessage],
+    on_convergence: Literal["end", "escalate"],
+) -> dict:
+    messages = list(state["messages"])
+    draft, prompt_id = _latest_draft(messages)
+    history = state.get("convergence") or {}
+    if prompt_id is None or prompt_id != history.get("last_critique_id"):
+        # The draft answers a fresh user message, not our last critique:
+        # this is a new run on the thread, so start from a clean history.
+        history = {}
+    drafts = list(history.get("drafts", []))
+    critiques = list(history.get("critiques", []))
+    escalations = history.get("escalations", 0)
+
+    critique = new_messages[-1] if new_messages and isinstance(new_messages[-1], HumanMessage) else None
+    if critique is None:
+        return {
+            "messages": new_messages,
+            "convergence": {"drafts": drafts, "critiques": critiques, "escalations": escalations},
+            "termination_reason": "accepted",
+        }
+
+    reason = None
+    if draft is not None:
+        draft_fp = fingerprint(draft)
+        reason = _repeat(drafts, draft_fp, "draft")
+        drafts.append(draft_fp)
+    critique_fp = fingerprint(critique)
+    reason = reason or _repeat(critiques, critique_fp, "critique")
+    critiques.append(critique_fp)
+
+    if reason is not None and on_convergence == "escalate" and escalations == 0:
+        what = "critique" if reason == "repeated_critique" else "draft"
+        critique = HumanMessage(
+            content=f"{critique.content}\n\n{ESCALATION_PROMPT.format(what=what)}",
+            id=critique.id,
+        )
+        new_messages = [*new_messages[:-1], critique]
+        escalations += 1
+        reason = None
+
+    if critique.id is None:
+        # Needed to recognise this critique as the prompt of the next draft
+        critique = critique.model_copy(update={"id": str(uuid.uuid4())})
+        new_messages = [*new_messages[:-1], critique]
+
+    if reason is None and state.get("remaining_steps", 3) <= 2:
+        # Mirrors end_or_reflect: not enough steps left for another round
+        reason = "max_steps"
+
+    return {
+        "messages": new_messages,
+        "convergence": {
+            "drafts": drafts,
+            "critiques": critiques,
+            "last_critique_id": critique.id,
+            "escalations": escalations,
+        },
+        "termination_reason": reason,
+    }
+
+
+def with_convergence_detection(
+    reflection: Critic,
+    on_convergence: Literal["end", "escalate"] = "end",
+) -> Runnable:
+    """Wrap a reflection step so that it stops loops that are not converging.
+
+    After the critic runs, the draft and critique of this round are
+    fingerprinted and compared with earlier rounds of the same run. A draft or
+    critique identical to the previous round's, or to an older one, sets
+    ``termination_reason`` so that the loop ends.
+
+    Args:
+        reflection: The reflection step to wrap.
+        on_convergence: ``"end"`` stops the loop immediately. ``"escalate"``
+            first appends a request to try a different approach to the critique
+            and only stops if the loop repeats itself again.
+
+    Returns:
+        Runnable: The wrapped reflection node. Its state must include the keys
+            of :class:`ConvergenceState`.
+    """
+
+    def reflect(state: dict, config: RunnableConfig) -> dict:
+        return _update(state, run_critic(reflection, state, config), on_convergence)
+
+    async def areflect(state: dict, config: RunnableConfig) -> dict:
+        return _update(state, await arun_critic(reflection, state, config), on_convergence)
+
+    return RunnableLambda(reflect, afunc=areflect, name="reflection")
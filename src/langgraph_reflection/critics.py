@@ -0,0 +1,242 @@
+"""Ways of combining several critics into one reflection step."""
+
+import asyncio
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Optional, Sequence, Type, Union
+
+from langchain_core.messages import BaseMessage, HumanMessage, convert_to_messages
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langgraph.graph import END, START, MessagesState, StateGraph
+from langgraph.graph.state import CompiledStateGraph
+from langgraph.pregel import Pregel
+
+
+# A critic is anything that can be added as a node: usually a compiled subgraph,
+# but a plain function taking the state works too (e.g. a cheap syntax check),
+# and so does any other runnable, such as the wrappers in this package.
+Critic = Union[CompiledStateGraph, Runnable, Callable[..., Any]]
+
+# Tag for critics that run inside the ``graph`` node (see ``speculative``), so
+# that their model output is not mistaken for draft tokens when streaming
+CRITIC_TAG = "reflection:critic"
+
+# ``response_metadata`` key that marks the critiques of the reflection step, to
+# tell them apart from messages the user sent. Response metadata is never sent
+# back to the model.
+CRITIQUE_METADATA_KEY = "reflection_critique"
+
+
+def critique_issued(state: dict) -> bool:
+    """Whether the last critic returned a critique (a trailing ``HumanMessage``)."""
+    return len(state["messages"]) > 0 and isinstance(state["messages"][-1], HumanMessage)
+
+
+def is_critique(message: BaseMessage) -> bool:
+    """Whether ``message`` is a critique marked by :func:`with_critique_marker`."""
+    return isinstance(message, HumanMessage) and bool(
+        message.response_metadata.get(CRITIQUE_METADATA_KEY)
+    )
+
+
+def with_critique_marker(reflection: Critic) -> Runnable:
+    """Wrap the reflection step so that the critique it returns is marked.
+
+    ``create_reflection_graph`` applies this to every reflection step, so that
+    a thread's messages show which user messages were critiques and where a new
+    run started (see :func:`is_critique`). A compiled subgraph's full state is
+    turned into an update holding only the messages it added.
+    """
+    runnable = _as_runnable(reflection)
+
+    def mark(state: dict, output: Any) -> Any:
+        messages = _new_messages(reflection, state, output)
+        if isinstance(reflection, Pregel):
+            # Return an update like node functions do: the wrappers outside
+            # this one can no longer tell that the critic was a subgraph
+            output = {**output, "messages": messages} if output else output
+        critique = _critique(messages)
+        if critique is None or is_critique(critique):
+            return output
+        metadata = {**critique.response_metadata, CRITIQUE_METADATA_KEY: True}
+        messages[-1] = critique.model_copy(update={"response_metadata": metadata})
+        return {**output, "messages": messages}
+
+    def reflect(state: dict, config: RunnableConfig) -> Any:
+        return mark(state, runnable.invoke(state, config))
+
+    async def areflect(state: dict, config: RunnableConfig) -> Any:
+        return mark(state, await runnable.ainvoke(state, config))
+
+    return RunnableLambda(reflect, afunc=areflect, name="reflection")
+
+
+def create_critic_cascade(
+    critics: Sequence[Critic],
+    state_schema: Type[Any] = MessagesState,
+) -> CompiledStateGraph:
+    """Chain critics so that they run in order and stop at the first critique.
+
+    Critics should be ordered from cheapest to most expensive, e.g. a syntax
+    check, then a type checker, then an LLM judge. As soon as one of them
+    returns a ``HumanMessage`` the remaining critics are skipped, so expensive
+    critics only see drafts that already passed the cheap ones.
+
+    Args:
+        critics: The critics, cheapest first.
+        state_schema: State schema shared by the critics.
+
+    Returns:
+        CompiledStateGraph: A graph that can be used as the ``reflection`` step.
+    """
+    if len(critics) == 0:
+        raise ValueError("At least one critic is required")
+
+    names = [f"critic_{i}" for i in range(len(critics))]
+    cascade = StateGraph(state_schema)
+    for name, critic in zip(names, critics):
+        cascade.add_node(name, critic)
+    cascade.add_edge(START, names[0])
+    for name, next_name in zip(names, names[1:]):
+        cascade.add_conditional_edges(
+            name,
+            lambda state, next_name=next_name: END if critique_issued(state) else next_name,
+            [next_name, END],
+        )
+    cascade.add_edge(names[-1], END)
+    return cascade.compile()
+
+
+def _as_runnable(critic: Critic) -> Runnable:
+    return critic if isinstance(critic, Runnable) else RunnableLambda(critic)
+
+
+def _new_messages(critic: Critic, state: dict, output: Any) -> list[BaseMessage]:
+    """Return the messages a critic added on top of ``state``."""
+    if not output:
+        return []
+    messages = output.get("messages", [])
+    if isinstance(critic, Pregel):
+        # Subgraphs return their full state, not just the update
+        return list(messages[len(state["messages"]) :])
+    if not isinstance(messages, list):
+        messages = [messages]
+    return convert_to_messages(messages)
+
+
+def run_critic(critic: Critic, state: dict, config: Optional[RunnableConfig] = None) -> list[BaseMessage]:
+    """Run a single critic and return only the messages it added.
+
+    Compiled subgraphs return their whole state while node functions return an
+    update; both are normalised to the list of new messages.
+    """
+    return _new_messages(critic, state, _as_runnable(critic).invoke(state, config))
+
+
+async def arun_critic(
+    critic: Critic, state: dict, config: Optional[RunnableConfig] = None
+) -> list[BaseMessage]:
+    """Async variant of :func:`run_critic`."""
+    return _new_messages(critic, state, await _as_runnable(critic).ainvoke(state, config))
+
+
+def _critique(messages: list[BaseMessage]) -> Optional[HumanMessage]:
+    if messages and isinstance(messages[-1], HumanMessage):
+        return messages[-1]
+    return None
+
+
+def _merge_critiques(critiques: list[HumanMessage]) -> Optional[dict]:
+    if not critiques:
+        return None
+    if len(critiques) == 1:
+        return {"messages": critiques}
+    content = "\n\n".join(str(critique.content) for critique in critiques)
+    # Keep what critics attached to their critique (e.g. the code a patch-mode
+    # critique refers to); for a key set by several critics, the last one wins
+    additional_kwargs: dict = {}
+    response_metadata: dict = {}
+    for critique in critiques:
+        additional_kwargs.update((k, v) for k, v in critique.additional_kwargs.items() if v is not None)
+        response_metadata.update(critique.response_metadata)
+    return {
+        "messages": [
+            HumanMessage(
+                content=content,
+                additional_kwargs=additional_kwargs,
+                response_metadata=response_metadata,
+            )
+        ]
+    }
+
+
+def create_parallel_critics(
+    critics: Sequence[Critic],
+    fail_fast: bool = False,
+) -> Runnable:
+    """Run independent critics concurrently on the same draft.
+
+    Every critic sees the same state. Their critiques are merged into a single
+    user message, so the reflection step takes as long as the slowest critic
+    rather than the sum of all of them. The returned node has both a sync
+    (thread pool) and an async (asyncio tasks) implementation.
+
+    Args:
+        critics: Critics that do not depend on each other's results.
+        fail_fast: Return as soon as any critic issues a critique, cancelling
+            the critics that are still running.
+
+    Returns:
+        Runnable: A node that can be used as the ``reflection`` step.
+    """
+    if len(critics) == 0:
+        raise ValueError("At least one critic is required")
+
+    def run_parallel(state: dict, config: RunnableConfig) -> Optional[dict]:
+        critiques: dict[int, HumanMessage] = {}
+        executor = ThreadPoolExecutor(max_workers=len(critics))
+        try:
+            futures = {
+                executor.submit(
+                    contextvars.copy_context().run, run_critic, critic, state, config
+                ): i
+                for i, critic in enumerate(critics)
+            }
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = futures[future]
+                    critique = _critique(future.result())
+                    if critique is not None:
+                        critiques[i] = critique
+                if fail_fast and critiques:
+                    break
+        finally:
+            # Don't wait for critics whose verdict is no longer needed
+            executor.shutdown(wait=not fail_fast, cancel_futures=True)
+        return _merge_critiques([critiques[i] for i in sorted(critiques)])
+
+    async def arun_parallel(state: dict, config: RunnableConfig) -> Optional[dict]:
+        critiques: dict[int, HumanMessage] = {}
+        tasks = {
+            asyncio.ensure_future(arun_critic(critic, state, config)): i
+            for i, critic in enumerate(critics)
+        }
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    i = tasks[task]
+                    critique = _critique(task.result())
+                    if critique is not None:
+                        critiques[i] = critique
+                if fail_fast and critiques:
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+        return _merge_critiques([critiques[i] for i in sorted(critiques)])
+
+    return RunnableLambda(run_parallel, afunc=arun_parallel, name="parallel_critics")
@@ -0,0 +1,120 @@
+"""Choosing the assistant's model by how many critiques a draft has drawn.
+
+Most requests pass the critics on the first try, and for those a small, fast
+model is enough. A model ladder lists models from cheapest to most capable; the
+assistant starts on the first rung and moves up one rung each time the critics
+reject a draft (or every ``escalate_after`` rejections), so only hard cases pay
+for the large model.
+
+The ladder is read from ``config["configurable"]["model_ladder"]``, which can be
+declared with ``config_schema=ModelLadderConfig`` on ``create_reflection_graph``.
+"""
+
+from typing import Any, Optional, Sequence, Union
+
+from typing_extensions import TypedDict
+
+from langchain_core.messages import BaseMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+
+from langgraph_reflection.clients import get_chat_model
+from langgraph_reflection.critics import is_critique
+from langgraph_reflection.metrics import record_metric
+
+
+# A rung is a model name (``"provider:model"`` works too) or the keyword
+# arguments of ``get_chat_model``, e.g. ``{"model": "gpt-4o", "model_provider": "azure_openai"}``
+ModelTier = Union[str, dict]
+
+
+class ModelLadderConfig(TypedDict, total=False):
+    """Configurable keys of the model ladder.
+
+    Attributes:
+        model_ladder: Models from cheapest to most capable.
+        escalate_after: Critiques needed to move up one rung. Defaults to 1.
+    """
+
+    model_ladder: list[ModelTier]
+    escalate_after: int
+
+
+def critique_count(messages: Sequence[BaseMessage]) -> int:
+    """Number of critiques in the current run.
+
+    Only critiques after the last message the user sent count, so each new
+    question on a checkpointed thread starts again on the first rung.
+    Critiques are recognised by the marker the reflection step of
+    ``create_reflection_graph`` sets (see ``is_critique``).
+    """
+    count = 0
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            if not is_critique(message):
+                break
+            count += 1
+    return count
+
+
+def _tier_kwargs(tier: ModelTier) -> dict:
+    return {"model": tier} if isinstance(tier, str) else dict(tier)
+
+
+def select_model_tier(
+    ladder: Sequence[ModelTier],
+    messages: Sequence[BaseMessage],
+    escalate_after: int = 1,
+) -> tuple[int, dict]:
+    """Pick the rung of ``ladder`` for the next draft.
+
+    Args:
+        ladder: Models from cheapest to most capable.
+        messages: The conversation so far.
+        escalate_after: Critiques needed to move up one rung.
+
+    Returns:
+        tuple[int, dict]: The rung's index and its ``get_chat_model`` arguments.
+            The last rung is used once the ladder is exhausted.
+    """
+    if not ladder:
+        raise ValueError("The model ladder needs at least one model")
+    index = min(critique_count(messages) // max(escalate_after, 1), len(ladder) - 1)
+    return index, _tier_kwargs(ladder[index])
+
+
+def get_ladder_model(
+    config: Optional[RunnableConfig],
+    messages: Sequence[BaseMessage],
+    default_ladder: Sequence[ModelTier],
+    **kwargs: Any,
+) -> tuple[Any, dict]:
+    """Return the shared chat model for the next draft.
+
+    The ladder comes from ``configurable["model_ladder"]`` if set, otherwise
+    ``default_ladder``. The chosen model is recorded as the ``model`` metric.
+
+    Example:
+        ```python
+        def call_model(state, config):
+            model, tier = get_ladder_model(
+                config, state["messages"], ["claude-3-5-haiku-latest", "claude-3-7-sonnet-latest"]
+            )
+            return {"messages": model.invoke(state["messages"])}
+        ```
+
+    Args:
+        config: The node's run configuration.
+        messages: The conversation so far.
+        default_ladder: The ladder when none is configured.
+        **kwargs: Extra ``get_chat_model`` arguments, e.g. a per-draft
+            ``temperature``; a rung's own arguments take precedence.
+
+    Returns:
+        tuple[Any, dict]: The chat model and the rung's arguments.
+    """
+    configurable = (config or {}).get("configurable", {})
+    ladder = configurable.get("model_ladder") or default_ladder
+    index, tier = select_model_tier(ladder, messages, configurable.get("escalate_after", 1))
+    tier = {**kwargs, **tier}
+    record_metric("model", tier["model"])
+    return get_chat_model(**tier), tier
@@ -0,0 +1,369 @@
+"""Per-round instrumentation of the reflection loop.
+
+When metrics are enabled, the ``graph`` and ``reflection`` nodes are wrapped so
+that every round records how long the main agent and the critics took, how many
+tokens they used and whether the draft passed. Critics can attach their own
+measurements to the current round with :func:`record_metric` (e.g. which
+extraction path was taken or how long a type checker ran).
+
+Finished rounds are handed to exporters, and a summary of the run is kept in the
+``reflection_metrics`` state key.
+"""
+
+import contextvars
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+from typing import Any, Iterator, Optional, Protocol, Sequence, runtime_checkable
+
+from typing_extensions import TypedDict
+
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langchain_core.runnables.config import merge_configs
+
+from langgraph_reflection.critics import Critic, _as_runnable
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+@dataclass
+class RoundMetrics:
+    """Measurements of one ``graph`` → ``reflection`` round.
+
+    Attributes:
+        round: The round number, starting at 1.
+        assistant_latency: Seconds spent in the ``graph`` node.
+        critic_latency: Seconds spent in the ``reflection`` node.
+        input_tokens: Prompt tokens used by chat models in both nodes.
+        output_tokens: Completion tokens used by chat models in both nodes.
+        outcome: ``"critique"`` or ``"accepted"`` once the round is judged.
+        values: Measurements recorded with :func:`record_metric`.
+    """
+
+    round: int
+    assistant_latency: float = 0.0
+    critic_latency: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    outcome: Optional[str] = None
+    values: dict[str, Any] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record(self, name: str, value: Any) -> None:
+        with self._lock:
+            previous = self.values.get(name)
+            if _is_number(value) and _is_number(previous):
+                self.values[name] = previous + value
+            else:
+                self.values[name] = value
+
+    def _add_usage(self, handler: UsageMetadataCallbackHandler) -> None:
+        for usage in handler.usage_metadata.values():
+            self.input_tokens += usage.get("input_tokens", 0)
+            self.output_tokens += usage.get("output_tokens", 0)
+
+    def as_dict(self) -> dict:
+        return {
+            f.name: dict(self.values) if f.name == "values" else getattr(self, f.name)
+            for f in fields(self)
+            if not f.name.startswith("_")
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RoundMetrics":
+        return cls(**{**data, "values": dict(data.get("values", {}))})
+
+
+@runtime_checkable
+class MetricsExporter(Protocol):
+    """Receives every round once it has been judged."""
+
+    def export_round(self, metrics: RoundMetrics) -> None: ...
+
+
+_current_round: contextvars.ContextVar[Optional[RoundMetrics]] = contextvars.ContextVar(
+    "reflection_round", default=None
+)
+
+
+def record_metric(name: str, value: Any) -> None:
+    """Attach a measurement to the round that is currently running.
+
+    Numbers recorded under the same name within a round are added up (so
+    durations and counts accumulate); other values, including booleans,
+    replace the previous one.
+    Does nothing outside a reflection graph with metrics enabled.
+
+    Args:
+        name: The measurement, e.g. ``"pyright_seconds"``.
+        value: A number, or a label such as ``"local"``.
+    """
+    metrics = _current_round.get()
+    if metrics is not None:
+        metrics.record(name, value)
+
+
+@contextmanager
+def timed_metric(name: str) -> Iterator[None]:
+    """Record the seconds spent in the ``with`` block under ``name``.
+
+    Example:
+        ```python
+        with timed_metric("pyright_seconds"):
+            result = run_pyright(code)
+        ```
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_metric(name, time.perf_counter() - start)
+
+
+class PrometheusTextExporter:
+    """Aggregate rounds into metrics in the Prometheus text exposition format.
+
+    Exposes round outcomes, latencies (as summaries), token counts and the
+    measurements recorded with :func:`record_metric`: numbers are summed into
+    ``reflection_value_total{name=...}``, labels are counted in
+    ``reflection_label_total{name=...,value=...}``.
+
+    Example:
+        ```python
+        exporter = PrometheusTextExporter(path="/var/lib/node_exporter/reflection.prom")
+        app = create_reflection_graph(assistant_graph, judge_graph, metrics=[exporter]).compile()
+        ```
+
+    Args:
+        path: If given, the metrics are rewritten to this file after every
+            round, e.g. for the node exporter's textfile collector.
+        prefix: Prefix of every metric name.
+    """
+
+    def __init__(self, path: Optional[str] = None, prefix: str = "reflection"):
+        self.path = path
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._rounds: dict[str, int] = {}
+        self._latency: dict[str, list[float]] = {"assistant": [0.0, 0], "critic": [0.0, 0]}
+        self._tokens = {"input": 0, "output": 0}
+        self._values: dict[str, float] = {}
+        self._labels: dict[tuple[str, str], int] = {}
+
+    def export_round(self, metrics: RoundMetrics) -> None:
+        with self._lock:
+            outcome = metrics.outcome or "unknown"
+            self._rounds[outcome] = self._rounds.get(outcome, 0) + 1
+            for phase, latency in (
+                ("assistant", metrics.assistant_latency),
+                ("critic", metrics.critic_latency),
+            ):
+                self._latency[phase][0] += latency
+                self._latency[phase][1] += 1
+            self._tokens["input"] += metrics.input_tokens
+            self._tokens["output"] += metrics.output_tokens
+            for name, value in metrics.values.items():
+                if not _is_number(value):
+                    key = (name, str(value))
+                    self._labels[key] = self._labels.get(key, 0) + 1
+                else:
+                    self._values[name] = self._values.get(name, 0.0) + value
+        if self.path is not None:
+            self.write(self.path)
+
+    def render(self) -> str:
+        """Return the current metrics as Prometheus text."""
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_rounds_total Reflection rounds by outcome.",
+            f"# TYPE {p}_rounds_total counter",
+        ]
+        with self._lock:
+            for outcome, count in sorted(self._rounds.items()):
+                lines.append(f'{p}_rounds_total{{outcome="{outcome}"}} {count}')
+            for phase, (seconds, calls) in self._latency.items():
+                lines += [
+                    f"# HELP {p}_{phase}_seconds Time spent in the {phase} step per round.",
+                    f"# TYPE {p}_{phase}_seconds summary",
+                    f"{p}_{phase}_seconds_sum {float(seconds)}",
+                    f"{p}_{phase}_seconds_count {int(calls)}",
+                ]
+            lines += [
+                f"# HELP {p}_tokens_total Chat model tokens used.",
+                f"# TYPE {p}_tokens_total counter",
+            ]
+            for direction, count in self._tokens.items():
+                lines.append(f'{p}_tokens_total{{direction="{direction}"}} {count}')
+            if self._values:
+                lines += [
+                    f"# HELP {p}_value_total Sum of numeric measurements recorded by critics.",
+                    f"# TYPE {p}_value_total counter",
+                ]
+                for name, total in sorted(self._values.items()):
+                    lines.append(f'{p}_value_total{{name="{_escape(name)}"}} {total}')
+            if self._labels:
+                lines += [
+                    f"# HELP {p}_label_total Rounds per recorded label value.",
+                    f"# TYPE {p}_label_total counter",
+                ]
+                for (name, value), count in sorted(self._labels.items()):
+                    lines.append(
+                        f'{p}_label_total{{name="{_escape(name)}",value="{_escape(value)}"}} {count}'
+                    )
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Atomically write the current metrics to ``path``."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsState(TypedDict, total=False):
+    """Keys added to the reflection state when metrics are enabled.
+
+    Attributes:
+        reflection_metrics: ``{"rounds": [...], "totals": {...}}`` for the
+            current run, see :func:`summarize_rounds`.
+    """
+
+    reflection_metrics: dict
+
+
+def summarize_rounds(rounds: Sequence[dict]) -> dict:
+    """Add up the per-round measurements of a run."""
+    return {
+        "rounds": len(rounds),
+        "assistant_latency": sum(r["assistant_latency"] for r in rounds),
+        "critic_latency": sum(r["critic_latency"] for r in rounds),
+        "input_tokens": sum(r["input_tokens"] for r in rounds),
+        "output_tokens": sum(r["output_tokens"] for r in rounds),
+        "outcome": rounds[-1]["outcome"] if rounds else None,
+    }
+
+
+def _critique_issued(output: Any) -> bool:
+    if not isinstance(output, dict):
+        return False
+    messages = output.get("messages") or []
+    if not isinstance(messages, list):
+        messages = [messages]
+    return bool(messages) and isinstance(messages[-1], HumanMessage)
+
+
+def _with_summary(output: Any, rounds: list[dict]) -> dict:
+    update = dict(output) if isinstance(output, dict) else {}
+    update["reflection_metrics"] = {"rounds": rounds, "totals": summarize_rounds(rounds)}
+    return update
+
+
+def with_metrics(
+    graph: Critic,
+    reflection: Critic,
+    exporters: Sequence[MetricsExporter] = (),
+) -> tuple[Runnable, Runnable]:
+    """Wrap the main agent and the reflection step to measure every round.
+
+    Args:
+        graph: The main agent.
+        reflection: The reflection step.
+        exporters: Receive each round once it has been judged.
+
+    Returns:
+        tuple[Runnable, Runnable]: The ``graph`` and ``reflection`` nodes. Their
+            state must include the keys of :class:`MetricsState`.
+    """
+    graph_runnable = _as_runnable(graph)
+    reflection_runnable = _as_runnable(reflection)
+
+    def start_round(state: dict) -> tuple[RoundMetrics, list[dict]]:
+        rounds = list((state.get("reflection_metrics") or {}).get("rounds", []))
+        if rounds and rounds[-1]["outcome"] != "critique":
+            # The previous run on this thread ended; this is a new one
+            rounds = []
+        return RoundMetrics(round=len(rounds) + 1), rounds
+
+    def resume_round(state: dict) -> tuple[RoundMetrics, list[dict]]:
+        rounds = list((state.get("reflection_metrics") or {}).get("rounds", []))
+        if not rounds:
+            return RoundMetrics(round=1), rounds
+        return RoundMetrics.from_dict(rounds[-1]), rounds[:-1]
+
+    def finish_round(metrics: RoundMetrics, output: Any) -> None:
+        metrics.outcome = "critique" if _critique_issued(output) else "accepted"
+        for exporter in exporters:
+            exporter.export_round(metrics)
+
+    def traced(
+        metrics: RoundMetrics, config: RunnableConfig
+    ) -> tuple[RunnableConfig, UsageMetadataCallbackHandler, contextvars.Token]:
+        handler = UsageMetadataCallbackHandler()
+        return merge_configs(config, {"callbacks": [handler]}), handler, _current_round.set(metrics)
+
+    def call_graph(state: dict, config: RunnableConfig) -> dict:
+        metrics, rounds = start_round(state)
+        config, handler, token = traced(metrics, config)
+        start = time.perf_counter()
+        try:
+            output = graph_runnable.invoke(state, config)
+        finally:
+            metrics.assistant_latency += time.perf_counter() - start
+            _current_round.reset(token)
+        metrics._add_usage(handler)
+        return _with_summary(output, [*rounds, metrics.as_dict()])
+
+    async def acall_graph(state: dict, config: RunnableConfig) -> dict:
+        metrics, rounds = start_round(state)
+        config, handler, token = traced(metrics, config)
+        start = time.perf_counter()
+        try:
+            output = await graph_runnable.ainvoke(state, config)
+        finally:
+            metrics.assistant_latency += time.perf_counter() - start
+            _current_round.reset(token)
+        metrics._add_usage(handler)
+        return _with_summary(output, [*rounds, metrics.as_dict()])
+
+    def reflect(state: dict, config: RunnableConfig) -> dict:
+        metrics, rounds = resume_round(state)
+        config, handler, token = traced(metrics, config)
+        start = time.perf_counter()
+        try:
+            output = reflection_runnable.invoke(state, config)
+        finally:
+            metrics.critic_latency += time.perf_counter() - start
+            _current_round.reset(token)
+        metrics._add_usage(handler)
+        finish_round(metrics, output)
+        return _with_summary(output, [*rounds, metrics.as_dict()])
+
+    async def areflect(state: dict, config: RunnableConfig) -> dict:
+        metrics, rounds = resume_round(state)
+        config, handler, token = traced(metrics, config)
+        start = time.perf_counter()
+        try:
+            output = await reflection_runnable.ainvoke(state, config)
+        finally:
+            metrics.critic_latency += time.perf_counter() - start
+            _current_round.reset(token)
+        metrics._add_usage(handler)
+        finish_round(metrics, output)
+        return _with_summary(output, [*rounds, metrics.as_dict()])
+
+    return (
+        RunnableLambda(call_graph, afunc=acall_graph, name="graph"),
+        RunnableLambda(reflect, afunc=areflect, name="reflection"),
+    )
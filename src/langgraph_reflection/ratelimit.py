@@ -0,0 +1,515 @@
+"""Provider-aware scheduling of model calls.
+
+Concurrent reflection runs otherwise call the same provider without any
+coordination, hit its rate limits together and then retry together. Every model
+call routed through :func:`call` or :func:`acall` goes through the scheduler of
+its provider instead, which
+
+- holds the call until the provider's request and token buckets allow it,
+- admits waiting calls by priority, so runs that are further along finish first,
+- adapts the number of calls in flight: additive increase while latency stays
+  near the best seen, multiplicative decrease on throttling or latency blow-up,
+- retries throttled (HTTP 429) calls with jittered exponential backoff, and
+  pauses the whole provider when it says how long to wait (``Retry-After``).
+
+Schedulers are shared by all threads and event loops of the process. Clients
+that ``get_chat_model`` builds for a provider with a scheduler have the SDK's own
+retries turned off, so throttled calls are retried (and seen) by the scheduler
+only.
+"""
+
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from langgraph_reflection.metrics import record_metric
+
+
+@dataclass
+class RateLimits:
+    """Quota and tuning of one provider.
+
+    Attributes:
+        requests_per_minute: Request quota, ``None`` for no limit.
+        tokens_per_minute: Token quota (prompt plus completion), ``None`` for no limit.
+        burst_seconds: How many seconds of quota may be spent at once.
+        max_concurrency: Upper bound of calls in flight.
+        min_concurrency: Lower bound the adaptive limit never goes below.
+        initial_concurrency: Starting limit, defaults to ``max_concurrency``.
+        expected_output_tokens: Completion tokens reserved per call until the
+            actual usage is known.
+        max_retries: Retries of a throttled call before the error is raised.
+        base_backoff: Seconds before the first retry, doubled for each retry.
+        max_backoff: Cap of the backoff in seconds.
+        latency_tolerance: A call slower than this multiple of the best
+            latency seen lowers the concurrency limit.
+    """
+
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+    burst_seconds: float = 10.0
+    max_concurrency: int = 64
+    min_concurrency: int = 1
+    initial_concurrency: Optional[int] = None
+    expected_output_tokens: int = 512
+    max_retries: int = 4
+    base_backoff: float = 1.0
+    max_backoff: float = 60.0
+    latency_tolerance: float = 3.0
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``per_minute / 60`` per second.
+
+    Not thread-safe by itself; the scheduler guards it with its lock. A request
+    larger than the bucket is admitted once the bucket is full and leaves it
+    in debt, so it is delayed rather than starved.
+    """
+
+    def __init__(
+        self,
+        per_minute: float,
+        burst_seconds: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = per_minute / 60
+        self.capacity = max(self.rate * burst_seconds, 1.0)
+        self._clock = clock
+        self._level = self.capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` can be taken, 0 if it can be taken now."""
+        self._refill()
+        needed = min(amount, self.capacity)
+        if self._level >= needed:
+            return 0.0
+        return (needed - self._level) / self.rate
+
+    def take(self, amount: float) -> None:
+        """Take ``amount``; a negative amount gives tokens back."""
+        self._refill()
+        self._level = min(self.capacity, self._level - amount)
+
+
+class AdaptiveConcurrency:
+    """AIMD limit of calls in flight, driven by latency and throttling."""
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        latency_tolerance: float = 3.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_tolerance = latency_tolerance
+        self._clock = clock
+        self._best_latency: Optional[float] = None
+        self._last_decrease = float("-inf")
+
+    def _decrease(self, factor: float) -> None:
+        # Calls in flight at the time of a throttle tend to fail together; count
+        # them as one signal rather than halving once per call
+        now = self._clock()
+        if now - self._last_decrease < max(self._best_latency or 0.0, 1.0):
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.minimum), self.limit * factor)
+
+    def on_success(self, latency: float) -> None:
+        """Grow the limit by about one per window of calls, or back off if slow."""
+        if self._best_latency is None or latency < self._best_latency:
+            self._best_latency = latency
+        else:
+            # Let the baseline drift up slowly so one lucky call does not pin it
+            self._best_latency += 0.01 * (latency - self._best_latency)
+        if latency > self._best_latency * self.latency_tolerance:
+            self._decrease(0.9)
+        else:
+            self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+
+    def on_throttle(self) -> None:
+        """Halve the limit."""
+        self._decrease(0.5)
+
+
+class _Waiter:
+    # ``wake`` may return something (e.g. the handle of call_soon_threadsafe);
+    # it is ignored
+    def __init__(self, tokens: float, wake: Callable[[], object]) -> None:
+        self.tokens = tokens
+        self.wake = wake
+
+
+def _is_throttled(error: BaseException) -> bool:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or "RateLimit" in type(error).__name__
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(value: Any) -> int:
+    """Rough prompt token count of messages, strings and containers of them."""
+    if isinstance(value, BaseMessage):
+        return estimate_tokens(value.content)
+    if isinstance(value, str):
+        return len(value) // 4 + 1
+    if isinstance(value, dict):
+        return sum(estimate_tokens(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_tokens(v) for v in value)
+    return 0
+
+
+def _used_tokens(result: Any) -> Optional[int]:
+    usage = getattr(result, "usage_metadata", None) if isinstance(result, AIMessage) else None
+    return usage.get("total_tokens") if usage else None
+
+
+class ProviderScheduler:
+    """Admission control for the model calls of one provider.
+
+    Example:
+        ```python
+        scheduler = ProviderScheduler("azure_openai", RateLimits(requests_per_minute=600))
+        response = scheduler.call(model.invoke, messages, priority=2)
+        ```
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limits: Optional[RateLimits] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.limits = limits = limits or RateLimits()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._requests = (
+            TokenBucket(limits.requests_per_minute, limits.burst_seconds, clock)
+            if limits.requests_per_minute
+            else None
+        )
+        self._tokens = (
+            TokenBucket(limits.tokens_per_minute, limits.burst_seconds, clock)
+            if limits.tokens_per_minute
+            else None
+        )
+        self._concurrency = AdaptiveConcurrency(
+            limits.initial_concurrency or limits.max_concurrency,
+            limits.min_concurrency,
+            limits.max_concurrency,
+            limits.latency_tolerance,
+            clock,
+        )
+        self._queue: list[tuple[int, int, _Waiter]] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._calls = 0
+        self._throttled = 0
+        self._retries = 0
+
+    @property
+    def stats(self) -> dict:
+        """Calls, throttles, retries, the current limit and queue length."""
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "throttled": self._throttled,
+                "retries": self._retries,
+                "in_flight": self._in_flight,
+                "queued": len(self._queue),
+                "concurrency_limit": self._concurrency.limit,
+            }
+
+    def _enqueue(self, waiter: _Waiter, priority: int) -> None:
+        with self._lock:
+            heapq.heappush(self._queue, (-priority, next(self._seq), waiter))
+
+    def _poll(self, waiter: _Waiter) -> tuple[bool, Optional[float]]:
+        # Called with the lock held. Only the head of the queue may start; it
+        # either starts now, or learns how long until the buckets allow it
+        if self._queue[0][2] is not waiter or self._in_flight >= int(self._concurrency.limit):
+            return False, None
+        delay = self._paused_until - self._clock()
+        if self._requests is not None:
+            delay = max(delay, self._requests.wait_time(1))
+        if self._tokens is not None:
+            delay = max(delay, self._tokens.wait_time(waiter.tokens))
+        if delay > 0:
+            return False, delay
+        heapq.heappop(self._queue)
+        self._in_flight += 1
+        self._calls += 1
+        if self._requests is not None:
+            self._requests.take(1)
+        if self._tokens is not None:
+            self._tokens.take(waiter.tokens)
+        self._wake_head()
+        return True, None
+
+    def _wake_head(self) -> None:
+        if self._queue:
+            self._queue[0][2].wake()
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        with self._lock:
+            self._queue = [entry for entry in self._queue if entry[2] is not waiter]
+            heapq.heapify(self._queue)
+            self._wake_head()
+
+    def _acquire(self, tokens: float, priority: int) -> float:
+        event = threading.Event()
+        waiter = _Waiter(tokens, event.set)
+        start = self._clock()
+        self._enqueue(waiter, priority)
+        try:
+            while True:
+                with self._lock:
+                    event.clear()
+                    started, timeout = self._poll(waiter)
+                if started:
+                    return self._clock() - start
+                event.wait(timeout)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    async def _aacquire(self, tokens: float, priority: int) -> float:
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        waiter = _Waiter(tokens, lambda: loop.call_soon_threadsafe(event.set))
+        start = self._clock()
+        self._enqueue(waiter, priority)
+        try:
+            while True:
+                with self._lock:
+                    event.clear()
+                    started, timeout = self._poll(waiter)
+                if started:
+                    return self._clock() - start
+                try:
+                    await asyncio.wait_for(event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    def _finish(
+        self,
+        reserved: float,
+        started: float,
+        result: Any = None,
+        error: Optional[BaseException] = None,
+        attempt: int = 0,
+    ) -> Optional[float]:
+        """Release the slot; return the backoff if a throttled call should retry."""
+        latency = self._clock() - started
+        with self._lock:
+            self._in_flight -= 1
+            delay = None
+            if error is None:
+                self._concurrency.on_success(latency)
+                used = _used_tokens(result)
+                if used is not None and self._tokens is not None:
+                    self._tokens.take(used - reserved)
+            elif self._tokens is not None:
+                # A failed call (throttled or not) produced no completion and
+                # reports no usage to settle against: give the reservation back
+                self._tokens.take(-reserved)
+            if error is not None and _is_throttled(error):
+                self._throttled += 1
+                self._concurrency.on_throttle()
+                if attempt < self.limits.max_retries:
+                    self._retries += 1
+                    retry_after = _retry_after(error)
+                    if retry_after is not None:
+                        # The provider said when it will accept calls again;
+                        # hold everyone rather than let each call find out
+                        self._paused_until = max(self._paused_until, self._clock() + retry_after)
+                        delay = retry_after
+                    else:
+                        backoff = min(
+                            self.limits.max_backoff, self.limits.base_backoff * 2**attempt
+                        )
+                        delay = random.uniform(backoff / 2, backoff)
+            self._wake_head()
+        return delay
+
+    def _reserve(self, tokens: Optional[int], args: tuple, kwargs: dict) -> float:
+        if tokens is None:
+            tokens = estimate_tokens(args) + estimate_tokens(kwargs)
+        return float(tokens + self.limits.expected_output_tokens)
+
+    def call(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        priority: int = 0,
+        tokens: Optional[int] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Run ``fn(*args, **kwargs)`` once the provider's limits allow it.
+
+        Args:
+            fn: The model call, e.g. ``model.invoke``.
+            *args: Positional arguments of ``fn``.
+            priority: Higher runs first among waiting calls, see ``run_priority``.
+            tokens: Prompt tokens of the call, estimated from the arguments if not given.
+            **kwargs: Keyword arguments of ``fn``.
+
+        Returns:
+            Any: What ``fn`` returned.
+        """
+        reserved = self._reserve(tokens, args, kwargs)
+        for attempt in itertools.count():
+            record_metric("rate_limit_wait_seconds", self._acquire(reserved, priority))
+            started = self._clock()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._finish(reserved, started, error=e, attempt=attempt)
+                if delay is None:
+                    raise
+                record_metric("rate_limit_retries", 1)
+                time.sleep(delay)
+                continue
+            self._finish(reserved, started, result=result)
+            return result
+
+    async def acall(
+        self,
+        fn: Callable[..., Awaitable[Any]],
+        *args: Any,
+        priority: int = 0,
+        tokens: Optional[int] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Async version of ``call`` for coroutine functions such as ``model.ainvoke``."""
+        reserved = self._reserve(tokens, args, kwargs)
+        for attempt in itertools.count():
+            record_metric("rate_limit_wait_seconds", await self._aacquire(reserved, priority))
+            started = self._clock()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._finish(reserved, started, error=e, attempt=attempt)
+                if delay is None:
+                    raise
+                record_metric("rate_limit_retries", 1)
+                await asyncio.sleep(delay)
+                continue
+            self._finish(reserved, started, result=result)
+            return result
+
+
+_schedulers: dict[str, ProviderScheduler] = {}
+_lock = threading.Lock()
+
+
+def configure_rate_limits(
+    provider: str, limits: Optional[RateLimits] = None, **kwargs: Any
+) -> ProviderScheduler:
+    """Set the quota of a provider, replacing its scheduler.
+
+    Example:
+        ```python
+        configure_rate_limits("azure_openai", requests_per_minute=600, tokens_per_minute=90_000)
+        ```
+
+    Args:
+        provider: Provider name used in ``call``/``acall``, e.g. ``"azure_openai"``.
+        limits: The limits; alternatively pass ``RateLimits`` fields as keywords.
+
+    Returns:
+        ProviderScheduler: The new scheduler.
+    """
+    scheduler = ProviderScheduler(provider, limits or RateLimits(**kwargs))
+    with _lock:
+        _schedulers[provider] = scheduler
+    return scheduler
+
+
+def get_scheduler(provider: str) -> ProviderScheduler:
+    """Return the scheduler of a provider, with default limits if not configured."""
+    scheduler = _schedulers.get(provider)
+    if scheduler is None:
+        with _lock:
+            scheduler = _schedulers.setdefault(provider, ProviderScheduler(provider))
+    return scheduler
+
+
+def is_scheduled(provider: Optional[str]) -> bool:
+    """Whether ``provider`` has a scheduler, i.e. was configured or called through one."""
+    return provider is not None and provider in _schedulers
+
+
+def run_priority(messages: list) -> int:
+    """Scheduling priority of a run: the number of drafts in its conversation.
+
+    A run that has been through more rounds is closer to its end and has more
+    already spent on it, so its calls go first.
+    """
+    return sum(isinstance(m, AIMessage) for m in messages)
+
+
+def call(
+    provider: str,
+    fn: Callable[..., Any],
+    *args: Any,
+    priority: int = 0,
+    tokens: Optional[int] = None,
+    **kwargs: Any,
+) -> Any:
+    """Run a model call through the shared scheduler of ``provider``.
+
+    Example:
+        ```python
+        response = call("azure_openai", model.invoke, state["messages"], priority=run_priority(state["messages"]))
+        ```
+    """
+    return get_scheduler(provider).call(fn, *args, priority=priority, tokens=tokens, **kwargs)
+
+
+async def acall(
+    provider: str,
+    fn: Callable[..., Awaitable[Any]],
+    *args: Any,
+    priority: int = 0,
+    tokens: Optional[int] = None,
+    **kwargs: Any,
+) -> Any:
+    """Async version of ``call``."""
+    return await get_scheduler(provider).acall(
+        fn, *args, priority=priority, tokens=tokens, **kwargs
+    )
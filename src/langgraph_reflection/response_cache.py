@@ -0,0 +1,173 @@
+"""Caching accepted answers of the whole reflection loop.
+
+Production prompts repeat (retries, popular questions), and each repeat would
+otherwise run the assistant and every critic again. With a response cache, the
+``graph`` node first looks up the conversation it was given, keyed by a
+normalised hash of the input messages and the model configuration. On a hit it
+returns the answer that was accepted before and the ``reflection`` node accepts
+it without calling any critic; on a miss the loop runs as usual and the answer
+is stored once it is accepted. Answers that were cut off by the step limit or by
+convergence detection are not stored.
+
+Answers are kept in a :class:`~langgraph_reflection.cache.VerdictCache`, so the
+same in-memory and SQLite tiers, TTL and size limits apply.
+"""
+
+from typing import Any, Optional
+
+from typing_extensions import TypedDict
+
+from langchain_core.messages import BaseMessage, HumanMessage, messages_from_dict, messages_to_dict
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+from langgraph_reflection.cache import VerdictCache, cache_key
+from langgraph_reflection.critics import Critic, _as_runnable, _new_messages, critique_issued
+from langgraph_reflection.metrics import record_metric
+
+
+# Per-run bookkeeping in ``configurable`` that does not change the answer
+_RUNTIME_KEYS = frozenset({"thread_id", "checkpoint_id", "checkpoint_ns", "checkpoint_map", "run_id"})
+
+
+class ResponseCacheState(TypedDict, total=False):
+    """Keys added to the reflection state when the response cache is enabled.
+
+    Attributes:
+        response_cache: The cache key of the current run, whether it was a hit,
+            and whether the loop is still going.
+    """
+
+    response_cache: dict
+
+
+def _normalize(content: Any) -> Any:
+    if isinstance(content, str):
+        lines = content.replace("\r\n", "\n").strip().split("\n")
+        return "\n".join(line.rstrip() for line in lines)
+    if isinstance(content, list):
+        return [_normalize(block) for block in content]
+    if isinstance(content, dict):
+        return {k: _normalize(v) for k, v in content.items() if k != "id"}
+    return content
+
+
+def response_cache_key(messages: list[BaseMessage], config: Optional[RunnableConfig] = None) -> str:
+    """Key of a conversation in the response cache.
+
+    Messages are compared by type and content, with line endings and trailing
+    whitespace normalised and ids ignored. The ``configurable`` values of the
+    run (model, temperature, ...) are part of the key, except per-run ones such
+    as ``thread_id``.
+    """
+    configurable = (config or {}).get("configurable", {})
+    model_config = {
+        k: v for k, v in configurable.items() if k not in _RUNTIME_KEYS and not k.startswith("__")
+    }
+    content = [{"type": m.type, "content": _normalize(m.content)} for m in messages]
+    return cache_key(content, {"configurable": model_config})
+
+
+def _accepted_answer(messages: list[BaseMessage]) -> list[BaseMessage]:
+    """The messages after the last user message: the draft and anything the critic appended."""
+    for i in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[i], HumanMessage):
+            return messages[i + 1 :]
+    return messages
+
+
+def _replayed(cached: list[dict]) -> list[BaseMessage]:
+    messages = messages_from_dict(cached)
+    # Fresh ids, so a repeat within one thread appends instead of replacing
+    for message in messages:
+        message.id = None
+    return messages
+
+
+def with_response_cache(
+    graph: Critic,
+    reflection: Critic,
+    cache: VerdictCache,
+    track_termination: bool = False,
+) -> tuple[Runnable, Runnable]:
+    """Wrap the main agent and the reflection step with an answer cache.
+
+    Args:
+        graph: The main agent.
+        reflection: The reflection step.
+        cache: Where accepted answers are stored.
+        track_termination: Set ``termination_reason`` to ``"accepted"`` on a
+            hit. Only for states that have the key (see ``ConvergenceState``).
+
+    Returns:
+        tuple[Runnable, Runnable]: The ``graph`` and ``reflection`` nodes. Their
+            state must include the keys of :class:`ResponseCacheState`.
+    """
+    graph_runnable = _as_runnable(graph)
+    reflection_runnable = _as_runnable(reflection)
+
+    def lookup(state: dict, config: RunnableConfig) -> Optional[dict]:
+        if (state.get("response_cache") or {}).get("in_progress"):
+            # A later round of a run that missed the cache
+            return None
+        key = response_cache_key(state["messages"], config)
+        cached = cache.get(key)
+        record_metric("response_cache_hits" if cached is not None else "response_cache_misses", 1)
+        if cached is None:
+            return {"response_cache": {"key": key, "hit": False, "in_progress": True}}
+        return {
+            "messages": _replayed(cached),
+            "response_cache": {"key": key, "hit": True, "in_progress": False},
+        }
+
+    def merged(output: Any, update: Optional[dict]) -> Any:
+        if update is None:
+            return output
+        return {**(output if isinstance(output, dict) else {}), **update}
+
+    def call_graph(state: dict, config: RunnableConfig) -> Any:
+        update = lookup(state, config)
+        if update is not None and update["response_cache"]["hit"]:
+            return update
+        return merged(graph_runnable.invoke(state, config), update)
+
+    async def acall_graph(state: dict, config: RunnableConfig) -> Any:
+        update = lookup(state, config)
+        if update is not None and update["response_cache"]["hit"]:
+            return update
+        return merged(await graph_runnable.ainvoke(state, config), update)
+
+    def finish(state: dict, output: Any) -> dict:
+        entry = dict(state.get("response_cache") or {})
+        messages = list(state["messages"]) + _new_messages(reflection, state, output)
+        reason = output.get("termination_reason") if isinstance(output, dict) else None
+        critiqued = critique_issued({"messages": messages})
+        # Mirrors end_or_reflect: the loop goes on after a critique unless it
+        # is out of steps or was stopped
+        entry["in_progress"] = critiqued and state.get("remaining_steps", 3) > 2 and not reason
+        if not critiqued and reason in (None, "accepted") and entry.get("key"):
+            cache.set(entry["key"], messages_to_dict(_accepted_answer(messages)))
+        return merged(output, {"response_cache": entry})
+
+    def accept_hit(state: dict) -> Optional[dict]:
+        # The cached answer was accepted when it was stored; the loop ends
+        # because it does not end with a critique
+        if not (state.get("response_cache") or {}).get("hit"):
+            return None
+        return {"termination_reason": "accepted"} if track_termination else {}
+
+    def reflect(state: dict, config: RunnableConfig) -> Any:
+        hit = accept_hit(state)
+        if hit is not None:
+            return hit
+        return finish(state, reflection_runnable.invoke(state, config))
+
+    async def areflect(state: dict, config: RunnableConfig) -> Any:
+        hit = accept_hit(state)
+        if hit is not None:
+            return hit
+        return finish(state, await reflection_runnable.ainvoke(state, config))
+
+    return (
+        RunnableLambda(call_graph, afunc=acall_graph, name="graph"),
+        RunnableLambda(reflect, afunc=areflect, name="reflection"),
+    )
@@ -0,0 +1,247 @@
+"""Generating several drafts per round and keeping the best one.
+
+Instead of one draft followed by one critique, the main agent is run ``k``
+times concurrently (e.g. at different temperatures) and every draft is judged as
+soon as it is ready. The first draft that passes wins and the remaining ones are
+stopped; if none passes, the draft with the shortest critique is kept. The
+winner's verdict is stored in the state so that the reflection step does not
+judge it a second time, which keeps a round at two graph steps.
+"""
+
+import asyncio
+import contextvars
+import threading
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from typing_extensions import TypedDict
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, MessageLikeRepresentation
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langchain_core.runnables.config import merge_configs
+from langgraph.graph.message import add_messages
+
+from langgraph_reflection.critics import CRITIC_TAG, Critic, arun_critic, run_critic
+
+
+class SpeculationState(TypedDict, total=False):
+    """Keys added to the reflection state when several drafts are generated.
+
+    Attributes:
+        speculation: The id of the draft that won the last round, its critique
+            (empty if it passed) and the index of the draft configuration that
+            produced it.
+    """
+
+    speculation: dict
+
+
+def default_draft_configs(num_drafts: int) -> list[dict]:
+    """Spread ``num_drafts`` drafts over temperatures from 0 to 1."""
+    return [
+        {"draft_index": i, "temperature": round(i / max(num_drafts - 1, 1), 2)}
+        for i in range(num_drafts)
+    ]
+
+
+@dataclass
+class _Candidate:
+    index: int
+    draft: list[BaseMessage]
+    critique: list[BaseMessage]
+
+    @property
+    def passed(self) -> bool:
+        return not (self.critique and isinstance(self.critique[-1], HumanMessage))
+
+    @property
+    def critique_length(self) -> int:
+        return sum(len(str(message.content)) for message in self.critique)
+
+
+def _with_ids(messages: list[BaseMessage]) -> list[BaseMessage]:
+    # The winning draft is recognised by id in the reflection step
+    return [
+        message if message.id is not None else message.model_copy(update={"id": str(uuid.uuid4())})
+        for message in messages
+    ]
+
+
+def _draft_config(config: RunnableConfig, index: int, draft_config: dict) -> RunnableConfig:
+    return merge_configs(config, {"configurable": draft_config, "metadata": {"draft_index": index}})
+
+
+def _critic_config(config: RunnableConfig) -> RunnableConfig:
+    return merge_configs(config, {"tags": [CRITIC_TAG]})
+
+
+def _judged_state(state: dict, draft: list[BaseMessage]) -> dict:
+    update: list[MessageLikeRepresentation] = list(draft)
+    return {**state, "messages": add_messages(list(state["messages"]), update)}
+
+
+class _Stopped(Exception):
+    """Raised in a losing draft's thread instead of judging it."""
+
+
+def _run_candidate(
+    graph: Critic,
+    reflection: Critic,
+    state: dict,
+    config: RunnableConfig,
+    index: int,
+    draft_config: dict,
+    stop: threading.Event,
+) -> _Candidate:
+    # A thread cannot be interrupted mid-call, so a losing draft is stopped at
+    # the next step instead: its model call finishes, but it is not judged
+    if stop.is_set():
+        raise _Stopped
+    draft = _with_ids(run_critic(graph, state, _draft_config(config, index, draft_config)))
+    if stop.is_set():
+        raise _Stopped
+    critique = run_critic(reflection, _judged_state(state, draft), _critic_config(config))
+    return _Candidate(index, draft, critique)
+
+
+async def _arun_candidate(
+    graph: Critic, reflection: Critic, state: dict, config: RunnableConfig, index: int, draft_config: dict
+) -> _Candidate:
+    draft = _with_ids(await arun_critic(graph, state, _draft_config(config, index, draft_config)))
+    critique = await arun_critic(reflection, _judged_state(state, draft), _critic_config(config))
+    return _Candidate(index, draft, critique)
+
+
+def _select(candidates: list[_Candidate], errors: list[BaseException]) -> _Candidate:
+    if not candidates:
+        raise errors[0]
+    passed = [c for c in candidates if c.passed]
+    if passed:
+        return passed[0]
+    return min(candidates, key=lambda c: (c.critique_length, c.index))
+
+
+def _update(winner: _Candidate) -> dict:
+    drafts = [m for m in winner.draft if isinstance(m, AIMessage)]
+    return {
+        "messages": winner.draft,
+        "speculation": {
+            "draft_id": drafts[-1].id if drafts else None,
+            "critique": winner.critique,
+            "draft_index": winner.index,
+        },
+    }
+
+
+def with_speculative_drafts(
+    graph: Critic,
+    reflection: Critic,
+    num_drafts: int = 2,
+    draft_configs: Optional[Sequence[dict]] = None,
+) -> tuple[Runnable, Runnable]:
+    """Wrap the main agent and the reflection step to judge several drafts per round.
+
+    Each draft is generated with its entry of ``draft_configs`` merged into
+    ``config["configurable"]``; the main agent decides what to do with it, e.g.
+    read ``configurable["temperature"]``. All drafts are judged concurrently by
+    ``reflection``. The first draft to pass is kept and the others stopped;
+    otherwise the draft whose critique is shortest is kept. A draft that raises
+    is ignored unless every draft does.
+
+    With ``ainvoke`` the losing drafts are cancelled right away. With
+    ``invoke`` they run in threads, which cannot be interrupted: a loser that
+    is already calling the main agent or a critic finishes that call in the
+    background, but is not judged afterwards.
+
+    Args:
+        graph: The main agent.
+        reflection: The reflection step.
+        num_drafts: Number of drafts per round, if ``draft_configs`` is not given.
+        draft_configs: One ``configurable`` override per draft. Defaults to
+            ``num_drafts`` temperatures spread from 0 to 1.
+
+    Returns:
+        tuple[Runnable, Runnable]: The ``graph`` and ``reflection`` nodes. Their
+            state must include the keys of :class:`SpeculationState`.
+    """
+    configs = list(draft_configs) if draft_configs is not None else default_draft_configs(num_drafts)
+    if len(configs) == 0:
+        raise ValueError("At least one draft configuration is required")
+
+    def draft(state: dict, config: RunnableConfig) -> dict:
+        candidates: list[_Candidate] = []
+        errors: list[BaseException] = []
+        executor = ThreadPoolExecutor(max_workers=len(configs))
+        stop = threading.Event()
+        try:
+            pending = {
+                executor.submit(
+                    contextvars.copy_context().run,
+                    _run_candidate, graph, reflection, state, config, i, draft_config, stop,
+                )
+                for i, draft_config in enumerate(configs)
+            }
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    error = future.exception()
+                    if error is not None:
+                        errors.append(error)
+                    else:
+                        candidates.append(future.result())
+                if any(c.passed for c in candidates):
+                    break
+        finally:
+            # Don't wait for drafts that can no longer win, and don't judge them
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+        return _update(_select(candidates, errors))
+
+    async def adraft(state: dict, config: RunnableConfig) -> dict:
+        candidates: list[_Candidate] = []
+        errors: list[BaseException] = []
+        pending = {
+            asyncio.ensure_future(_arun_candidate(graph, reflection, state, config, i, draft_config))
+            for i, draft_config in enumerate(configs)
+        }
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is not None:
+                        errors.append(error)
+                    else:
+                        candidates.append(task.result())
+                if any(c.passed for c in candidates):
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+        return _update(_select(candidates, errors))
+
+    def stored_verdict(state: dict) -> Optional[dict]:
+        speculation = state.get("speculation") or {}
+        messages = state["messages"]
+        if messages and speculation.get("draft_id") == messages[-1].id:
+            return {"messages": speculation["critique"]}
+        return None
+
+    def reflect(state: dict, config: RunnableConfig) -> dict:
+        verdict = stored_verdict(state)
+        if verdict is not None:
+            return verdict
+        return {"messages": run_critic(reflection, state, config)}
+
+    async def areflect(state: dict, config: RunnableConfig) -> dict:
+        verdict = stored_verdict(state)
+        if verdict is not None:
+            return verdict
+        return {"messages": await arun_critic(reflection, state, config)}
+
+    return (
+        RunnableLambda(draft, afunc=adraft, name="graph"),
+        RunnableLambda(reflect, afunc=areflect, name="reflection"),
+    )
@@ -0,0 +1,187 @@
+"""Streaming a reflection run as typed progress events.
+
+``app.invoke`` only returns once the loop has finished. The helpers below run
+the reflection graph with LangGraph's ``messages``, ``tasks``, ``values`` and
+``custom`` stream modes (including subgraphs) and translate the raw chunks into
+a small set of events: assistant tokens as they are generated, the start of
+each round, every draft, critique and acceptance, and finally why the run ended.
+
+Breaking out of the iteration stops the run: no further rounds are scheduled.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterator, Literal, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+
+from langgraph_reflection.critics import CRITIC_TAG
+
+
+EventType = Literal["round_start", "token", "draft", "critique", "accepted", "custom", "end"]
+
+STREAM_MODES = ["messages", "tasks", "values", "custom"]
+
+
+@dataclass
+class ReflectionEvent:
+    """One step of progress of a reflection run.
+
+    Attributes:
+        type: What happened:
+
+            - ``"round_start"``: the main agent started a new draft.
+            - ``"token"``: a chunk of draft text (``data`` is the text).
+            - ``"draft"``: the main agent finished a draft (``data`` is the message).
+            - ``"critique"``: the reflection step issued a critique (``data`` is the message).
+            - ``"accepted"``: the reflection step accepted the draft (``data`` is the draft).
+            - ``"custom"``: data a node wrote with ``get_stream_writer``.
+            - ``"end"``: the run finished; ``data`` is the termination reason
+              and ``metadata["state"]`` the final state.
+        round: The round the event belongs to, starting at 1.
+        data: The payload, see ``type``.
+        metadata: Extra information, e.g. ``draft_index`` for tokens of
+            speculative drafts.
+    """
+
+    type: EventType
+    round: int
+    data: Any = None
+    metadata: dict = field(default_factory=dict)
+
+
+def _text(message: BaseMessage) -> str:
+    if isinstance(message.content, str):
+        return message.content
+    return "".join(
+        block if isinstance(block, str) else str(block.get("text", ""))
+        for block in message.content
+        if isinstance(block, str) or block.get("type") == "text"
+    )
+
+
+def _from_main_agent(namespace: tuple, metadata: dict) -> bool:
+    """Whether a streamed message was produced inside the ``graph`` node."""
+    if CRITIC_TAG in (metadata.get("tags") or []):
+        return False
+    if namespace:
+        return namespace[0].split(":", 1)[0] == "graph"
+    return metadata.get("langgraph_node") == "graph"
+
+
+class _EventTranslator:
+    """Turns ``(namespace, mode, chunk)`` stream items into ``ReflectionEvent``s."""
+
+    def __init__(self) -> None:
+        self.round = 0
+        self.values: Optional[dict] = None
+        self.last_draft: Optional[AIMessage] = None
+        self.last_verdict: Optional[str] = None
+
+    def feed(self, namespace: tuple, mode: str, chunk: Any) -> list[ReflectionEvent]:
+        if mode == "messages":
+            message, metadata = chunk
+            if isinstance(message, AIMessageChunk) and _from_main_agent(namespace, metadata):
+                text = _text(message)
+                if text:
+                    extra = {"draft_index": metadata["draft_index"]} if "draft_index" in metadata else {}
+                    return [ReflectionEvent("token", self.round, text, extra)]
+            return []
+        if mode == "custom":
+            return [ReflectionEvent("custom", self.round, chunk, {"namespace": namespace})]
+        if namespace:
+            return []
+        if mode == "values":
+            self.values = chunk
+            return []
+        if mode == "tasks":
+            return self._task(chunk)
+        return []
+
+    def _task(self, task: dict) -> list[ReflectionEvent]:
+        name = task.get("name")
+        if "result" not in task:
+            if name == "graph":
+                self.round += 1
+                return [ReflectionEvent("round_start", self.round)]
+            return []
+        if task.get("error") is not None:
+            return []
+        result = dict(task["result"] or {})
+        messages = result.get("messages") or []
+        if not isinstance(messages, list):
+            messages = [messages]
+        if name == "graph":
+            drafts = [m for m in messages if isinstance(m, AIMessage)]
+            if drafts:
+                self.last_draft = drafts[-1]
+                return [ReflectionEvent("draft", self.round, self.last_draft)]
+        elif name == "reflection":
+            if messages and isinstance(messages[-1], HumanMessage):
+                self.last_verdict = "critique"
+                return [ReflectionEvent("critique", self.round, messages[-1])]
+            if messages and isinstance(messages[-1], AIMessage):
+                # e.g. a judge that replaces a patch with the full program
+                self.last_draft = messages[-1]
+            self.last_verdict = "accepted"
+            return [ReflectionEvent("accepted", self.round, self.last_draft)]
+        return []
+
+    def finish(self) -> ReflectionEvent:
+        reason = (self.values or {}).get("termination_reason")
+        if reason is None:
+            reason = {"accepted": "accepted", "critique": "max_steps"}.get(self.last_verdict or "")
+        return ReflectionEvent("end", self.round, reason, {"state": self.values})
+
+
+def stream_reflection(
+    app: Any, input: Any, config: Optional[RunnableConfig] = None
+) -> Iterator[ReflectionEvent]:
+    """Run a reflection app and yield its progress as ``ReflectionEvent``s.
+
+    Example:
+        ```python
+        for event in stream_reflection(reflection_app, {"messages": example_query}):
+            if event.type == "token":
+                print(event.data, end="", flush=True)
+            elif event.type == "critique":
+                print(f"\\n--- critique: {event.data.content}")
+            elif event.type == "end":
+                print(f"\\n--- finished after {event.round} rounds: {event.data}")
+        ```
+
+    Args:
+        app: A compiled reflection graph.
+        input: The graph input, e.g. ``{"messages": [...]}``.
+        config: Optional run config.
+
+    Yields:
+        ReflectionEvent: Events in the order they happen, ending with ``"end"``.
+            Stopping the iteration early stops the run.
+    """
+    translator = _EventTranslator()
+    stream = app.stream(input, config, stream_mode=STREAM_MODES, subgraphs=True)
+    try:
+        for namespace, mode, chunk in stream:
+            yield from translator.feed(namespace, mode, chunk)
+    finally:
+        stream.close()
+    yield translator.finish()
+
+
+async def astream_reflection(
+    app: Any, input: Any, config: Optional[RunnableConfig] = None
+) -> AsyncIterator[ReflectionEvent]:
+    """Async variant of :func:`stream_reflection`.
+
+    Leaving the ``async for`` loop early cancels the nodes that are still running.
+    """
+    translator = _EventTranslator()
+    stream = app.astream(input, config, stream_mode=STREAM_MODES, subgraphs=True)
+    try:
+        async for namespace, mode, chunk in stream:
+            for event in translator.feed(namespace, mode, chunk):
+                yield event
+    finally:
+        await stream.aclose()
+    yield translator.finish()
@@ -0,0 +1,91 @@
+import asyncio
+
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+
+from examples.coding import assistant as coding_assistant
+from examples.coding import judge as coding_judge
+from examples.llm_as_a_judge import judge as llm_judge
+
+FAILING_CODE = "```python\nvalue: int = 'a'\n```"
+
+
+def _fail_sync(*args, **kwargs):
+    raise AssertionError("ainvoke ran the sync implementation")
+
+
+def test_coding_judge_awaits_the_async_pyright_backend(monkeypatch):
+    checked = []
+
+    async def arun_pyright(code):
+        checked.append(code)
+        return {"key": "pyright_succeeded", "score": False, "comment": "[bad assignment]"}
+
+    monkeypatch.setattr(coding_judge, "get_default_verdict_cache", lambda: None)
+    monkeypatch.setattr(coding_judge, "arun_pyright", arun_pyright)
+    monkeypatch.setattr(coding_judge, "run_pyright", _fail_sync)
+
+    result = asyncio.run(
+        coding_judge.create_judge_graph().ainvoke(
+            {"messages": [HumanMessage(content="write code"), AIMessage(content=FAILING_CODE)]}
+        )
+    )
+
+    assert checked == ["value: int = 'a'\n"]
+    assert isinstance(result["messages"][-1], HumanMessage)
+    assert "[bad assignment]" in result["messages"][-1].content
+
+
+def test_coding_judge_invoke_keeps_the_sync_backend(monkeypatch):
+    monkeypatch.setattr(coding_judge, "get_default_verdict_cache", lambda: None)
+    monkeypatch.setattr(
+        coding_judge, "run_pyright", lambda code: {"score": True, "comment": "[]"}
+    )
+    monkeypatch.setattr(coding_judge, "arun_pyright", _fail_sync)
+
+    messages = [HumanMessage(content="write code"), AIMessage(content="```python\nx = 1\n```")]
+    result = coding_judge.create_judge_graph().invoke({"messages": messages})
+
+    assert len(result["messages"]) == 2
+
+
+def test_coding_assistant_awaits_the_model(monkeypatch):
+    class AsyncOnlyModel(FakeListChatModel):
+        def invoke(self, *args, **kwargs):
+            raise AssertionError("ainvoke ran the sync model call")
+
+    model = AsyncOnlyModel(responses=["```python\nx = 1\n```"])
+    monkeypatch.setattr(coding_assistant, "get_model", lambda config, messages: (model, "fake"))
+
+    result = asyncio.run(
+        coding_assistant.create_assistant_graph().ainvoke(
+            {"messages": [HumanMessage(content="write code")]}
+        )
+    )
+
+    assert result["messages"][-1].content == "```python\nx = 1\n```"
+
+
+def test_llm_judge_awaits_the_async_evaluator(monkeypatch):
+    factories = []
+
+    def get_evaluator(factory, **kwargs):
+        factories.append(factory)
+
+        async def evaluate(outputs, inputs):
+            return {"score": False, "comment": f"Too short: {outputs}"}
+
+        return evaluate
+
+    monkeypatch.setattr(llm_judge, "get_default_verdict_cache", lambda: None)
+    monkeypatch.setattr(llm_judge, "get_chat_model", lambda name: None)
+    monkeypatch.setattr(llm_judge, "get_evaluator", get_evaluator)
+
+    result = asyncio.run(
+        llm_judge.create_judge_graph().ainvoke(
+            {"messages": [HumanMessage(content="hi"), AIMessage(content="hello")]}
+        )
+    )
+
+    assert factories == [llm_judge.create_async_llm_as_judge]
+    assert result["messages"][-1].content == "Too short: hello"
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from langgraph_reflection import BatchStats, astream_reflection_batch, stream_reflection_batch
+
+
+class ConcurrencyProbe:
+    """A runnable body that records how many calls overlap."""
+
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _enter(self):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def _exit(self):
+        with self._lock:
+            self.active -= 1
+
+    def run(self, input, config=None):
+        self._enter()
+        try:
+            time.sleep(self.delay)
+            if input == "boom":
+                raise RuntimeError("bad input")
+            return {"echo": input}
+        finally:
+            self._exit()
+
+    async def arun(self, input, config=None):
+        self._enter()
+        try:
+            await asyncio.sleep(self.delay)
+            if input == "boom":
+                raise RuntimeError("bad input")
+            return {"echo": input}
+        finally:
+            self._exit()
+
+    def runnable(self):
+        return RunnableLambda(self.run, afunc=self.arun)
+
+
+def test_runs_every_input_within_the_concurrency_bound():
+    probe = ConcurrencyProbe()
+    stats = BatchStats()
+    results = list(
+        stream_reflection_batch(probe.runnable(), range(10), max_concurrency=3, stats=stats)
+    )
+
+    assert sorted(result.index for result in results) == list(range(10))
+    assert all(result.output == {"echo": result.input} for result in results)
+    assert 1 < probe.peak <= 3
+    assert stats.completed == 10 and stats.failed == 0
+    assert stats.items_per_second > 0
+
+
+def test_a_failing_input_does_not_stop_the_batch():
+    probe = ConcurrencyProbe(delay=0)
+    stats = BatchStats()
+    results = {
+        result.index: result
+        for result in stream_reflection_batch(
+            probe.runnable(), ["a", "boom", "c"], max_concurrency=2, stats=stats
+        )
+    }
+
+    assert not results[1].ok
+    assert isinstance(results[1].error, RuntimeError)
+    assert results[0].output == {"echo": "a"} and results[2].output == {"echo": "c"}
+    assert (stats.completed, stats.failed) == (2, 1)
+
+
+def test_config_can_depend_on_the_input():
+    seen = []
+    app = RunnableLambda(
+        lambda input, config: seen.append(config["configurable"]["thread_id"]) or {}
+    )
+    list(
+        stream_reflection_batch(
+            app,
+            ["x", "y"],
+            max_concurrency=1,
+            config=lambda index, input: {"configurable": {"thread_id": f"{index}-{input}"}},
+        )
+    )
+    assert seen == ["0-x", "1-y"]
+
+
+def test_inputs_are_consumed_lazily():
+    consumed = []
+
+    def inputs():
+        for i in range(100):
+            consumed.append(i)
+            yield i
+
+    stream = stream_reflection_batch(ConcurrencyProbe(delay=0).runnable(), inputs(), max_concurrency=2)
+    next(stream)
+    stream.close()
+    assert len(consumed) <= 3
+
+
+def test_rejects_a_concurrency_below_one():
+    with pytest.raises(ValueError):
+        list(stream_reflection_batch(RunnableLambda(lambda x: x), [1], max_concurrency=0))
+
+
+def test_async_batch_bounds_concurrency_and_captures_errors():
+    probe = ConcurrencyProbe()
+    stats = BatchStats()
+
+    async def collect():
+        async def inputs():
+            for value in ["a", "boom", "c", "d", "e"]:
+                yield value
+
+        return [
+            result
+            async for result in astream_reflection_batch(
+                probe.runnable(), inputs(), max_concurrency=2, stats=stats
+            )
+        ]
+
+    results = asyncio.run(collect())
+
+    assert sorted(result.index for result in results) == [0, 1, 2, 3, 4]
+    assert [result.index for result in results if not result.ok] == [1]
+    assert probe.peak == 2
+    assert (stats.completed, stats.failed) == (4, 1)
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from benchmarks import run
+from benchmarks.fakes import FakeChatModel, FakeCritic
+
+
+@pytest.mark.parametrize("variant", sorted(run.VARIANTS))
+def test_every_variant_runs_the_same_number_of_rounds(variant):
+    rounds = 3
+    app = run._build_app(rounds, **run.VARIANTS[variant])
+
+    state = app.invoke(run._input(), run._config(rounds))
+
+    assert sum(isinstance(m, HumanMessage) for m in state["messages"]) == rounds
+    assert isinstance(state["messages"][-1], AIMessage)
+
+
+def test_fakes_are_deterministic_and_report_usage():
+    model = FakeChatModel(response_size=50)
+    prompt = run._input()["messages"]
+    first, second = model.invoke(prompt), model.invoke(prompt)
+
+    assert first.content == second.content and len(first.content) == 50
+    assert first.usage_metadata["output_tokens"] == 12
+    critic = FakeCritic(rounds=2)
+    assert critic({"messages": prompt + [first]}) is not None
+    assert critic({"messages": prompt + [first, HumanMessage(content="c"), second]}) is None
+
+
+def test_compare_reports_only_tracked_regressions():
+    baseline = {
+        "results": {
+            "round_overhead": {"default": {"seconds_per_round": 1.0}, "rounds": 5},
+            "throughput": {"sync": {"items_per_second": 100.0}},
+            "memory": {"full_r2_s1000": {"peak_bytes": 1000, "state_chars": 10}},
+        }
+    }
+    results = {
+        "results": {
+            "round_overhead": {"default": {"seconds_per_round": 1.1}, "rounds": 50},
+            "throughput": {"sync": {"items_per_second": 50.0}},
+            "memory": {"full_r2_s1000": {"peak_bytes": 2000, "state_chars": 100}},
+        }
+    }
+
+    regressions = run.compare(results, baseline, tolerance=0.2)
+
+    assert [r.split(":")[0] for r in regressions] == [
+        "throughput.sync.items_per_second",
+        "memory.full_r2_s1000.peak_bytes",
+    ]
+    assert run.compare(baseline, baseline, tolerance=0.0) == []
+
+
+def test_memory_benchmark_checks_that_compaction_drops_drafts(tmp_path, monkeypatch):
+    output = tmp_path / "results.json"
+    assert run.main(["--only", "memory", "--quick", "-o", str(output)]) == 0
+
+    results = json.loads(output.read_text())["results"]["memory"]
+    assert results["compacted_r8_s10000"]["full_drafts"] == 1
+    assert results["full_r8_s10000"]["full_drafts"] == 8
+
+    # A compaction that keeps every draft must fail the benchmark
+    monkeypatch.setattr(
+        "langgraph_reflection.compaction.compact_messages",
+        lambda messages, **kwargs: list(messages),
+    )
+    with pytest.raises(RuntimeError, match="compaction kept"):
+        run.bench_memory(quick=True)
@@ -0,0 +1,75 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+from langgraph_reflection import (
+    InMemoryBlobStore,
+    blob_offloading,
+    create_reflection_graph,
+    hydrate_messages,
+    offload_messages,
+)
+from langgraph_reflection.blobs import BLOB_METADATA_KEY
+
+
+def test_offloaded_drafts_hydrate_to_the_originals():
+    store = InMemoryBlobStore()
+    messages = [
+        HumanMessage(content="Write a haiku", id="question"),
+        AIMessage(
+            content="first draft",
+            id="draft-1",
+            name="poet",
+            additional_kwargs={"refusal": None},
+            response_metadata={"model_name": "small", "finish_reason": "stop"},
+            usage_metadata={"input_tokens": 3, "output_tokens": 2, "total_tokens": 5},
+        ),
+        HumanMessage(content="Too short", id="critique-1"),
+        AIMessage(content=[{"type": "text", "text": "second draft"}], id="draft-2"),
+        HumanMessage(content="Still too short", id="critique-2"),
+        AIMessage(content="third draft", id="draft-3"),
+    ]
+
+    offloaded = offload_messages(messages, store=store, keep_drafts=1)
+    assert [BLOB_METADATA_KEY in m.response_metadata for m in offloaded] == [
+        False, True, False, True, False, False
+    ]
+    assert offloaded[1].name == "poet"
+    assert hydrate_messages(offloaded, store) == messages
+
+
+def as_graph(node):
+    graph = StateGraph(MessagesState)
+    graph.add_node("node", node)
+    graph.add_edge(START, "node")
+    graph.add_edge("node", END)
+    return graph.compile()
+
+
+def assistant(state):
+    count = sum(isinstance(m, AIMessage) for m in state["messages"])
+    return {"messages": [AIMessage(content=f"draft {count + 1} " + "x" * 100)]}
+
+
+def judge(state):
+    if not state["messages"][-1].content.startswith("draft 3"):
+        return {"messages": [HumanMessage(content="Again.")]}
+    return {"messages": []}
+
+
+@pytest.mark.parametrize("critic", [judge, as_graph(judge)], ids=["function", "subgraph"])
+def test_finished_run_keeps_only_the_latest_drafts(critic):
+    store = InMemoryBlobStore()
+    app = create_reflection_graph(
+        as_graph(assistant), critic, compaction=blob_offloading(store, keep_drafts=1)
+    ).compile()
+    result = app.invoke({"messages": [HumanMessage(content="Write")]})
+
+    drafts = [m for m in result["messages"] if isinstance(m, AIMessage)]
+    inline = [m for m in drafts if BLOB_METADATA_KEY not in m.response_metadata]
+    assert len(drafts) == 3
+    assert [m.content[:7] for m in inline] == ["draft 3"]
+    hydrated = hydrate_messages(result["messages"], store)
+    assert [m.content[:7] for m in hydrated if isinstance(m, AIMessage)] == [
+        "draft 1", "draft 2", "draft 3"
+    ]
@@ -0,0 +1,111 @@
+import asyncio
+
+from langgraph_reflection import LRUCache, SQLiteCache, VerdictCache, cache_key
+
+
+def test_cache_key_depends_on_content_and_config_only():
+    assert cache_key({"b": 1, "a": 2}, {"judge": "pyright"}) == cache_key(
+        {"a": 2, "b": 1}, {"judge": "pyright"}
+    )
+    assert cache_key("x = 1", {"judge": "pyright"}) != cache_key("x = 1", {"judge": "llm"})
+    assert cache_key("x = 1") != cache_key("x = 2")
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_lru_entries_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("langgraph_reflection.cache.time.monotonic", lambda: now[0])
+    cache = LRUCache(ttl=10)
+    cache.set("a", 1)
+    now[0] += 9
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_lru_keeps_falsy_values():
+    cache = LRUCache()
+    cache.set("empty", None)
+    assert cache.get("empty", "missing") is None
+    assert cache.get("other", "missing") == "missing"
+
+
+def test_sqlite_tier_survives_a_new_cache_and_promotes_hits(tmp_path):
+    path = str(tmp_path / "verdicts.sqlite")
+    VerdictCache(path=path).set("key", {"score": True, "comment": "[]"})
+
+    cache = VerdictCache(path=path)
+    assert cache.get("key") == {"score": True, "comment": "[]"}
+    assert cache.get("key") == {"score": True, "comment": "[]"}
+    assert cache.stats == {"hits": 2, "misses": 0, "disk_hits": 1, "memory_entries": 1}
+
+
+def test_sqlite_tier_evicts_beyond_max_entries(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "verdicts.sqlite"), max_entries=2)
+    for key in ["a", "b", "c"]:
+        cache.set(key, key)
+    assert cache.get("a") is None
+    assert (cache.get("b"), cache.get("c")) == ("b", "c")
+    cache.close()
+
+
+def test_get_or_compute_computes_once():
+    calls = []
+    cache = VerdictCache()
+
+    def compute():
+        calls.append(1)
+        return {"score": False}
+
+    async def acompute():
+        calls.append(1)
+        return {"score": True}
+
+    assert cache.get_or_compute("code", {"judge": "pyright"}, compute) == {"score": False}
+    assert cache.get_or_compute("code", {"judge": "pyright"}, compute) == {"score": False}
+    assert asyncio.run(cache.aget_or_compute("code", {"judge": "llm"}, acompute)) == {"score": True}
+    assert asyncio.run(cache.aget_or_compute("code", {"judge": "llm"}, acompute)) == {"score": True}
+    assert len(calls) == 2
+
+
+def test_judge_reuses_pyright_verdicts(monkeypatch):
+    from examples.coding import judge
+
+    runs = []
+    monkeypatch.setattr(judge, "get_default_verdict_cache", lambda: cache)
+    monkeypatch.setattr(
+        judge, "run_pyright", lambda code: runs.append(code) or {"score": True, "comment": "[]"}
+    )
+    cache = VerdictCache()
+
+    assert judge.run_pyright_cached("x = 1\n")["score"]
+    assert judge.run_pyright_cached("x = 1\n")["score"]
+    assert runs == ["x = 1\n"]
+
+
+def test_judge_does_not_cache_unparsed_pyright_output(monkeypatch):
+    from examples.coding import judge
+
+    runs = []
+    monkeypatch.setattr(judge, "get_default_verdict_cache", lambda: cache)
+    monkeypatch.setattr(
+        judge,
+        "run_pyright",
+        lambda code: runs.append(code) or {"score": False, "comment": "Failed to parse Pyright output: "},
+    )
+    cache = VerdictCache()
+
+    judge.run_pyright_cached("x = 1\n")
+    judge.run_pyright_cached("x = 1\n")
+    assert len(runs) == 2
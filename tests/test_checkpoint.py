@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+from langgraph_reflection import aresume_reflection, create_reflection_graph, resume_reflection
+
+
+class Crash(Exception):
+    pass
+
+
+def build_app(calls: list, crash_on: set):
+    """An assistant that is never accepted, and crashes on the given calls."""
+
+    def assistant(state):
+        calls.append(len(calls) + 1)
+        if len(calls) in crash_on:
+            crash_on.discard(len(calls))
+            raise Crash
+        return {"messages": [AIMessage(content=f"draft {len(calls)}")]}
+
+    def judge(state):
+        return {"messages": [HumanMessage(content="Again.")]}
+
+    assistant_graph = StateGraph(MessagesState)
+    assistant_graph.add_node("assistant", assistant)
+    assistant_graph.add_edge(START, "assistant")
+    assistant_graph.add_edge("assistant", END)
+    return create_reflection_graph(assistant_graph.compile(), judge).compile(
+        checkpointer=InMemorySaver()
+    )
+
+
+def drafts(result):
+    return [m.content for m in result["messages"] if isinstance(m, AIMessage)]
+
+
+def test_resumed_run_keeps_the_recursion_budget():
+    config = {"configurable": {"thread_id": "budget"}, "recursion_limit": 10}
+    uninterrupted = resume_reflection(
+        build_app([], set()), {"messages": [HumanMessage(content="Go")]}, config
+    )
+
+    calls: list = []
+    app = build_app(calls, {3, 4})
+    for _ in range(2):
+        with pytest.raises(Crash):
+            resume_reflection(app, {"messages": [HumanMessage(content="Go")]}, config)
+    resumed = resume_reflection(app, None, config)
+
+    assert len(drafts(resumed)) == len(drafts(uninterrupted))
+
+
+def test_async_resumed_run_keeps_the_recursion_budget():
+    config = {"configurable": {"thread_id": "budget"}, "recursion_limit": 10}
+    uninterrupted = asyncio.run(
+        aresume_reflection(build_app([], set()), {"messages": [HumanMessage(content="Go")]}, config)
+    )
+
+    calls: list = []
+    app = build_app(calls, {3})
+    with pytest.raises(Crash):
+        asyncio.run(aresume_reflection(app, {"messages": [HumanMessage(content="Go")]}, config))
+    resumed = asyncio.run(aresume_reflection(app, None, config))
+
+    assert len(drafts(resumed)) == len(drafts(uninterrupted))
@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+from langgraph_reflection import (
+    clear_client_registry,
+    configure_rate_limits,
+    get_chat_model,
+    get_evaluator,
+)
+from langgraph_reflection import ratelimit
+
+
+@pytest.fixture
+def built(monkeypatch):
+    """Replace ``init_chat_model`` and record the clients it builds."""
+    import langchain.chat_models
+
+    calls = []
+
+    def init_chat_model(**kwargs):
+        calls.append(kwargs)
+        return object()
+
+    monkeypatch.setattr(langchain.chat_models, "init_chat_model", init_chat_model)
+    clear_client_registry()
+    yield calls
+    clear_client_registry()
+
+
+def test_same_arguments_share_one_client(built):
+    first = get_chat_model("gpt-4o-mini", model_provider="azure_openai", temperature=0.2)
+    second = get_chat_model("gpt-4o-mini", model_provider="azure_openai", temperature=0.2)
+    other = get_chat_model("gpt-4o-mini", model_provider="azure_openai", temperature=0.7)
+
+    assert first is second
+    assert other is not first
+    assert len(built) == 2
+
+
+def test_unhashable_arguments_are_part_of_the_key(built):
+    first = get_chat_model("fake:model", stop=["a"], model_kwargs={"seed": 1})
+    assert get_chat_model("fake:model", stop=["a"], model_kwargs={"seed": 1}) is first
+    assert get_chat_model("fake:model", stop=["a"], model_kwargs={"seed": 2}) is not first
+
+
+def test_concurrent_callers_build_the_client_once(built):
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(get_chat_model("fake:model")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(built) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_scheduled_providers_get_no_sdk_retries(built, monkeypatch):
+    monkeypatch.setattr(ratelimit, "_schedulers", {})
+    get_chat_model("unscheduled:model")
+    configure_rate_limits("scheduled", requests_per_minute=60)
+    get_chat_model("scheduled:model")
+    get_chat_model("model", model_provider="scheduled", max_retries=2)
+
+    assert "max_retries" not in built[0]
+    assert built[1]["max_retries"] == 0
+    assert built[2]["max_retries"] == 2
+
+
+def test_clearing_the_registry_rebuilds_clients(built):
+    first = get_chat_model("fake:model")
+    clear_client_registry()
+    assert get_chat_model("fake:model") is not first
+    assert len(built) == 2
+
+
+def test_evaluators_are_shared_per_factory_and_arguments(built):
+    created = []
+
+    def factory(**kwargs):
+        created.append(kwargs)
+        return object()
+
+    judge = get_evaluator(factory, prompt="p", feedback_key="pass")
+    assert get_evaluator(factory, prompt="p", feedback_key="pass") is judge
+    assert get_evaluator(factory, prompt="q", feedback_key="pass") is not judge
+    assert created == [{"prompt": "p", "feedback_key": "pass"}, {"prompt": "q", "feedback_key": "pass"}]
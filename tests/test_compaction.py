@@ -0,0 +1,102 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+from langgraph_reflection import create_reflection_graph
+from langgraph_reflection.compaction import SUPERSEDED_DRAFT_PREFIX, compact_messages
+
+
+def as_graph(node):
+    graph = StateGraph(MessagesState)
+    graph.add_node("node", node)
+    graph.add_edge(START, "node")
+    graph.add_edge("node", END)
+    return graph.compile()
+
+
+def assistant(state):
+    count = sum(isinstance(m, AIMessage) for m in state["messages"])
+    return {"messages": [AIMessage(content=f"draft {count + 1} " + "x" * 100)]}
+
+
+def judge(state):
+    if not state["messages"][-1].content.startswith("draft 3"):
+        return {"messages": [HumanMessage(content="Again.")]}
+    return {"messages": []}
+
+
+@pytest.mark.parametrize("critic", [judge, as_graph(judge)], ids=["function", "subgraph"])
+def test_finished_run_keeps_only_the_last_draft(critic):
+    app = create_reflection_graph(as_graph(assistant), critic, compaction=True).compile()
+
+    result = app.invoke({"messages": [HumanMessage(content="Write")]})
+
+    contents = [str(m.content) for m in result["messages"]]
+    assert contents[0] == "Write"
+    assert [c.startswith(SUPERSEDED_DRAFT_PREFIX) for c in contents[1:]] == [
+        True, False, True, False, False
+    ]
+    assert contents[-1].startswith("draft 3")
+
+
+def conversation():
+    return [
+        HumanMessage(content="Write", id="task"),
+        AIMessage(content="draft 1", id="d1"),
+        HumanMessage(content="Fix a", id="c1"),
+        AIMessage(content="", id="call", tool_calls=[{"name": "lookup", "args": {}, "id": "t1"}]),
+        ToolMessage(content="result", tool_call_id="t1", id="tool"),
+        AIMessage(content="draft 2", id="d2"),
+        HumanMessage(content="Fix b", id="c2"),
+        AIMessage(content="draft 3", id="d3"),
+    ]
+
+
+def test_superseded_drafts_become_placeholders():
+    compacted = compact_messages(conversation())
+
+    assert [m.id for m in compacted] == ["task", "d1", "c1", "d2", "c2", "d3"]
+    assert compacted[1].content.startswith(SUPERSEDED_DRAFT_PREFIX)
+    assert compacted[3].content.startswith(SUPERSEDED_DRAFT_PREFIX)
+    assert compacted[-1].content == "draft 3"
+
+
+def test_keep_rounds_keeps_the_latest_rounds_verbatim():
+    compacted = compact_messages(conversation(), keep_rounds=2)
+
+    assert [m.id for m in compacted] == ["task", "d1", "c1", "call", "tool", "d2", "c2", "d3"]
+    assert compacted[1].content.startswith(SUPERSEDED_DRAFT_PREFIX)
+    assert compacted[5].content == "draft 2"
+
+
+def test_drop_mode_keeps_only_the_critiques_of_superseded_rounds():
+    compacted = compact_messages(conversation(), mode="drop")
+
+    assert [m.id for m in compacted] == ["task", "c1", "c2", "d3"]
+
+
+def test_compaction_is_stable():
+    once = compact_messages(conversation())
+    assert compact_messages(once) == once
+    assert compact_messages(conversation()[:1]) == conversation()[:1]
+
+
+@pytest.mark.parametrize("critic", [judge, as_graph(judge)], ids=["function", "subgraph"])
+@pytest.mark.parametrize("wrap", [lambda node: node, as_graph], ids=["node", "graph"])
+def test_assistant_only_sees_the_compacted_history(critic, wrap):
+    seen = []
+
+    def recording_assistant(state):
+        seen.append([str(m.content) for m in state["messages"]])
+        return assistant(state)
+
+    app = create_reflection_graph(wrap(recording_assistant), critic, compaction=True).compile()
+    result = app.invoke({"messages": [HumanMessage(content="Write")]})
+
+    assert len(seen) == 3
+    third = seen[-1]
+    assert third[0] == "Write"
+    assert third[1].startswith(SUPERSEDED_DRAFT_PREFIX)
+    assert third[3].startswith("draft 2")
+    # The compaction is written back to the state, not just sent to the model
+    assert str(result["messages"][1].content).startswith(SUPERSEDED_DRAFT_PREFIX)
@@ -0,0 +1,55 @@
+import gc
+import weakref
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+from langgraph_reflection import LRUCache, compile_reflection_graph
+
+
+def assistant(state):
+    return {"messages": [AIMessage(content="draft")]}
+
+
+def build_assistant():
+    graph = StateGraph(MessagesState)
+    graph.add_node("assistant", assistant)
+    graph.add_edge(START, "assistant")
+    graph.add_edge("assistant", END)
+    return graph.compile()
+
+
+def make_critic(text):
+    def critic(state):
+        return {"messages": [HumanMessage(content=text)]} if text else {"messages": []}
+
+    return critic
+
+
+def test_cached_graph_keeps_its_sources_alive():
+    cache = LRUCache()
+    critic = make_critic(None)
+    ref = weakref.ref(critic)
+    compile_reflection_graph(build_assistant(), critic, cache=cache)
+    del critic
+    gc.collect()
+    assert ref() is not None
+
+
+def test_key_match_with_other_sources_recompiles():
+    assistant_graph = build_assistant()
+    passing, failing = make_critic(None), make_critic("again")
+    cache = LRUCache()
+    compile_reflection_graph(assistant_graph, passing, cache=cache)
+    (passing_key,) = cache._data
+    other = LRUCache()
+    compile_reflection_graph(assistant_graph, failing, cache=other)
+    (failing_key,) = other._data
+    # As if `failing` had reused the id of a freed `passing`
+    cache.set(failing_key, cache.get(passing_key))
+
+    app = compile_reflection_graph(assistant_graph, failing, cache=cache)
+
+    result = app.invoke({"messages": [HumanMessage(content="go")]}, {"recursion_limit": 6})
+    assert result["messages"][-1].content == "again"
+    assert app is compile_reflection_graph(assistant_graph, failing, cache=cache)
@@ -0,0 +1,102 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+from langgraph_reflection import create_reflection_graph
+from langgraph_reflection.convergence import ESCALATION_PROMPT
+
+
+def as_graph(node):
+    graph = StateGraph(MessagesState)
+    graph.add_node("node", node)
+    graph.add_edge(START, "node")
+    graph.add_edge("node", END)
+    return graph.compile()
+
+
+def drafts_in(state):
+    return sum(isinstance(m, AIMessage) for m in state["messages"])
+
+
+def assistant_writing(drafts):
+    def assistant(state):
+        return {"messages": [AIMessage(content=drafts[drafts_in(state) % len(drafts)])]}
+
+    return assistant
+
+
+def stubborn_assistant(state):
+    return {"messages": [AIMessage(content="  the same\n answer ")]}
+
+
+def numbered_assistant(state):
+    return {"messages": [AIMessage(content=f"answer {drafts_in(state)}")]}
+
+
+def numbered_judge(state):
+    return {"messages": [HumanMessage(content=f"Still wrong ({drafts_in(state)}).")]}
+
+
+def repetitive_judge(state):
+    return {"messages": [HumanMessage(content="Still wrong.")]}
+
+
+def run(assistant, judge, **kwargs):
+    app = create_reflection_graph(
+        as_graph(assistant), judge, detect_convergence=True, **kwargs
+    ).compile()
+    return app.invoke({"messages": [HumanMessage(content="Write")]}, {"recursion_limit": 50})
+
+
+def test_repeated_draft_ends_the_loop():
+    result = run(stubborn_assistant, numbered_judge)
+
+    assert result["termination_reason"] == "repeated_draft"
+    assert drafts_in(result) == 2
+
+
+def test_repeated_critique_ends_the_loop():
+    result = run(numbered_assistant, repetitive_judge)
+
+    assert result["termination_reason"] == "repeated_critique"
+    assert drafts_in(result) == 2
+
+
+def test_returning_to_an_older_draft_is_an_oscillation():
+    result = run(assistant_writing(["a", "b"]), numbered_judge)
+
+    assert result["termination_reason"] == "oscillation"
+    assert [m.content for m in result["messages"] if isinstance(m, AIMessage)] == ["a", "b", "a"]
+
+
+def test_accepted_draft_is_recorded():
+    result = run(numbered_assistant, lambda state: None)
+
+    assert result["termination_reason"] == "accepted"
+    assert drafts_in(result) == 1
+
+
+def test_escalates_once_before_ending():
+    result = run(stubborn_assistant, numbered_judge, on_convergence="escalate")
+
+    critiques = [m.content for m in result["messages"][1:] if isinstance(m, HumanMessage)]
+    assert [ESCALATION_PROMPT.format(what="draft") in c for c in critiques] == [False, True, False]
+    assert result["termination_reason"] == "repeated_draft"
+    assert drafts_in(result) == 3
+
+
+@pytest.mark.parametrize("wrap", [lambda judge: judge, as_graph], ids=["function", "subgraph"])
+def test_a_new_run_on_the_thread_starts_a_fresh_history(wrap):
+    app = create_reflection_graph(
+        as_graph(stubborn_assistant), wrap(numbered_judge), detect_convergence=True
+    ).compile(checkpointer=InMemorySaver())
+    config = {"configurable": {"thread_id": "t"}, "recursion_limit": 50}
+
+    app.invoke({"messages": [HumanMessage(content="Write")]}, config)
+    result = app.invoke({"messages": [HumanMessage(content="Write it again")]}, config)
+
+    # The second run's first draft repeats the first run's, which does not
+    # count: it only stops once it repeats a draft of its own
+    assert result["termination_reason"] == "repeated_draft"
+    assert drafts_in(result) == 4
@@ -0,0 +1,186 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+from langgraph_reflection import create_critic_cascade, create_parallel_critics, create_reflection_graph
+
+
+def as_graph(node):
+    graph = StateGraph(MessagesState)
+    graph.add_node("node", node)
+    graph.add_edge(START, "node")
+    graph.add_edge("node", END)
+    return graph.compile()
+
+
+def recording_critic(name, calls, critique=None):
+    def critic(state):
+        calls.append(name)
+        return {"messages": [HumanMessage(content=critique)]} if critique else {"messages": []}
+
+    return critic
+
+
+def test_parallel_critiques_keep_patch_mode_code(monkeypatch):
+    monkeypatch.setenv("CODE_REVISION_MODE", "patch")
+    from examples.coding.judge import resolve_code_locally, revision_request
+
+    code = "def add(a, b):\n    return a - b\n"
+
+    def type_checker(state):
+        return revision_request("add returns the wrong result", code)
+
+    def style_checker(state):
+        return {"messages": [HumanMessage(content="Add a docstring.")]}
+
+    state = {"messages": [HumanMessage(content="Write add"), AIMessage(content=code)]}
+    critics = create_parallel_critics([type_checker, style_checker])
+    (critique,) = critics.invoke(state)["messages"]
+
+    assert "add returns the wrong result" in critique.content
+    assert "Add a docstring." in critique.content
+    next_draft = AIMessage(content="<<<<<<< SEARCH\n    return a - b\n=======\n    return a + b\n>>>>>>> REPLACE")
+    patched, from_edits = resolve_code_locally([*state["messages"], critique, next_draft])
+    assert from_edits
+    assert patched == code.replace("a - b", "a + b")
+
+
+def test_cascade_stops_at_the_first_critique():
+    calls = []
+    cascade = create_critic_cascade(
+        [
+            recording_critic("syntax", calls),
+            as_graph(recording_critic("types", calls, "Fix the types.")),
+            recording_critic("llm", calls, "Too long."),
+        ]
+    )
+    state = {"messages": [HumanMessage(content="Write"), AIMessage(content="draft")]}
+
+    result = cascade.invoke(state)
+
+    assert calls == ["syntax", "types"]
+    assert result["messages"][-1].content == "Fix the types."
+
+
+def test_cascade_runs_every_critic_when_all_pass():
+    calls = []
+    cascade = create_critic_cascade([recording_critic(name, calls) for name in ["a", "b", "c"]])
+
+    result = cascade.invoke({"messages": [HumanMessage(content="Write"), AIMessage(content="draft")]})
+
+    assert calls == ["a", "b", "c"]
+    assert isinstance(result["messages"][-1], AIMessage)
+
+
+def test_reflection_graph_takes_a_list_of_critics():
+    calls = []
+
+    def assistant(state):
+        count = sum(isinstance(m, AIMessage) for m in state["messages"])
+        return {"messages": [AIMessage(content=f"draft {count + 1}")]}
+
+    def syntax(state):
+        calls.append("syntax")
+        if state["messages"][-1].content == "draft 1":
+            return {"messages": [HumanMessage(content="Syntax error.")]}
+        return None
+
+    app = create_reflection_graph(
+        as_graph(assistant), [syntax, as_graph(recording_critic("judge", calls))]
+    ).compile()
+
+    result = app.invoke({"messages": [HumanMessage(content="Write")]})
+
+    assert calls == ["syntax", "syntax", "judge"]
+    assert [m.content for m in result["messages"]] == ["Write", "draft 1", "Syntax error.", "draft 2"]
+
+
+def test_unknown_critic_mode_and_empty_cascade_are_rejected():
+    critics = [recording_critic("a", []), recording_critic("b", [])]
+    with pytest.raises(ValueError, match="critic_mode"):
+        create_reflection_graph(as_graph(recording_critic("x", [])), critics, critic_mode="vote")
+    with pytest.raises(ValueError):
+        create_critic_cascade([])
+
+
+DRAFT = {"messages": [HumanMessage(content="Write"), AIMessage(content="draft")]}
+
+
+def sleeping_critic(seconds, critique=None):
+    def critic(state):
+        time.sleep(seconds)
+        return {"messages": [HumanMessage(content=critique)]} if critique else None
+
+    async def acritic(state):
+        await asyncio.sleep(seconds)
+        return {"messages": [HumanMessage(content=critique)]} if critique else None
+
+    return RunnableLambda(critic, afunc=acritic)
+
+
+def test_parallel_critics_run_at_the_same_time():
+    critics = create_parallel_critics(
+        [sleeping_critic(0.3, "Second."), sleeping_critic(0.3), as_graph(sleeping_critic(0.3, "Third."))]
+    )
+
+    start = time.monotonic()
+    (critique,) = critics.invoke(DRAFT)["messages"]
+
+    assert time.monotonic() - start < 0.6
+    # Merged in the order the critics were given, not the order they finished
+    assert critique.content == "Second.\n\nThird."
+
+
+def test_parallel_critics_pass_when_no_critic_objects():
+    critics = create_parallel_critics([sleeping_critic(0), as_graph(recording_critic("b", []))])
+    assert critics.invoke(DRAFT) is None
+    assert asyncio.run(critics.ainvoke(DRAFT)) is None
+
+
+def test_fail_fast_returns_without_waiting_for_slow_critics():
+    release = threading.Event()
+
+    def slow(state):
+        release.wait(5)
+        return {"messages": [HumanMessage(content="Too late.")]}
+
+    critics = create_parallel_critics([slow, sleeping_critic(0.05, "Quick.")], fail_fast=True)
+    start = time.monotonic()
+    try:
+        (critique,) = critics.invoke(DRAFT)["messages"]
+    finally:
+        release.set()
+
+    assert time.monotonic() - start < 2
+    assert critique.content == "Quick."
+
+
+def test_async_fail_fast_cancels_the_critics_still_running():
+    cancelled = []
+
+    async def aslow(state):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    slow = RunnableLambda(lambda state: None, afunc=aslow)
+    critics = create_parallel_critics([slow, sleeping_critic(0.05, "Quick.")], fail_fast=True)
+
+    async def run():
+        result = await critics.ainvoke(DRAFT)
+        await asyncio.sleep(0)
+        return result
+
+    start = time.monotonic()
+    (critique,) = asyncio.run(run())["messages"]
+
+    assert time.monotonic() - start < 2
+    assert critique.content == "Quick."
+    assert cancelled == [True]
@@ -0,0 +1,99 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+from langgraph_reflection import (
+    create_reflection_graph,
+    critique_count,
+    is_critique,
+    select_model_tier,
+    with_critique_marker,
+)
+
+LADDER = ["small", "large"]
+
+
+def build_app(rungs: list[int]):
+    def assistant(state: MessagesState) -> dict:
+        index, tier = select_model_tier(LADDER, state["messages"])
+        rungs.append(index)
+        return {"messages": [AIMessage(content=f"draft by {tier['model']}")]}
+
+    def judge(state: MessagesState) -> dict:
+        # Reject the first draft of every run, accept the second
+        if state["messages"][-1].content == "draft by small":
+            return {"messages": [HumanMessage(content="Try harder.")]}
+        return {}
+
+    assistant_graph = StateGraph(MessagesState)
+    assistant_graph.add_node("assistant", assistant)
+    assistant_graph.add_edge(START, "assistant")
+    assistant_graph.add_edge("assistant", END)
+    judge_graph = StateGraph(MessagesState)
+    judge_graph.add_node("judge", judge)
+    judge_graph.add_edge(START, "judge")
+    judge_graph.add_edge("judge", END)
+    return create_reflection_graph(
+        assistant_graph.compile(), judge_graph.compile()
+    ).compile(checkpointer=InMemorySaver())
+
+
+def test_second_turn_starts_on_first_rung():
+    rungs: list[int] = []
+    app = build_app(rungs)
+    config = {"configurable": {"thread_id": "two-turns"}}
+
+    app.invoke({"messages": [HumanMessage(content="First question")]}, config)
+    assert rungs == [0, 1]
+
+    result = app.invoke({"messages": [HumanMessage(content="Second question")]}, config)
+    assert rungs == [0, 1, 0, 1]
+    assert result["messages"][-1].content == "draft by large"
+
+
+def test_unmarked_user_messages_are_not_critiques():
+    messages = [
+        HumanMessage(content="First question"),
+        AIMessage(content="answer"),
+        HumanMessage(content="Second question"),
+    ]
+    assert critique_count(messages) == 0
+
+
+def as_graph(node):
+    graph = StateGraph(MessagesState)
+    graph.add_node("node", node)
+    graph.add_edge(START, "node")
+    graph.add_edge("node", END)
+    return graph.compile()
+
+
+def rejecting_judge(state):
+    return {"messages": [HumanMessage(content="Try harder.")]}
+
+
+@pytest.mark.parametrize("wrap", [lambda judge: judge, as_graph], ids=["function", "subgraph"])
+def test_only_critiques_are_marked(wrap):
+    def assistant(state):
+        return {"messages": [AIMessage(content="draft")]}
+
+    app = create_reflection_graph(as_graph(assistant), wrap(rejecting_judge)).compile()
+
+    result = app.invoke({"messages": [HumanMessage(content="Question")]}, {"recursion_limit": 7})
+
+    humans = [m for m in result["messages"] if isinstance(m, HumanMessage)]
+    assert len(humans) > 2
+    assert [is_critique(m) for m in humans] == [False] + [True] * (len(humans) - 1)
+    assert critique_count(result["messages"]) == len(humans) - 1
+
+
+@pytest.mark.parametrize("wrap", [lambda judge: judge, as_graph], ids=["function", "subgraph"])
+def test_marker_returns_only_the_new_messages(wrap):
+    state = {"messages": [HumanMessage(content="Question", id="q"), AIMessage(content="draft", id="d")]}
+
+    (critique,) = with_critique_marker(wrap(rejecting_judge)).invoke(state)["messages"]
+
+    assert critique.content == "Try harder."
+    assert is_critique(critique)
+    assert with_critique_marker(wrap(lambda state: {"messages": []})).invoke(state) == {"messages": []}
@@ -0,0 +1,24 @@
+import pytest
+
+from examples.coding.extraction import extract_code_locally
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["Sure", "yes or no", "not really", "-1", "1 + 1", "x < y"],
+)
+def test_prose_that_parses_is_left_to_the_llm(text):
+    assert extract_code_locally(text) is None
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["import os", "x = 1", "def f():\n    return 1", "print('hello')"],
+)
+def test_plain_code_is_extracted(text):
+    assert extract_code_locally(text) == text
+
+
+def test_single_fenced_block_is_extracted():
+    text = "Here you go:\n\n```python\nx = 1\n```\n"
+    assert extract_code_locally(text) == "x = 1\n"
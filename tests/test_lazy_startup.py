@@ -0,0 +1,57 @@
+import importlib.util
+import subprocess
+import sys
+from pathlib import Path
+
+APP_PATH = Path(__file__).resolve().parent.parent / "examples" / "coding.py"
+
+
+def load_app_module():
+    spec = importlib.util.spec_from_file_location("coding_app", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def imported_after(code: str) -> set[str]:
+    """Run ``code`` in a fresh interpreter and return the top-level modules it loaded."""
+    script = f"{code}\nimport sys\nprint(' '.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=APP_PATH.parent.parent,
+    ).stdout
+    return set(output.split())
+
+
+def test_loading_the_app_module_imports_nothing_heavy():
+    loaded = imported_after(
+        "import importlib.util\n"
+        f"spec = importlib.util.spec_from_file_location('coding_app', {str(APP_PATH)!r})\n"
+        "spec.loader.exec_module(importlib.util.module_from_spec(spec))"
+    )
+    assert not loaded & {"langchain", "langchain_core", "langgraph", "langgraph_reflection", "openevals"}
+
+
+def test_loading_the_judge_does_not_import_openevals():
+    assert "openevals" not in imported_after("import examples.coding.judge")
+
+
+def test_the_app_is_built_once_on_first_use(monkeypatch):
+    module = load_app_module()
+    built = []
+    monkeypatch.setattr(module, "create_graphs", lambda: built.append(object()) or built[-1])
+
+    assert built == []
+    app = module.make_graph()
+    assert module.make_graph({"configurable": {}}) is app
+    assert module.reflection_app is app
+    assert built == [app]
+
+
+def test_the_real_app_compiles(monkeypatch):
+    monkeypatch.setenv("CODE_EXECUTION", "off")
+    app = load_app_module().make_graph()
+    assert {"graph", "reflection"} <= set(app.get_graph().nodes)
@@ -0,0 +1,110 @@
+from langchain_core.language_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+from langgraph_reflection import (
+    PrometheusTextExporter,
+    RoundMetrics,
+    create_reflection_graph,
+    record_metric,
+)
+
+
+def as_graph(node):
+    graph = StateGraph(MessagesState)
+    graph.add_node("node", node)
+    graph.add_edge(START, "node")
+    graph.add_edge("node", END)
+    return graph.compile()
+
+
+def assistant(state):
+    draft = sum(isinstance(m, AIMessage) for m in state["messages"]) + 1
+    model = FakeMessagesListChatModel(
+        responses=[
+            AIMessage(
+                content=f"draft {draft}",
+                response_metadata={"model_name": "fake"},
+                usage_metadata={"input_tokens": 10, "output_tokens": 3, "total_tokens": 13},
+            )
+        ]
+    )
+    return {"messages": [model.invoke(state["messages"])]}
+
+
+def judge(state):
+    record_metric("checks", 1)
+    record_metric("checks", 1)
+    record_metric("path", "local")
+    if state["messages"][-1].content != "draft 2":
+        return {"messages": [HumanMessage(content="Again.")]}
+    return None
+
+
+class Recorder:
+    def __init__(self):
+        self.rounds = []
+
+    def export_round(self, metrics):
+        self.rounds.append(metrics)
+
+
+def test_every_round_is_measured_and_exported():
+    recorder = Recorder()
+    app = create_reflection_graph(as_graph(assistant), judge, metrics=[recorder]).compile()
+
+    result = app.invoke({"messages": [HumanMessage(content="Write")]})
+
+    assert [(r.round, r.outcome) for r in recorder.rounds] == [(1, "critique"), (2, "accepted")]
+    assert all(r.input_tokens == 10 and r.output_tokens == 3 for r in recorder.rounds)
+    assert recorder.rounds[0].values == {"checks": 2, "path": "local"}
+    assert all(r.assistant_latency > 0 and r.critic_latency > 0 for r in recorder.rounds)
+    totals = result["reflection_metrics"]["totals"]
+    assert (totals["rounds"], totals["input_tokens"], totals["outcome"]) == (2, 20, "accepted")
+
+
+def test_a_new_run_on_the_thread_starts_counting_again():
+    app = create_reflection_graph(as_graph(assistant), judge, metrics=True).compile(
+        checkpointer=InMemorySaver()
+    )
+    config = {"configurable": {"thread_id": "t"}, "recursion_limit": 10}
+    app.invoke({"messages": [HumanMessage(content="Write")]}, config)
+    # The judge never accepts a third draft, so this run ends out of steps
+    result = app.invoke({"messages": [HumanMessage(content="Again")]}, config)
+
+    rounds = result["reflection_metrics"]["rounds"]
+    assert [r["round"] for r in rounds] == [1, 2, 3, 4]
+    assert all(r["outcome"] == "critique" for r in rounds)
+
+
+def test_record_metric_outside_a_round_is_ignored():
+    record_metric("checks", 1)
+
+
+def test_prometheus_text(tmp_path):
+    path = tmp_path / "reflection.prom"
+    exporter = PrometheusTextExporter(path=str(path))
+    exporter.export_round(
+        RoundMetrics(
+            round=1,
+            assistant_latency=1.5,
+            critic_latency=0.5,
+            input_tokens=10,
+            output_tokens=3,
+            outcome="critique",
+            values={"pyright_seconds": 0.25, "path": 'say "hi"'},
+        )
+    )
+    exporter.export_round(RoundMetrics(round=2, assistant_latency=0.5, outcome="accepted"))
+
+    text = path.read_text()
+    assert text == exporter.render()
+    lines = text.splitlines()
+    assert 'reflection_rounds_total{outcome="accepted"} 1' in lines
+    assert 'reflection_rounds_total{outcome="critique"} 1' in lines
+    assert "reflection_assistant_seconds_sum 2.0" in lines
+    assert "reflection_assistant_seconds_count 2" in lines
+    assert 'reflection_tokens_total{direction="input"} 10' in lines
+    assert 'reflection_value_total{name="pyright_seconds"} 0.25' in lines
+    assert 'reflection_label_total{name="path",value="say \\"hi\\""} 1' in lines
@@ -0,0 +1,117 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from examples.coding.patching import PatchError, apply_edits
+
+TWO_FUNCTIONS = """def first(items):
+    for item in items:
+        print(item)
+    return None
+
+
+def second(items):
+    for item in items:
+        print(item)
+    return None
+"""
+
+
+def test_ambiguous_hunk_is_rejected():
+    diff = """@@ -1,3 +1,3 @@
+     for item in items:
+-        print(item)
++        print(item * 2)
+"""
+    with pytest.raises(PatchError, match="matches 2 places"):
+        apply_edits(TWO_FUNCTIONS, diff)
+
+
+def test_hunk_with_enough_context_is_applied_once():
+    diff = """@@ -7,3 +7,3 @@
+ def second(items):
+     for item in items:
+-        print(item)
++        print(item * 2)
+"""
+    patched = apply_edits(TWO_FUNCTIONS, diff)
+    assert patched.count("print(item * 2)") == 1
+    assert patched.index("print(item * 2)") > patched.index("def second")
+
+
+def test_ambiguous_search_block_is_rejected():
+    edit = "<<<<<<< SEARCH\n        print(item)\n=======\n        print(item * 2)\n>>>>>>> REPLACE"
+    with pytest.raises(PatchError, match="matches 2 places"):
+        apply_edits(TWO_FUNCTIONS, edit)
+
+
+def test_ambiguous_edit_asks_for_the_whole_program(monkeypatch):
+    monkeypatch.setenv("CODE_REVISION_MODE", "patch")
+    from examples.coding.judge import REFLECTION_CODE_KEY, check_syntax
+
+    messages = [
+        HumanMessage(content="Write two printers"),
+        AIMessage(content=f"```python\n{TWO_FUNCTIONS}```"),
+        HumanMessage(content="Double them.", additional_kwargs={REFLECTION_CODE_KEY: TWO_FUNCTIONS}),
+        AIMessage(content="@@ -2,2 +2,2 @@\n     for item in items:\n-        print(item)\n+        print(item * 2)\n"),
+    ]
+    (critique,) = check_syntax({"messages": messages})["messages"]
+    assert "could not be applied" in critique.content
+    assert critique.additional_kwargs[REFLECTION_CODE_KEY] == TWO_FUNCTIONS
+
+
+def test_search_replace_blocks_apply_in_order():
+    edits = (
+        "<<<<<<< SEARCH\ndef first(items):\n=======\ndef first(values):\n>>>>>>> REPLACE\n\n"
+        "<<<<<<< SEARCH\ndef first(values):\n    for item in items:\n"
+        "=======\ndef first(values):\n    for item in values:\n>>>>>>> REPLACE"
+    )
+    patched = apply_edits(TWO_FUNCTIONS, edits)
+    assert patched.startswith("def first(values):\n    for item in values:\n")
+    assert "def second(items):" in patched
+
+
+def test_hunk_offsets_and_trailing_whitespace_are_ignored():
+    diff = """--- a/snippet.py
++++ b/snippet.py
+@@ -40,2 +40,2 @@
+ def second(items):   
+-    for item in items:
++    for item in sorted(items):
+"""
+    patched = apply_edits(TWO_FUNCTIONS, diff)
+    assert patched.count("for item in sorted(items):") == 1
+    assert patched.index("sorted") > patched.index("def second")
+
+
+def test_edits_that_do_not_match_are_rejected():
+    with pytest.raises(PatchError, match="not found"):
+        apply_edits(TWO_FUNCTIONS, "<<<<<<< SEARCH\ndef third():\n=======\n\n>>>>>>> REPLACE")
+    with pytest.raises(PatchError, match="does not match"):
+        apply_edits(TWO_FUNCTIONS, "@@ -1 +1 @@\n-def third():\n+def fourth():\n")
+    with pytest.raises(PatchError, match="No SEARCH/REPLACE"):
+        apply_edits(TWO_FUNCTIONS, "Here is the full program again.")
+
+
+def test_patch_mode_rebuilds_the_draft_from_the_critiqued_code(monkeypatch):
+    monkeypatch.setenv("CODE_REVISION_MODE", "patch")
+    from examples.coding.judge import REFLECTION_CODE_KEY, resolve_code_locally, revision_request
+
+    (critique,) = revision_request("first prints twice", TWO_FUNCTIONS)["messages"]
+    assert critique.additional_kwargs[REFLECTION_CODE_KEY] == TWO_FUNCTIONS
+    messages = [
+        HumanMessage(content="Write two printers"),
+        AIMessage(content=f"```python\n{TWO_FUNCTIONS}```"),
+        critique,
+        AIMessage(content="<<<<<<< SEARCH\ndef first(items):\n=======\ndef first(values):\n>>>>>>> REPLACE"),
+    ]
+    code, patched = resolve_code_locally(messages)
+    assert patched
+    assert code == TWO_FUNCTIONS.replace("def first(items)", "def first(values)")
+
+
+def test_whole_programs_are_used_as_is_outside_patch_mode(monkeypatch):
+    monkeypatch.setenv("CODE_REVISION_MODE", "full")
+    from examples.coding.judge import resolve_code_locally
+
+    messages = [HumanMessage(content="Write"), AIMessage(content=f"```python\n{TWO_FUNCTIONS}```")]
+    assert resolve_code_locally(messages) == (TWO_FUNCTIONS, False)
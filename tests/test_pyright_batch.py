@@ -0,0 +1,45 @@
+import shutil
+import tempfile
+import time
+
+import pytest
+
+from examples.coding.pyright_batch import PyrightBatcher, run_pyright_batch
+from examples.coding.pyright_pool import PyrightWorkerError
+
+
+@pytest.mark.skipif(shutil.which("pyright") is None, reason="pyright is not installed")
+def test_snippets_cannot_import_each_other(monkeypatch):
+    # Pyright resolves local imports for files under the directory it runs in
+    monkeypatch.chdir(tempfile.gettempdir())
+    helper = "def helper() -> int:\n    return 1\n"
+    # Only a type error if the import resolves to the other snippet's helper
+    uses_sibling = "from snippet_0 import helper\n\nvalue: str = helper()\n"
+    passed, comment = run_pyright_batch([helper, uses_sibling])[1]
+    assert passed, comment
+
+
+def test_check_times_out_with_worker_error(monkeypatch):
+    monkeypatch.setattr(
+        "examples.coding.pyright_batch.run_pyright_batch",
+        lambda codes, args, timeout: time.sleep(0.5) or [(True, "[]")] * len(codes),
+    )
+    batcher = PyrightBatcher(window=0.0, timeout=0.1)
+    try:
+        with pytest.raises(PyrightWorkerError):
+            batcher.check("x = 1")
+    finally:
+        batcher.close()
+
+
+def test_failed_batch_raises_worker_error(monkeypatch):
+    def broken(codes, args, timeout):
+        raise FileNotFoundError("pyright")
+
+    monkeypatch.setattr("examples.coding.pyright_batch.run_pyright_batch", broken)
+    batcher = PyrightBatcher(window=0.0)
+    try:
+        with pytest.raises(PyrightWorkerError):
+            batcher.check("x = 1")
+    finally:
+        batcher.close()
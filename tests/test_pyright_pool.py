@@ -0,0 +1,112 @@
+import asyncio
+import json
+import shutil
+
+import pytest
+
+from examples.coding.pyright_pool import (
+    PyrightPool,
+    PyrightWorker,
+    PyrightWorkerError,
+    _diagnostics_to_result,
+)
+
+requires_langserver = pytest.mark.skipif(
+    shutil.which("pyright-langserver") is None, reason="pyright-langserver is not installed"
+)
+
+
+@requires_langserver
+def test_pipelined_documents_get_their_full_diagnostics():
+    worker = PyrightWorker()
+    worker.start()
+    try:
+        futures = [worker.submit("value: str = 1\n") for _ in range(3)]
+        assert [future.result(timeout=30)[0] for future in futures] == [False, False, False]
+        assert worker.pending == 0
+    finally:
+        worker.close()
+
+
+@requires_langserver
+def test_concurrent_documents_cannot_import_each_other():
+    worker = PyrightWorker()
+    worker.start()
+    try:
+        helper = worker.submit("def helper() -> int:\n    return 1\n")
+        # Both documents are called snippet.py; this is only a type error if
+        # the import resolves to the other one
+        uses_sibling = worker.submit("from snippet import helper\n\nvalue: str = helper()\n")
+        assert helper.result(timeout=30) == (True, "[]")
+        passed, comment = uses_sibling.result(timeout=30)
+        assert passed, comment
+    finally:
+        worker.close()
+
+
+def test_errors_other_than_missing_imports_fail():
+    diagnostics = [
+        {"severity": 1, "code": "reportMissingImports", "message": "Import could not be resolved"},
+        {"severity": 2, "code": "reportUnusedVariable", "message": "unused"},
+    ]
+    assert _diagnostics_to_result(diagnostics) == (True, "[]")
+    passed, comment = _diagnostics_to_result(
+        diagnostics + [{"severity": 1, "code": "reportAssignmentType", "message": "bad"}]
+    )
+    assert not passed
+    assert json.loads(comment) == [
+        {"severity": "error", "message": "bad", "range": None, "rule": "reportAssignmentType"}
+    ]
+
+
+def test_missing_server_raises_worker_error():
+    pool = PyrightPool(size=1, command=["pyright-langserver-that-does-not-exist", "--stdio"])
+    with pytest.raises(PyrightWorkerError):
+        pool.check("x = 1\n")
+
+
+@requires_langserver
+def test_pool_restarts_a_dead_worker():
+    pool = PyrightPool(size=1, timeout=30)
+    try:
+        assert pool.check("x: int = 1\n")[0]
+        process = pool._workers[0]._process
+        process.kill()
+        process.wait()
+        assert not pool.check("x: int = 'a'\n")[0]
+        assert pool.restarts == 1
+    finally:
+        pool.close()
+
+
+@requires_langserver
+def test_async_checks_share_the_pool():
+    async def check_all(pool):
+        return await asyncio.gather(*(pool.acheck(f"x: int = {value}\n") for value in ["1", "'a'", "2"]))
+
+    pool = PyrightPool(size=2, timeout=30)
+    try:
+        results = asyncio.run(check_all(pool))
+        assert [passed for passed, _ in results] == [True, False, True]
+    finally:
+        pool.close()
+
+
+def test_judge_falls_back_to_the_cli_when_the_pool_fails(monkeypatch):
+    from examples.coding import judge
+
+    class BrokenPool:
+        def check(self, code):
+            raise PyrightWorkerError("not running")
+
+    cli_calls = []
+    monkeypatch.setenv("PYRIGHT_BACKEND", "pool")
+    monkeypatch.setattr(judge, "get_pyright_pool", BrokenPool)
+    monkeypatch.setattr(
+        judge,
+        "get_evaluator",
+        lambda factory: lambda outputs: cli_calls.append(outputs) or {"score": True, "comment": ""},
+    )
+
+    assert judge.run_pyright("x = 1\n")["score"]
+    assert cli_calls == ["x = 1\n"]
@@ -0,0 +1,23 @@
+import pytest
+
+from langgraph_reflection import ProviderScheduler, RateLimits, get_chat_model, get_scheduler
+
+
+def test_failed_call_gives_its_tokens_back():
+    scheduler = ProviderScheduler("test", RateLimits(tokens_per_minute=600, burst_seconds=60))
+
+    def bad_request(prompt):
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        scheduler.call(bad_request, "x" * 400)
+    assert scheduler._tokens.wait_time(scheduler._tokens.capacity) == 0
+    assert scheduler.stats["retries"] == 0
+
+
+def test_scheduled_provider_clients_leave_retries_to_the_scheduler(monkeypatch):
+    pytest.importorskip("langchain_openai")
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    get_scheduler("openai")
+    assert get_chat_model("openai:gpt-4o-mini").max_retries == 0
+    assert get_chat_model("gpt-4o-mini", model_provider="openai", max_retries=3).max_retries == 3
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+from langgraph_reflection import VerdictCache, create_reflection_graph, response_cache_key
+
+
+def as_graph(node):
+    graph = StateGraph(MessagesState)
+    graph.add_node("node", node)
+    graph.add_edge(START, "node")
+    graph.add_edge("node", END)
+    return graph.compile()
+
+
+def build_app(calls, judge_as_graph, checkpointer=None, **options):
+    def assistant(state):
+        calls.append("assistant")
+        count = sum(isinstance(m, AIMessage) for m in state["messages"])
+        return {"messages": [AIMessage(content=f"draft {count + 1}")]}
+
+    def judge(state):
+        calls.append("judge")
+        if state["messages"][-1].content != "draft 2":
+            return {"messages": [HumanMessage(content="Again.")]}
+        return {"messages": [AIMessage(content="Looks good.")]}
+
+    critic = as_graph(judge) if judge_as_graph else judge
+    return create_reflection_graph(as_graph(assistant), critic, **options).compile(
+        checkpointer=checkpointer
+    )
+
+
+@pytest.mark.parametrize("judge_as_graph", [False, True], ids=["function", "subgraph"])
+def test_repeat_returns_the_accepted_answer_without_calls(judge_as_graph):
+    calls = []
+    cache = VerdictCache()
+    app = build_app(calls, judge_as_graph, response_cache=cache)
+    question = {"messages": [HumanMessage(content="Write")]}
+
+    first = app.invoke(question)
+    stored = cache.get(response_cache_key(question["messages"]))
+    calls.clear()
+    second = app.invoke(question)
+
+    assert [m["data"]["content"] for m in stored] == ["draft 2", "Looks good."]
+    assert calls == []
+    assert [m.content for m in second["messages"]] == ["Write", "draft 2", "Looks good."]
+    assert second["messages"][-1].content == first["messages"][-1].content
+    assert second["response_cache"]["hit"]
+    assert "termination_reason" not in second
+
+
+def test_hit_is_accepted_when_convergence_is_tracked():
+    cache = VerdictCache()
+    app = build_app([], False, response_cache=cache, detect_convergence=True)
+    question = {"messages": [HumanMessage(content="Write")]}
+
+    app.invoke(question)
+    result = app.invoke(question)
+
+    assert result["response_cache"]["hit"]
+    assert result["termination_reason"] == "accepted"
+
+
+def test_answers_cut_off_by_the_step_limit_are_not_stored():
+    cache = VerdictCache()
+    app = build_app([], False, response_cache=cache)
+    question = {"messages": [HumanMessage(content="Write")]}
+
+    app.invoke(question, {"recursion_limit": 3})
+
+    assert cache.get(response_cache_key(question["messages"])) is None
+
+
+def test_key_ignores_formatting_and_per_run_settings():
+    messages = [HumanMessage(content="Write\r\nit  \n", id="a")]
+    same = [HumanMessage(content="Write\nit", id="b")]
+
+    key = response_cache_key(messages, {"configurable": {"thread_id": "1", "model": "m"}})
+    assert key == response_cache_key(same, {"configurable": {"thread_id": "2", "model": "m"}})
+    assert key != response_cache_key(same, {"configurable": {"model": "other"}})
+    assert key != response_cache_key([HumanMessage(content="Write it")], {"configurable": {"model": "m"}})
+
+
+def test_async_repeat_is_served_from_the_cache():
+    calls = []
+    app = build_app(calls, True, response_cache=VerdictCache())
+    question = {"messages": [HumanMessage(content="Write")]}
+
+    asyncio.run(app.ainvoke(question))
+    calls.clear()
+    result = asyncio.run(app.ainvoke(question))
+
+    assert calls == []
+    assert [m.content for m in result["messages"]] == ["Write", "draft 2", "Looks good."]
+
+
+def test_follow_up_on_a_thread_is_a_different_conversation():
+    calls = []
+    cache = VerdictCache()
+    app = build_app(calls, False, checkpointer=InMemorySaver(), response_cache=cache)
+    # The judge never accepts the follow-up's third draft: bound the run
+    config = {"configurable": {"thread_id": "t"}, "recursion_limit": 6}
+
+    app.invoke({"messages": [HumanMessage(content="Write")]}, config)
+    calls.clear()
+    result = app.invoke({"messages": [HumanMessage(content="Write")]}, config)
+
+    # The second question comes with the first answer in its history, so it
+    # misses the cache and runs the loop
+    assert not result["response_cache"]["hit"]
+    assert "assistant" in calls
@@ -0,0 +1,123 @@
+import os
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from examples.coding.sandbox import (
+    CaseResult,
+    SandboxLimits,
+    SandboxPool,
+    SandboxReport,
+    collect_test_cases,
+)
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="the sandbox needs fork and resource limits")
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = SandboxPool(size=1, limits=SandboxLimits(timeout=2.0, parallel=4))
+    pool.start()
+    yield pool
+    pool.close()
+
+
+def by_name(report):
+    return {result.name: result for result in report.results}
+
+
+def test_each_test_function_is_a_case(pool):
+    code = (
+        "def add(a, b):\n    return a + b\n\n\n"
+        "def test_add():\n    assert add(1, 2) == 3\n\n\n"
+        "def test_wrong():\n    assert add(1, 2) == 4, 'off by one'\n"
+    )
+    report = pool.run(code, tests=["assert add(2, 2) == 4"])
+
+    results = by_name(report)
+    assert {name: r.status for name, r in results.items()} == {
+        "test 1": "passed",
+        "test_add": "passed",
+        "test_wrong": "failed",
+    }
+    assert results["test_wrong"].error_type == "AssertionError"
+    assert results["test_wrong"].line == 10
+    assert not report.passed
+
+
+def test_a_case_that_hangs_times_out_without_holding_up_the_others(pool):
+    code = "def test_hangs():\n    while True:\n        pass\n\n\ndef test_quick():\n    pass\n"
+    start = time.monotonic()
+    report = pool.run(code)
+
+    results = by_name(report)
+    assert results["test_hangs"].status == "timeout"
+    assert results["test_quick"].status == "passed"
+    assert time.monotonic() - start < 8
+    assert "test_hangs" in report.digest()
+
+
+def test_sleeping_code_is_killed_at_the_wall_clock_timeout(pool):
+    report = pool.run("import time\ntime.sleep(60)\n")
+
+    (result,) = report.results
+    assert (result.name, result.status) == ("run", "timeout")
+    assert result.duration < 5
+
+
+def test_main_block_only_runs_in_main_mode(pool):
+    code = "if __name__ == '__main__':\n    raise SystemExit('ran main')\n"
+    assert pool.run(code, mode="import").passed
+    assert not pool.run(code, mode="main").passed
+
+
+def test_missing_modules_are_skipped_and_secrets_are_not_visible(pool, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "secret")
+    assert by_name(pool.run("import module_that_is_not_installed\n"))["run"].status == "skipped"
+    report = pool.run("import os\nassert 'OPENAI_API_KEY' not in os.environ\n")
+    assert report.passed, report.digest()
+
+
+def test_collects_only_argument_free_test_functions():
+    code = "def test_a():\n    pass\n\ndef test_b(x):\n    pass\n\ndef helper():\n    pass\n"
+    assert [case["name"] for case in collect_test_cases(code, ["assert True"])] == ["test 1", "test_a"]
+    assert collect_test_cases("def broken(:\n", ["x"]) == [{"name": "test 1", "source": "x"}]
+
+
+def test_digest_groups_identical_failures():
+    failure = dict(status="failed", error_type="ValueError", message="bad", line=3, source_line="f()")
+    report = SandboxReport(
+        [
+            CaseResult("test_a", output="trace", **failure),
+            CaseResult("test_b", **failure),
+            CaseResult("test_c", status="passed"),
+        ]
+    )
+
+    digest = report.digest()
+    assert digest.splitlines()[:2] == [
+        "Ran 3 test cases: 1 passed, 2 failed.",
+        "- test_a: ValueError: bad (solution.py line 3: `f()`) (also in test_b)",
+    ]
+    assert digest.endswith("Output of test_a (last lines):\ntrace")
+    assert report.digest(max_chars=40).endswith("[... truncated]")
+    assert SandboxReport([CaseResult("run", status="passed")]).digest() == "All test cases passed."
+
+
+def test_failing_execution_becomes_a_critique(pool, monkeypatch):
+    from examples.coding import judge
+
+    monkeypatch.setattr(judge, "get_sandbox_pool", lambda: pool)
+    monkeypatch.setenv("CODE_EXECUTION", "import")
+    messages = [
+        HumanMessage(content="Write add"),
+        AIMessage(content="```python\ndef add(a, b):\n    return a - b\n```"),
+    ]
+
+    (critique,) = judge.check_execution(
+        {"messages": messages}, {"configurable": {"tests": ["assert add(1, 2) == 3"]}}
+    )["messages"]
+    assert critique.content.startswith("I ran the code and it failed:")
+    assert "test 1: AssertionError" in critique.content
+    assert judge.check_execution({"messages": messages}) is None
@@ -0,0 +1,35 @@
+import threading
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from langgraph_reflection import with_speculative_drafts
+
+
+def test_sync_losers_finish_their_call_but_are_not_judged():
+    release = threading.Event()
+    slow_draft_done = threading.Event()
+    judged = []
+
+    def assistant(state, config):
+        index = config["configurable"]["draft_index"]
+        if index == 1:
+            # Still generating when the other draft wins
+            release.wait(5)
+            slow_draft_done.set()
+        return {"messages": [AIMessage(content=f"draft {index}")]}
+
+    def judge(state):
+        judged.append(state["messages"][-1].content)
+        return None
+
+    graph, _ = with_speculative_drafts(assistant, judge, num_drafts=2)
+    update = graph.invoke({"messages": [HumanMessage(content="question")]})
+
+    assert update["messages"][-1].content == "draft 0"
+    release.set()
+    # The slow draft's call is not interrupted...
+    assert slow_draft_done.wait(2)
+    time.sleep(0.05)
+    # ...but it is never judged once a winner is known
+    assert judged == ["draft 0"]
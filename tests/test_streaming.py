@@ -0,0 +1,98 @@
+import asyncio
+
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.config import get_stream_writer
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+from langgraph_reflection import astream_reflection, create_reflection_graph, stream_reflection
+
+
+def as_graph(node):
+    graph = StateGraph(MessagesState)
+    graph.add_node("node", node)
+    graph.add_edge(START, "node")
+    graph.add_edge("node", END)
+    return graph.compile()
+
+
+def streaming_assistant(calls):
+    def assistant(state):
+        calls.append(len(state["messages"]))
+        draft = sum(isinstance(m, AIMessage) for m in state["messages"]) + 1
+        model = GenericFakeChatModel(messages=iter([AIMessage(content=f"draft number {draft}")]))
+        return {"messages": [model.invoke(state["messages"])]}
+
+    return assistant
+
+
+def judge_until(draft):
+    def judge(state):
+        get_stream_writer()({"checked": state["messages"][-1].content})
+        if not state["messages"][-1].content.endswith(str(draft)):
+            return {"messages": [HumanMessage(content="Try again.")]}
+        return None
+
+    return judge
+
+
+def test_events_follow_the_rounds():
+    calls = []
+    app = create_reflection_graph(as_graph(streaming_assistant(calls)), judge_until(2)).compile()
+
+    events = list(stream_reflection(app, {"messages": [HumanMessage(content="Write")]}))
+
+    kinds = [event.type for event in events if event.type != "token"]
+    assert kinds == [
+        "round_start", "draft", "custom", "critique",
+        "round_start", "draft", "custom", "accepted",
+        "end",
+    ]
+    tokens = [event for event in events if event.type == "token"]
+    assert "".join(event.data for event in tokens if event.round == 1) == "draft number 1"
+    assert "".join(event.data for event in tokens if event.round == 2) == "draft number 2"
+    end = events[-1]
+    assert (end.round, end.data) == (2, "accepted")
+    assert end.metadata["state"]["messages"][-1].content == "draft number 2"
+    assert events[-2].data.content == "draft number 2"
+
+
+def test_running_out_of_steps_ends_with_max_steps():
+    calls = []
+    app = create_reflection_graph(as_graph(streaming_assistant(calls)), judge_until(99)).compile()
+
+    events = list(
+        stream_reflection(app, {"messages": [HumanMessage(content="Write")]}, {"recursion_limit": 6})
+    )
+
+    assert events[-1].type == "end"
+    assert events[-1].data == "max_steps"
+
+
+def test_breaking_out_stops_the_run():
+    calls = []
+    app = create_reflection_graph(as_graph(streaming_assistant(calls)), judge_until(99)).compile()
+
+    for event in stream_reflection(app, {"messages": [HumanMessage(content="Write")]}):
+        if event.type == "critique":
+            break
+
+    assert len(calls) == 1
+
+
+def test_async_stream_matches_the_sync_one():
+    app = create_reflection_graph(as_graph(streaming_assistant([])), judge_until(2)).compile()
+
+    async def collect():
+        return [
+            event.type
+            async for event in astream_reflection(app, {"messages": [HumanMessage(content="Write")]})
+            if event.type != "token"
+        ]
+
+    sync_kinds = [
+        event.type
+        for event in stream_reflection(app, {"messages": [HumanMessage(content="Write")]})
+        if event.type != "token"
+    ]
+    assert asyncio.run(collect()) == sync_kinds